@@ -0,0 +1,226 @@
+"""
+Benchmark harness for install_skills.py.
+
+Generates a synthetic upstream repository with the plugins/<category>/skills/<skill>
+layout as a local bare repository, points a private copy of the installer at it
+through a file:// URL and times the discovery, install and upgrade paths. Results
+are printed (or written) as JSON so runs can be compared for regressions.
+"""
+
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import json
+import argparse
+import platform
+import random
+import statistics
+import time
+from pathlib import Path
+
+INSTALLER = Path(__file__).parent / "install_skills.py"
+GIT_IDENTITY = ["-c", "user.name=benchmark", "-c", "user.email=benchmark@localhost"]
+
+# Scenario name -> installer arguments, run in this order against the same cache and target
+SCENARIOS = [
+    ("discover_cold", ["--list", "--json"]),
+    ("discover_warm", ["--list", "--json"]),
+    ("install", ["--target", "{target}", "--yes"]),
+    ("install_noop", ["--target", "{target}", "--yes"]),
+    ("upgrade", ["--target", "{target}", "--upgrade", "--refresh"]),
+    ("upgrade_noop", ["--target", "{target}", "--upgrade"]),
+]
+MUTATING_SCENARIO = "upgrade"  # Upstream skills are changed right before this scenario
+
+def run_git(args, cwd):
+    """Run a git command, raising on failure."""
+    return subprocess.run(["git", *GIT_IDENTITY, *args], cwd=cwd, check=True, text=True, capture_output=True)
+
+def write_skill(skill_dir, category, skill_name, file_count, file_size, rng):
+    """Write one synthetic skill: a SKILL.md with frontmatter plus reference files."""
+    (skill_dir / "references").mkdir(parents=True, exist_ok=True)
+    with open(skill_dir / "SKILL.md", "w", encoding="utf-8") as f:
+        f.write(f"---\nname: {skill_name}\ndescription: Synthetic {category} skill for benchmarking.\n---\n\n")
+        f.write(f"# {skill_name}\n")
+    for index in range(1, file_count):
+        with open(skill_dir / "references" / f"ref-{index:03d}.md", "wb") as f:
+            f.write(rng.randbytes(file_size // 2).hex().encode("ascii"))
+
+def generate_repository(work_dir, categories, skills_per_category, file_count, file_size, seed=0):
+    """
+    Create the synthetic upstream as a bare repository.
+
+    Args:
+        work_dir (Path): Directory receiving the source tree ("src") and the bare repository ("upstream.git").
+        categories (int): Number of plugin categories.
+        skills_per_category (int): Skills in each category.
+        file_count (int): Files per skill, SKILL.md included.
+        file_size (int): Approximate size in bytes of each reference file.
+        seed (int): Seed for the generated file contents.
+
+    Returns:
+        tuple: (bare repository path, source working tree path, {skill name: repository path})
+    """
+    rng = random.Random(seed)
+    src_path = work_dir / "src"
+    bare_path = work_dir / "upstream.git"
+    src_path.mkdir()
+    run_git(["init", "-q", "-b", "main"], cwd=src_path)
+
+    skills = {}
+    for category_index in range(categories):
+        category = f"category-{category_index:03d}"
+        for skill_index in range(skills_per_category):
+            skill_name = f"{category}-skill-{skill_index:03d}"
+            repo_path = f"plugins/{category}/skills/{skill_name}"
+            write_skill(src_path / repo_path, category, skill_name, file_count, file_size, rng)
+            skills[skill_name] = repo_path
+
+    run_git(["add", "-A"], cwd=src_path)
+    run_git(["commit", "-q", "-m", "Generate synthetic skills"], cwd=src_path)
+    run_git(["init", "-q", "--bare", "-b", "main", str(bare_path)], cwd=work_dir)
+    # Partial clones and fetches by object id must be allowed, as on GitHub
+    run_git(["config", "uploadpack.allowFilter", "true"], cwd=bare_path)
+    run_git(["config", "uploadpack.allowAnySHA1InWant", "true"], cwd=bare_path)
+    run_git(["push", "-q", str(bare_path), "main"], cwd=src_path)
+    return bare_path, src_path, skills
+
+def mutate_repository(src_path, bare_path, skills, fraction, seed=1):
+    """
+    Append to the SKILL.md of a fraction of the skills and push the commit.
+
+    Returns:
+        int: Number of skills changed.
+    """
+    rng = random.Random(seed)
+    names = sorted(skills)
+    changed = rng.sample(names, max(1, round(len(names) * fraction))) if names else []
+    for skill_name in changed:
+        with open(src_path / skills[skill_name] / "SKILL.md", "a", encoding="utf-8") as f:
+            f.write(f"\nRevision {rng.random()}\n")
+    run_git(["commit", "-q", "-am", "Update synthetic skills"], cwd=src_path)
+    run_git(["push", "-q", str(bare_path), "main"], cwd=src_path)
+    return len(changed)
+
+def prepare_installer(work_dir, bare_path, skills, fetch_strategy=None, materialize=None):
+    """Copy the installer next to a generated skills.json pointing at the bare repository."""
+    installer_dir = work_dir / "installer"
+    installer_dir.mkdir()
+    shutil.copy2(INSTALLER, installer_dir / INSTALLER.name)
+    config = {"repo_url": bare_path.resolve().as_uri(), "skills": skills}
+    if fetch_strategy:
+        config["fetch_strategy"] = fetch_strategy
+    if materialize:
+        config["materialize"] = materialize
+    with open(installer_dir / "skills.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+    return installer_dir / INSTALLER.name
+
+def time_installer(installer, args, env):
+    """Run the installer once and return its wall time in seconds."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, str(installer), "--lang", "en", *args], env=env,
+                            cwd=installer.parent, text=True, capture_output=True, stdin=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"install_skills.py {' '.join(args)} failed:\n{result.stdout}\n{result.stderr}")
+    return elapsed
+
+def run_suite(work_dir, options):
+    """
+    Generate a repository and time every scenario once.
+
+    Returns:
+        dict: {scenario name: seconds}
+    """
+    bare_path, src_path, skills = generate_repository(
+        work_dir, options.categories, options.skills, options.files, options.file_size, seed=options.seed)
+    installer = prepare_installer(work_dir, bare_path, skills, options.fetch_strategy, options.materialize)
+    env = dict(os.environ, SKILLS_MANAGER_CACHE=str(work_dir / "cache"))
+    target = str(work_dir / "target")
+
+    timings = {}
+    for name, args in SCENARIOS:
+        if name == MUTATING_SCENARIO:
+            mutate_repository(src_path, bare_path, skills, options.changed, seed=options.seed + 1)
+        timings[name] = time_installer(installer, [arg.format(target=target) for arg in args], env)
+    return timings
+
+def git_version():
+    return subprocess.run(["git", "--version"], text=True, capture_output=True).stdout.strip()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark install_skills.py against a generated local skills repository.",
+        epilog="""
+Examples:
+  python benchmark_skills.py                                   # Default size, JSON on stdout
+  python benchmark_skills.py --categories 20 --skills 50 -o bench.json
+  python benchmark_skills.py --fetch-strategy full --repeat 5
+  python benchmark_skills.py --materialize worktree            # Compare with checkout-and-copy installs
+""",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--categories", type=int, default=5, help="Number of plugin categories (default: 5)")
+    parser.add_argument("--skills", type=int, default=10, help="Skills per category (default: 10)")
+    parser.add_argument("--files", type=int, default=5, help="Files per skill, SKILL.md included (default: 5)")
+    parser.add_argument("--file-size", type=int, default=4096, metavar="BYTES", help="Size of each reference file (default: 4096)")
+    parser.add_argument("--changed", type=float, default=0.1, metavar="FRACTION", help="Fraction of skills changed before the upgrade (default: 0.1)")
+    parser.add_argument("--fetch-strategy", choices=["full", "blobless", "treeless"], help="Fetch strategy passed to the installer")
+    parser.add_argument("--materialize", choices=["objects", "worktree"], help="Materialization backend passed to the installer")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the suite this many times on fresh repositories (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated contents (default: 0)")
+    parser.add_argument("--output", "-o", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated repositories and targets")
+    options = parser.parse_args()
+
+    runs = []
+    for run_index in range(options.repeat):
+        work_dir = Path(tempfile.mkdtemp(prefix="skills-bench-"))
+        try:
+            print(f"Run {run_index + 1}/{options.repeat} in {work_dir}", file=sys.stderr)
+            runs.append(run_suite(work_dir, options))
+        finally:
+            if not options.keep:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {}
+    for name, _ in SCENARIOS:
+        samples = [run[name] for run in runs]
+        results[name] = {
+            "seconds": [round(sample, 4) for sample in samples],
+            "median": round(statistics.median(samples), 4),
+            "min": round(min(samples), 4),
+        }
+
+    report = {
+        "parameters": {
+            "categories": options.categories,
+            "skills_per_category": options.skills,
+            "skills": options.categories * options.skills,
+            "files_per_skill": options.files,
+            "file_size": options.file_size,
+            "changed_fraction": options.changed,
+            "fetch_strategy": options.fetch_strategy or "default",
+            "materialize": options.materialize or "default",
+            "repeat": options.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git": git_version(),
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,30 @@ import subprocess
 import tempfile
 import json
 import argparse
+import hashlib
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
 from pathlib import Path
 import locale
+import re
+import threading
+import contextvars
+import bisect
+import fnmatch
+import posixpath
+import io
+import tarfile
+import platform
+import random
+import sysconfig
+import site
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
 
 # --- Localization Support ---
 TEXTS = {
@@ -24,9 +46,32 @@ TEXTS = {
         "not_installed": "✗ {0} is NOT installed.",
         "installing_pkg": "Installing {0}...",
         "check_deps": "  Checking dependencies for {0}...",
-        "found_reqs": "  Found requirements.txt. Installing...",
-        "installing_dbt": "  Installing dbt-core...",
-        "installing_sqlfluff": "  Installing sqlfluff (SQL linter)...",
+        "found_reqs": "  Found requirements.txt. Queued for installation.",
+        "queued_pkg": "  {0} queued for installation.",
+        "tool_outdated": "✗ {0} {1} is older than the required {2}.",
+        "warn_unknown_tool": "  Warning: Tool '{0}' is not defined in skills.json.",
+        "installing_deps": "\nInstalling dependencies for {0} in a single pip run...",
+        "deps_conflict": "Error: Conflicting requirement pins, dependencies were not installed:",
+        "deps_conflict_item": "  {0}=={1} (required by {2})",
+        "err_deps_failed": "Error installing dependencies: {0}",
+        "deps_satisfied": "\nDependencies of {0} are already satisfied (unchanged since the last pip run), skipping pip.",
+        "wheelhouse_install": "Installing from wheelhouse {0} (no package index).",
+        "err_wheelhouse_missing": "wheelhouse {0} does not exist (build it with --build-wheelhouse)",
+        "wheelhouse_building": "Building wheelhouse in {0} for {1} requirement file(s) and {2} package(s)...",
+        "wheelhouse_empty": "The configured skills declare no dependencies; nothing to build.",
+        "wheelhouse_built": "✓ Wheelhouse ready: {0} wheel(s) in {1}.",
+        "err_wheelhouse_build": "Error building wheelhouse: {0}",
+        "bundle_written": "✓ Bundle written: {0} ({1} skill(s), {2} file(s), {3}).",
+        "err_bundle_write": "Error writing bundle {0}: {1}",
+        "bundle_importing": "Importing bundle {0} ({1} skill(s) from {2})...",
+        "err_bundle_read": "Error reading bundle {0}: {1}",
+        "err_bundle_zstd": "Error: {0} needs zstd compression, which Python {1} does not support (use .tar.gz or .tar.xz, or Python 3.14+).",
+        "err_bundle_invalid": "Error: {0} is not a skills bundle (it must start with {1}, version {2}).",
+        "err_bundle_member": "Error: Unexpected bundle member {0}.",
+        "err_bundle_skill_name": "Error: {0} lists invalid skill names: {1}.",
+        "err_bundle_missing": "Error: {0} is listed in the bundle manifest but its files are missing.",
+        "bundle_mismatch": "content does not match the bundle manifest",
+        "bundle_bad_member": "unexpected member {0}",
         "created_dir": "Created directory: {0}",
         "err_create_dir": "Error creating directory {0}: {1}",
         "fetching_repo": "\nFetching latest skills from repository...",
@@ -38,12 +83,71 @@ TEXTS = {
         "installing": "Installing",
         "processed_success": "✓ Successfully processed {0}.",
         "failed_copy": "Failed to copy {0}: {1}",
+        "err_blob_missing": "object {0} is not available in the cached mirror",
+        "err_offline_not_cached": "Error: the files of {0} are not in the cache, rerun without --offline to download them.",
+        "warn_symlink_skipped": "  Warning: Skipping {0}: it links to {1}, which is not a file in the repository.",
+        "up_to_date": "  ✓ {0} is already up to date.",
+        "target_header": "\n=== Target: {0} ===",
+        "found_skills_in": "Found skills in {0}: {1}",
+        "files_changed": "  Files: {0} added, {1} modified, {2} removed.",
+        "warn_save_manifest": "Warning: Could not save install manifest: {0}",
+        "catalog_cached": "Using cached skill catalog for commit {0}.",
+        "catalog_building": "Indexing remote skills at commit {0}...",
+        "catalog_count": "{0} skills in {1} categories (commit {2}).",
+        "search_index_building": "Building search index for commit {0}...",
+        "search_results": "\n=== Skills matching '{0}' ===",
+        "search_count": "{0} matching skill(s), showing {1} (commit {2}).",
+        "search_none": "No skills match '{0}'.",
+        "search_opt": "/text. Search all skills by name, category or description",
+        "page_info": "-- Page {0}/{1}: 'n' next, 'p' previous --",
+        "confirm_install_matching": "\nInstall these {0} skill(s)? [y/N]: ",
+        "update_available": "  ↑ {0}: {1} → {2}",
+        "update_current": "  ✓ {0} is up to date ({1}).",
+        "update_gone": "  ✗ {0}: {1} no longer exists upstream.",
+        "updates_summary": "\n{0} of {1} installed skill(s) have updates (remote commits {2}).",
+        "err_check_remote": "Error: Could not determine the remote state of {0}.",
+        "lock_written": "Lockfile updated: skills.lock ({0}).",
+        "warn_save_lock": "Warning: Could not save skills.lock: {0}",
+        "err_no_lock": "Error: skills.lock not found or not for this repository. Run an install without --frozen first.",
+        "lock_verified": "✓ Installed skills match skills.lock ({0}).",
+        "lock_skill_missing": "  ✗ {0} is not installed in {1}.",
+        "lock_skill_differs": "  ✗ {0} in {1} differs from skills.lock.",
+        "lock_mismatch": "Installed skills do not match skills.lock.",
+        "frozen_install": "Installing the commits locked in skills.lock ({0})...",
+        "source_header": "\n=== Source: {0} ({1}) ===",
+        "err_lock_commit": "Error: Locked commit {0} is not available from {1}.",
+        "err_lock_content": "Error: {0} installed from commit {1} does not match its content hash in skills.lock.",
+        "gc_summary": "Store: removed {0} unused file(s) ({1} bytes), kept {2}.",
+        "timings_header": "\nTimings (time, files copied, hardlinks, bytes copied, subprocess time):",
+        "timings_subprocesses": "\nSubprocesses:",
+        "trace_written": "Trace written to {0} (open in chrome://tracing or ui.perfetto.dev).",
+        "warn_trace_file": "Warning: Could not write trace file: {0}",
+        "fleet_scanning": "Scanning {0} for skill directories (depth {1})...",
+        "fleet_none": "No skill directories found under {0}.",
+        "fleet_found": "Found {0} skill director(ies).",
+        "fleet_summary": "\nFleet: {0} target(s) scanned, {1} stale, {2} updated, {3} failed; {4} skill(s) updated ({5:.1f}s).",
+        "fleet_failed_target": "  ✗ {0}: {1}",
+        "watch_start": "Watching {0} target(s) for upstream changes every {1}s (Ctrl+C to stop)...",
+        "watch_changed": "\n[{0}] {1} moved to {2}, updating...",
+        "watch_poll_failed": "[{0}] Could not reach {1}, retrying in {2}s.",
+        "watch_update_failed": "[{0}] Update failed, retrying in {1}s.",
+        "watch_stopped": "\nStopped watching.",
+        "err_watch_offline": "Error: --watch polls the remote and cannot be combined with --offline.",
+        "waiting_for_lock": "Waiting for another installation to release {0}...",
+        "err_lock_timeout": "Error: Timed out after {1}s waiting for lock {0}.",
+        "cache_cloning": "Creating local mirror cache (first run)...",
+        "cache_fetching": "Updating local mirror cache...",
+        "cache_fresh": "Using cached mirror (fetched less than {0}s ago).",
+        "cache_offline": "Offline mode: using cached mirror without fetching.",
+        "err_offline_no_cache": "Error: --offline requested but no cached mirror exists for {0}. Run once without --offline first.",
         "interactive_help": """
 === Interactive Command Help ===
 Options:
   <Numbers> : Select specific skills by index (separated by space).
               Example: '1 3' installs the first and third listed skills.
   A         : Install All skills (Default).
+  /text     : Only list skills whose name or category matches text ('/' alone lists all again).
+  n / p     : Next / previous page of a long list.
   H         : Show this help message.
 ===============================
 """,
@@ -73,18 +177,16 @@ Options:
         "act_install_config": "2. Install and Add to Configuration (Update skills.json)",
         "enter_choice_short": "Enter choice (1/2) [Default: 1]: ",
         "loc_display": "\nLocation: {0}", 
-        "processing": "\nProcessing {0}...",
-        "removing_existing": "  Removing existing installation...",
-        "installed_to": "  ✓ Installed to {0}",
         "added_to_config": "  Added '{0}' to configuration.",
-        "err_installing": "  Error installing {0}: {1}",
         "config_saved": "\nConfiguration saved to skills.json.",
         "warn_save_config": "Warning: Could not save configuration: {0}",
         "browse_header": "=== Browse Remote Skills ===",
         "manager_header": "=== Skills Manager ===",
         "checking_updates": "Checking for updates on installed skills...",
         "no_skills_update": "No known skills found in this location to update.",
-        "found_skills": "Found skills: {0}",
+        "status_empty": "No installed skills found in the known targets.",
+        "status_line": "  {0:<32} {1:<24} {2} file(s), {3:<9} updated {4}  dependencies: {5}",
+        "status_summary": "\n{0} skill(s) in {1} target(s), {2} in total.",
         "done": "\n---------------------------------------------------------\nDone."
     },
     "zh": {
@@ -101,9 +203,32 @@ Options:
         "not_installed": "✗ {0} 未安装。",
         "installing_pkg": "正在安装 {0}...",
         "check_deps": "  正在检查 {0} 的依赖...",
-        "found_reqs": "  发现 requirements.txt。正在安装...",
-        "installing_dbt": "  正在安装 dbt-core...",
-        "installing_sqlfluff": "  正在安装 sqlfluff (SQL 代码检查)...",
+        "found_reqs": "  发现 requirements.txt。已加入安装队列。",
+        "queued_pkg": "  {0} 已加入安装队列。",
+        "tool_outdated": "✗ {0} {1} 低于要求的版本 {2}。",
+        "warn_unknown_tool": "  警告：skills.json 中未定义工具 '{0}'。",
+        "installing_deps": "\n正在通过一次 pip 运行为 {0} 安装依赖...",
+        "deps_conflict": "错误：依赖版本固定冲突，未安装依赖：",
+        "deps_conflict_item": "  {0}=={1}（由 {2} 要求）",
+        "err_deps_failed": "安装依赖出错：{0}",
+        "deps_satisfied": "\n{0} 的依赖已满足（自上次 pip 运行以来未变化），跳过 pip。",
+        "wheelhouse_install": "正在从 wheelhouse {0} 安装（不使用包索引）。",
+        "err_wheelhouse_missing": "wheelhouse {0} 不存在（请使用 --build-wheelhouse 构建）",
+        "wheelhouse_building": "正在 {0} 中构建 wheelhouse，包含 {1} 个依赖文件和 {2} 个包...",
+        "wheelhouse_empty": "已配置的 Skills 未声明任何依赖，无需构建。",
+        "wheelhouse_built": "✓ wheelhouse 已就绪：{1} 中共 {0} 个 wheel。",
+        "err_wheelhouse_build": "构建 wheelhouse 出错：{0}",
+        "bundle_written": "✓ 归档已写入：{0}（{1} 个 Skill，{2} 个文件，{3}）。",
+        "err_bundle_write": "写入归档 {0} 出错：{1}",
+        "bundle_importing": "正在导入归档 {0}（来自 {2} 的 {1} 个 Skill）...",
+        "err_bundle_read": "读取归档 {0} 出错：{1}",
+        "err_bundle_zstd": "错误：{0} 需要 zstd 压缩，而 Python {1} 不支持（请使用 .tar.gz 或 .tar.xz，或 Python 3.14 及以上版本）。",
+        "err_bundle_invalid": "错误：{0} 不是 Skills 归档（必须以版本 {2} 的 {1} 开头）。",
+        "err_bundle_member": "错误：归档中存在意外的成员 {0}。",
+        "err_bundle_skill_name": "错误：{0} 列出了无效的 Skill 名称：{1}。",
+        "err_bundle_missing": "错误：归档清单中列出了 {0}，但缺少其文件。",
+        "bundle_mismatch": "内容与归档清单不一致",
+        "bundle_bad_member": "意外的成员 {0}",
         "created_dir": "已创建目录：{0}",
         "err_create_dir": "创建目录 {0} 失败：{1}",
         "fetching_repo": "\n正在从仓库获取最新 Skills...",
@@ -115,12 +240,71 @@ Options:
         "installing": "正在安装",
         "processed_success": "✓ 成功处理 {0}。",
         "failed_copy": "复制 {0} 失败：{1}",
+        "err_blob_missing": "缓存镜像中没有对象 {0}",
+        "err_offline_not_cached": "错误：缓存中没有 {0} 的文件，请不带 --offline 重新运行以下载它们。",
+        "warn_symlink_skipped": "  警告：跳过 {0}：它链接到 {1}，而这不是仓库中的文件。",
+        "up_to_date": "  ✓ {0} 已是最新。",
+        "target_header": "\n=== 目标：{0} ===",
+        "found_skills_in": "在 {0} 中发现 Skills：{1}",
+        "files_changed": "  文件：新增 {0}，修改 {1}，删除 {2}。",
+        "warn_save_manifest": "警告：无法保存安装清单：{0}",
+        "catalog_cached": "使用提交 {0} 的缓存 Skill 目录。",
+        "catalog_building": "正在为提交 {0} 建立远程 Skills 索引...",
+        "catalog_count": "共 {0} 个 Skills，{1} 个分类（提交 {2}）。",
+        "search_index_building": "正在为提交 {0} 构建搜索索引...",
+        "search_results": "\n=== 与 '{0}' 匹配的 Skills ===",
+        "search_count": "共 {0} 个匹配的 Skill，显示 {1} 个（提交 {2}）。",
+        "search_none": "没有与 '{0}' 匹配的 Skill。",
+        "search_opt": "/文本. 按名称、分类或描述搜索所有 Skills",
+        "page_info": "-- 第 {0}/{1} 页：'n' 下一页，'p' 上一页 --",
+        "confirm_install_matching": "\n安装这 {0} 个 Skill？[y/N]: ",
+        "update_available": "  ↑ {0}：{1} → {2}",
+        "update_current": "  ✓ {0} 已是最新（{1}）。",
+        "update_gone": "  ✗ {0}：上游已不存在 {1}。",
+        "updates_summary": "\n{1} 个已安装 Skill 中有 {0} 个可更新（远程提交 {2}）。",
+        "err_check_remote": "错误：无法确定 {0} 的远程状态。",
+        "lock_written": "锁文件已更新：skills.lock（{0}）。",
+        "warn_save_lock": "警告：无法保存 skills.lock：{0}",
+        "err_no_lock": "错误：未找到 skills.lock，或它不属于此仓库。请先在不带 --frozen 的情况下运行一次安装。",
+        "lock_verified": "✓ 已安装的 Skills 与 skills.lock 一致（{0}）。",
+        "lock_skill_missing": "  ✗ {0} 未安装在 {1} 中。",
+        "lock_skill_differs": "  ✗ {1} 中的 {0} 与 skills.lock 不一致。",
+        "lock_mismatch": "已安装的 Skills 与 skills.lock 不一致。",
+        "frozen_install": "正在安装 skills.lock 中锁定的提交（{0}）...",
+        "source_header": "\n=== 来源：{0}（{1}）===",
+        "err_lock_commit": "错误：无法从 {1} 获取锁定的提交 {0}。",
+        "err_lock_content": "错误：从提交 {1} 安装的 {0} 与 skills.lock 中的内容哈希不一致。",
+        "gc_summary": "存储：已删除 {0} 个未使用的文件（{1} 字节），保留 {2} 个。",
+        "timings_header": "\n耗时统计（时间、复制的文件、硬链接、复制的字节数、子进程时间）：",
+        "timings_subprocesses": "\n子进程：",
+        "trace_written": "跟踪文件已写入 {0}（可在 chrome://tracing 或 ui.perfetto.dev 中打开）。",
+        "warn_trace_file": "警告：无法写入跟踪文件：{0}",
+        "fleet_scanning": "正在扫描 {0} 下的 Skills 目录（深度 {1}）...",
+        "fleet_none": "在 {0} 下未找到 Skills 目录。",
+        "fleet_found": "找到 {0} 个 Skills 目录。",
+        "fleet_summary": "\n批量升级：扫描 {0} 个目标，{1} 个过期，{2} 个已更新，{3} 个失败；共更新 {4} 个 Skill（{5:.1f} 秒）。",
+        "fleet_failed_target": "  ✗ {0}：{1}",
+        "watch_start": "正在每 {1} 秒检查 {0} 个目标的上游变化（按 Ctrl+C 停止）...",
+        "watch_changed": "\n[{0}] {1} 已更新到 {2}，正在更新...",
+        "watch_poll_failed": "[{0}] 无法访问 {1}，{2} 秒后重试。",
+        "watch_update_failed": "[{0}] 更新失败，{1} 秒后重试。",
+        "watch_stopped": "\n已停止监视。",
+        "err_watch_offline": "错误：--watch 需要查询远程，不能与 --offline 一起使用。",
+        "waiting_for_lock": "正在等待其他安装进程释放 {0}...",
+        "err_lock_timeout": "错误：等待锁 {0} 超过 {1} 秒。",
+        "cache_cloning": "正在创建本地镜像缓存（首次运行）...",
+        "cache_fetching": "正在更新本地镜像缓存...",
+        "cache_fresh": "使用缓存镜像（距上次获取不足 {0} 秒）。",
+        "cache_offline": "离线模式：使用缓存镜像，不进行获取。",
+        "err_offline_no_cache": "错误：指定了 --offline，但 {0} 没有缓存镜像。请先在不带 --offline 的情况下运行一次。",
         "interactive_help": """
 === 交互式命令帮助 ===
 选项:
   <数字> : 通过索引选择特定 Skills（用空格分隔）。
            例如：'1 3' 安装列表中的第1和第3个 Skill。
   A      : 安装所有 Skills（默认）。
+  /文本  : 只列出名称或分类与文本匹配的 Skills（单独输入 '/' 则重新列出全部）。
+  n / p  : 长列表的下一页 / 上一页。
   H      : 显示此帮助信息。
 ===============================
 """,
@@ -150,18 +334,16 @@ Options:
         "act_install_config": "2. 安装并添加到配置 (更新 skills.json)",
         "enter_choice_short": "输入选择 (1/2) [默认: 1]: ",
         "loc_display": "\n位置：{0}", 
-        "processing": "\n正在处理 {0}...",
-        "removing_existing": "  正在移除现有安装...",
-        "installed_to": "  ✓ 已安装至 {0}",
         "added_to_config": "  已将 '{0}' 添加到配置。",
-        "err_installing": "  安装 {0} 出错：{1}",
         "config_saved": "\n配置已保存至 skills.json。",
         "warn_save_config": "警告：无法保存配置：{0}",
         "browse_header": "=== 浏览远程 Skills ===",
         "manager_header": "=== Skills 管理器 ===",
         "checking_updates": "正在检查已安装 Skills 的更新...",
         "no_skills_update": "此处未找到已知的 Skills 可供更新。",
-        "found_skills": "发现 Skills：{0}",
+        "status_empty": "在已知目标中未找到已安装的 Skills。",
+        "status_line": "  {0:<32} {1:<24} {2} 个文件，{3:<9} 更新于 {4}  依赖：{5}",
+        "status_summary": "\n{1} 个目标中共 {0} 个 Skills，总计 {2}。",
         "done": "\n---------------------------------------------------------\n完成。"
     }
 }
@@ -183,55 +365,204 @@ def get_language():
         pass
     return "en"
 
-CURRENT_LANG = get_language()
-
 def t(key, *args):
     """Get localized text."""
-    lang_dict = TEXTS.get(CURRENT_LANG, TEXTS["en"])
+    lang_dict = TEXTS.get(context().lang, TEXTS["en"])
     text = lang_dict.get(key, TEXTS["en"].get(key, key))
     if args:
         return text.format(*args)
     return text
 
 # Load Configuration
-def load_config():
-    config_path = Path(__file__).parent / "skills.json"
-    if not config_path.exists():
-        print(t("config_not_found"))
-        sys.exit(1)
-    with open(config_path, "r") as f:
+CONFIG_PATH = Path(__file__).parent / "skills.json"
+
+def load_config(config_path=None):
+    """Read a skills.json file (default: the one next to this script); raises OSError if missing."""
+    with open(config_path or CONFIG_PATH, "r") as f:
         return json.load(f)
 
-CONFIG = load_config()
-SKILLS_REPO = CONFIG["repo_url"]
-SKILLS_MAPPING = CONFIG["skills"]
+def save_config_skills(new_skills):
+    """
+    Add skill mappings to skills.json.
+
+    The file is re-read under a lock and replaced atomically, so concurrent runs
+    neither corrupt it nor drop each other's additions.
+    """
+    config_path = context().config_path
+    if config_path is None:
+        return
+    with file_lock(config_path.with_name(".skills.json.lock")):
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        config.setdefault("skills", {}).update(new_skills)
+        write_json_atomic(config_path, config)
+
+def load_sources(config):
+    """
+    Collect the skill sources of a configuration.
+
+    The top-level repo_url and skills form the default source; each entry of
+    the optional "sources" list adds a repository with its own url, ref
+    (branch or commit, default HEAD) and skills mapping. A source's optional
+    namespace prefixes its skill names ("<namespace>-<skill>"). When several
+    sources provide the same skill name, the first source wins.
+
+    Returns:
+        tuple: ({source name: {"url", "ref", "skills"}}, {skill name: repository path},
+            {skill name: source name})
+    """
+    sources = {DEFAULT_SOURCE: {"url": config["repo_url"], "ref": config.get("ref", "HEAD"),
+                                "skills": config.get("skills", {})}}
+    for index, source in enumerate(config.get("sources", [])):
+        namespace = source.get("namespace")
+        sources[source.get("name") or f"source-{index + 1}"] = {
+            "url": source["url"],
+            "ref": source.get("ref", "HEAD"),
+            "skills": {f"{namespace}-{name}" if namespace else name: path
+                       for name, path in source.get("skills", {}).items()},
+        }
+
+    mapping, owners = {}, {}
+    for source_name, source in sources.items():
+        for skill_name, repo_path in source["skills"].items():
+            if skill_name not in mapping:
+                mapping[skill_name] = repo_path
+                owners[skill_name] = source_name
+    return sources, mapping, owners
+
+DEFAULT_SOURCE = "default"
+
+# --- Run Context ---
+class RunContext:
+    """
+    Configuration, settings and per-run state that the module functions use.
+
+    Each SkillsManager owns one and makes it current with use_context(). The
+    current context is held in a context variable, so managers running in
+    different threads never see each other's settings, and worker threads of
+    run_in_parallel inherit the context of their caller. Outside any manager a
+    shared default context (no configuration, default settings) is current.
+    """
+
+    def __init__(self, config=None, config_path=None, lockfile_path=None, lang="en", output=None, progress=None):
+        config = config or {}
+        self.lang = lang
+        self.config = config
+        self.config_path = Path(config_path) if config_path else None  # skills.json browse mode adds skills to
+        self.lockfile_path = Path(lockfile_path) if lockfile_path else None  # None: no lockfile
+        self.skills_repo = config.get("repo_url")
+        self.sources, self.skills_mapping, self.skill_sources = load_sources(config) if config else ({}, {}, {})
+        # Tool definitions ("tools") and the tools each skill needs ("skill_tools") come from skills.json
+        self.tools = config.get("tools", {})
+        self.skill_tools = config.get("skill_tools", {})
+        self.fetch_settings = {
+            "strategy": DEFAULT_FETCH_STRATEGY,
+            "ttl": DEFAULT_CACHE_TTL,
+            "refresh": False,
+            "offline": False,
+            "materialize": DEFAULT_MATERIALIZE,
+        }
+        self.lock_settings = {
+            "timeout": DEFAULT_LOCK_TIMEOUT,
+        }
+        self.store_settings = {
+            "enabled": False,
+        }
+        self.dependency_settings = {
+            "force": False,  # Run pip even when the fingerprints say the requirements are satisfied
+        }
+        self.wheelhouse_settings = {
+            "path": None,
+        }
+        self.job_settings = {
+            "jobs": DEFAULT_JOBS,
+        }
+        self.trace_settings = {
+            "enabled": False,
+        }
+        self.trace_spans = []  # Finished spans, in completion order
+        self.probe_results = {}  # Tool name -> installed, resolved once per run
+        self.probe_cache = None  # On-disk probe results, loaded lazily
+        self.progress = progress  # Callback receiving (event, data) progress events
+        self.output = output  # Stream receiving messages (None: sys.stdout)
+
+ACTIVE_CONTEXT = contextvars.ContextVar("active_context")
+OUTPUT_BUFFER = contextvars.ContextVar("output_buffer", default=None)  # Set while output is held back or redirected
+
+def context():
+    """Return the current run context."""
+    try:
+        return ACTIVE_CONTEXT.get()
+    except LookupError:
+        return DEFAULT_CONTEXT
+
+@contextmanager
+def use_context(run_context):
+    """Make run_context the current context of this thread (and the worker threads it starts)."""
+    token = ACTIVE_CONTEXT.set(run_context)
+    try:
+        yield run_context
+    finally:
+        ACTIVE_CONTEXT.reset(token)
+
+@contextmanager
+def redirect_output(stream):
+    """Send the messages of the enclosed block to stream instead of the context's output."""
+    token = OUTPUT_BUFFER.set(stream)
+    try:
+        yield stream
+    finally:
+        OUTPUT_BUFFER.reset(token)
+
+def echo(*values, **kwargs):
+    """Print a message to the current output (see RunContext.output and redirect_output)."""
+    stream = OUTPUT_BUFFER.get()
+    if stream is None:
+        stream = context().output or sys.stdout
+    print(*values, file=stream, **kwargs)
+
+def emit_progress(event, **data):
+    """Report a progress event to the current context's callback, if any."""
+    progress = context().progress
+    if progress is not None:
+        progress(event, data)
+
+def get_known_locations():
+    """Return the standard installation locations keyed by name."""
+    # Claude Desktop location
+    if sys.platform == "win32":
+        app_data = os.environ.get("APPDATA")
+        base = Path(app_data) if app_data else Path.home() / "AppData" / "Roaming"
+        claude_dir = base / "Claude" / "skills"
+    elif sys.platform == "darwin":
+        claude_dir = Path.home() / "Library" / "Application Support" / "Claude" / "skills"
+    else:
+        claude_dir = Path.home() / ".config" / "Claude" / "skills"
+
+    return {
+        # Windows: %USERPROFILE%\.vscode\skills, Linux/Mac: ~/.vscode/skills
+        "global": Path.home() / ".vscode" / "skills",
+        "project": Path(os.getcwd()) / "skills",
+        "claude": claude_dir,
+    }
 
 def get_target_directory():
     """Ask user for installation directory."""
-    print(t("select_install_loc"))
-    print(t("loc_global"))
-    print(t("loc_project"))
-    print(t("loc_claude"))
-    print(t("loc_custom"))
-    print(t("quit_opt"))
+    echo(t("select_install_loc"))
+    echo(t("loc_global"))
+    echo(t("loc_project"))
+    echo(t("loc_claude"))
+    echo(t("loc_custom"))
+    echo(t("quit_opt"))
     
     choice = input(t("enter_choice")).strip()
     if choice.lower() == 'q':
         sys.exit(0)
     
     if choice == "1":
-        # Windows: %USERPROFILE%\.vscode\skills, Linux/Mac: ~/.vscode/skills
-        return Path.home() / ".vscode" / "skills"
+        return get_known_locations()["global"]
     elif choice == "3":
-        # Claude Desktop location
-        if sys.platform == "win32":
-            app_data = os.environ.get("APPDATA")
-            base = Path(app_data) if app_data else Path.home() / "AppData" / "Roaming"
-            return base / "Claude" / "skills"
-        elif sys.platform == "darwin":
-            return Path.home() / "Library" / "Application Support" / "Claude" / "skills"
-        else:
-             return Path.home() / ".config" / "Claude" / "skills"
+        return get_known_locations()["claude"]
     elif choice == "4":
         custom_path = input(t("enter_path")).strip()
         if custom_path.lower() == 'q':
@@ -239,430 +570,3900 @@ def get_target_directory():
         return Path(custom_path)
     else:
         # Default to project skills folder
-        return Path(os.getcwd()) / "skills"
+        return get_known_locations()["project"]
 
-def run_command(command, cwd=None, check=True, capture_output=False):
-    """Run a shell command."""
+# --- Instrumentation ---
+TRACE_LOCAL = threading.local()  # Per-thread stack of open spans
+TRACE_LOCK = threading.Lock()
+TRACE_ORIGIN = time.perf_counter()
+
+@contextmanager
+def trace_span(name, category="phase"):
+    """
+    Record the duration of a block as a span (no-op unless tracing is enabled).
+
+    Files written, bytes copied and subprocess time counted while the span is
+    open are added to it and to every enclosing span of the same thread.
+    """
+    if not context().trace_settings["enabled"]:
+        yield
+        return
+    stack = TRACE_LOCAL.__dict__.setdefault("stack", [])
+    span = {"name": name, "cat": category, "depth": len(stack), "tid": threading.get_ident(),
+            "start": time.perf_counter(), "files": 0, "links": 0, "bytes": 0, "subprocess": 0.0}
+    stack.append(span)
     try:
-        result = subprocess.run(
-            command, 
-            cwd=cwd, 
-            check=check, 
-            shell=True, 
-            text=True, 
-            capture_output=capture_output
-        )
-        return result
-    except subprocess.CalledProcessError as e:
-        print(t("err_run_cmd", command))
-        if capture_output:
-            print(f"Stdout: {e.stdout}")
-            print(f"Stderr: {e.stderr}")
-        raise
+        yield span
+    finally:
+        stack.pop()
+        span["duration"] = time.perf_counter() - span["start"]
+        if category == "subprocess":
+            span["subprocess"] = span["duration"]
+            trace_count(subprocess=span["duration"])
+        context().trace_spans.append(span)
+
+def trace_count(**counters):
+    """Add counters (files, links, bytes, subprocess seconds) to the open spans of this thread."""
+    if context().trace_settings["enabled"]:
+        with TRACE_LOCK:
+            for span in getattr(TRACE_LOCAL, "stack", []):
+                for key, value in counters.items():
+                    span[key] += value
+
+def command_label(command):
+    """Short span name for a command line, e.g. "git fetch" or "python3 pip"."""
+    words = [word.strip('"') for word in command.split() if not word.startswith("-") and "=" not in word]
+    return " ".join([Path(words[0]).name] + words[1:2]) if words else command
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
-def check_installed(tool_name, check_command):
-    """Check if a tool is installed."""
+def print_timings():
+    """Print the recorded phase and skill spans as a table, followed by subprocess totals."""
+    echo(t("timings_header"))
+    echo(f"  {'':<44}{'Time':>9}{'Files':>7}{'Links':>7}{'Bytes':>11}{'Subproc':>9}")
+    for span in sorted(context().trace_spans, key=lambda s: s["start"]):
+        if span["cat"] == "subprocess":
+            continue
+        label = ("  " * span["depth"] + span["name"])[:43]
+        echo(f"  {label:<44}{span['duration']:>8.3f}s{span['files']:>7}{span['links']:>7}"
+             f"{format_bytes(span['bytes']):>11}{span['subprocess']:>8.3f}s")
+
+    commands = {}
+    for span in context().trace_spans:
+        if span["cat"] == "subprocess":
+            count, total = commands.get(span["name"], (0, 0.0))
+            commands[span["name"]] = (count + 1, total + span["duration"])
+    if commands:
+        echo(t("timings_subprocesses"))
+        for name, (count, total) in sorted(commands.items(), key=lambda item: -item[1][1]):
+            echo(f"  {name[:43]:<44}{total:>8.3f}s  x{count}")
+
+def write_trace_file(path):
+    """Write the recorded spans in Chrome trace event format (chrome://tracing, Perfetto)."""
+    events = [{
+        "name": span["name"],
+        "cat": span["cat"],
+        "ph": "X",
+        "ts": round((span["start"] - TRACE_ORIGIN) * 1e6),
+        "dur": round(span["duration"] * 1e6),
+        "pid": os.getpid(),
+        "tid": span["tid"],
+        "args": {"files": span["files"], "links": span["links"], "bytes": span["bytes"],
+                 "subprocess_ms": round(span["subprocess"] * 1000, 3)},
+    } for span in context().trace_spans]
     try:
-        subprocess.run(check_command, shell=True, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print(t("installed", tool_name))
-        return True
-    except subprocess.CalledProcessError:
-        print(t("not_installed", tool_name))
-        return False
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        echo(t("trace_written", path))
+    except OSError as e:
+        echo(t("warn_trace_file", e))
 
-def install_python_package(package_name):
-    """Install a Python package using pip."""
-    print(t("installing_pkg", package_name))
-    # Use quotes around sys.executable to handle paths with spaces
-    run_command(f'"{sys.executable}" -m pip install {package_name}')
+# --- Parallel Execution ---
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) + 4)  # Copying is I/O bound, a few threads beyond the cores help
 
-def manage_dependencies(skill_name, skill_path):
-    """Check and install dependencies for a skill."""
-    print(t("check_deps", skill_name))
-    
-    # Generic requirements.txt check
-    req_file = skill_path / "requirements.txt"
-    if req_file.exists():
-        print(t("found_reqs"))
-        run_command(f'"{sys.executable}" -m pip install -r requirements.txt', cwd=skill_path)
-    
-    # Specific tool checks based on skill name mapping or config
-    # Ideally this should also be in skills.json, but keeping hardcoded logic for now as per previous known logic
-    if "dbt-transformation-patterns" in skill_name:
-        if not check_installed("dbt", "dbt --version"):
-            print(t("installing_dbt"))
-            install_python_package("dbt-core")
-    
-    elif "sql-optimization-patterns" in skill_name:
-        if not check_installed("sqlfluff", "sqlfluff --version"):
-            print(t("installing_sqlfluff"))
-            install_python_package("sqlfluff")
+WORKER_LOCAL = threading.local()  # Marks threads running inside a run_in_parallel pool
 
-def update_or_install_skills(target_dir, specific_skills=None, auto_update=False):
+def run_in_parallel(func, items, jobs=None):
     """
-    Install or update skills.
-    
-    Args:
-        target_dir (Path): Destination base directory.
-        specific_skills (list): Optional list of skill keys to install/update.
-        auto_update (bool): If True, defaults to updating without prompting per skill (though we overwrite anyway).
+    Call func(item) for every item on a thread pool, yielding the results in item order.
+
+    What each call prints is buffered and written out when its result is
+    yielded, so the output reads exactly like a sequential run. Spans opened by
+    the calls nest under the caller's open spans. Called from inside a worker
+    (e.g. skills within targets in fleet mode), it runs inline so the pools do
+    not multiply.
     """
-    if not target_dir.exists():
-        try:
-            target_dir.mkdir(parents=True)
-            print(t("created_dir", target_dir))
-        except Exception as e:
-            print(t("err_create_dir", target_dir, e))
-            return
+    jobs = jobs or context().job_settings["jobs"]
+    if jobs <= 1 or len(items) <= 1 or getattr(WORKER_LOCAL, "active", False):
+        for item in items:
+            yield func(item)
+        return
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        print(t("fetching_repo"))
-        print(f"Repository: {SKILLS_REPO}")
-        
-        # Git clone (shallow) to get latest version
+    parent_stack = list(getattr(TRACE_LOCAL, "stack", []))
+
+    def call(item):
+        # Runs in a copy of the caller's context, so the run context carries over
+        TRACE_LOCAL.stack = list(parent_stack)
+        WORKER_LOCAL.active = True
+        buffer = io.StringIO()
         try:
-            run_command(f"git clone --depth 1 {SKILLS_REPO} .", cwd=temp_path, capture_output=True)
-        except Exception:
-            print(t("failed_clone"))
-            return
+            with redirect_output(buffer):
+                return func(item), buffer.getvalue()
+        finally:
+            WORKER_LOCAL.active = False
 
-        skills_to_process = specific_skills if specific_skills else SKILLS_MAPPING.keys()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, call, item) for item in items]
+        for future in futures:
+            result, text = future.result()
+            echo(text, end="")
+            yield result
 
-        for skill_name in skills_to_process:
-            if skill_name not in SKILLS_MAPPING:
-                print(t("warn_skill_not_found", skill_name))
-                continue
+def subprocess_env():
+    """
+    Environment for subprocesses: None (inherited), or with lazy fetches disabled offline.
 
-            repo_path = SKILLS_MAPPING[skill_name]
-            source_path = temp_path / repo_path
-            dest_path = target_dir / skill_name
-            
-            if not source_path.exists():
-                print(t("err_source_not_found", skill_name, source_path))
-                continue
-                
-            action = t("installing")
-            if dest_path.exists():
-                # Simple update check: We just overwrite for now as 'Updating'
-                # A more complex check would compare hash or timestamp, but overwrite ensures latest state.
-                action = t("updating")
-                print(t("found_existing", skill_name))
-                shutil.rmtree(dest_path)
-            
-            print(f"{action} {skill_name}...")
-            try:
-                shutil.copytree(source_path, dest_path)
-                print(t("processed_success", skill_name))
-                manage_dependencies(skill_name, dest_path)
-            except Exception as e:
-                print(t("failed_copy", skill_name, e))
+    A partial mirror would otherwise download missing objects from its promisor
+    remote on any git command reading them.
+    """
+    if not context().fetch_settings["offline"]:
+        return None
+    return {**os.environ, "GIT_NO_LAZY_FETCH": "1"}
 
-def show_interactive_help():
-    print(t("interactive_help"))
+def run_command(command, cwd=None, check=True, capture_output=False, input_text=None):
+    """Run a shell command."""
+    try:
+        with trace_span(command_label(command), "subprocess"):
+            result = subprocess.run(
+                command, 
+                cwd=cwd, 
+                check=check, 
+                shell=True, 
+                text=True, 
+                capture_output=capture_output,
+                input=input_text,
+                env=subprocess_env()
+            )
+        return result
+    except subprocess.CalledProcessError as e:
+        echo(t("err_run_cmd", command))
+        if capture_output:
+            echo(f"Stdout: {e.stdout}")
+            echo(f"Stderr: {e.stderr}")
+        raise
 
-def select_skills(skills_mapping):
-    """Interactive skill selection."""
-    skills_list = list(skills_mapping.keys())
-    while True:
-        print(t("avail_skills"))
-        for idx, name in enumerate(skills_list, 1):
-            print(f"{idx}. {name}")
-        print(t("install_all"))
-        print(t("help_opt"))
-        print(t("quit_opt"))
-        
-        selection = input(t("enter_selection")).strip()
-        
-        if selection.upper() == 'Q':
-            sys.exit(0)
+# --- Locking & Atomic Writes ---
+DEFAULT_LOCK_TIMEOUT = 600  # Seconds to wait for another process holding a lock
+LOCK_FILE = ".skills-manager.lock"
 
-        if selection.upper() == 'H':
-            show_interactive_help()
-            continue
-            
-        if not selection or selection.upper() == 'A':
-            return None  # None implies all in the current logic
-        
-        selected_keys = []
+@contextmanager
+def file_lock(lock_path, timeout=None):
+    """
+    Hold an exclusive cross-process lock on lock_path.
+
+    Raises:
+        TimeoutError: If the lock is still held by another process after timeout seconds.
+    """
+    timeout = context().lock_settings["timeout"] if timeout is None else timeout
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as lock_file:
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while True:
+            try:
+                if sys.platform == "win32":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(t("err_lock_timeout", lock_path, timeout))
+                if not waiting:
+                    echo(t("waiting_for_lock", lock_path))
+                    waiting = True
+                time.sleep(0.1)
         try:
-            parts = selection.split()
-            valid = True
-            for part in parts:
-                try:
-                    idx = int(part) - 1
-                    if 0 <= idx < len(skills_list):
-                        key = skills_list[idx]
-                        if key not in selected_keys:
-                            selected_keys.append(key)
-                    else:
-                        print(t("warn_out_of_range", part))
-                except ValueError:
-                    print(t("warn_not_number", part))
-            
-            if selected_keys:
-                print(t("selected", ', '.join(selected_keys)))
-                return selected_keys
+            yield
+        finally:
+            if sys.platform == "win32":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
             else:
-                print(t("no_valid_selection"))
-        except ValueError:
-            print(t("invalid_input"))
-
-def discover_skills(repo_root):
-    """Scan the downloaded repository for available skills."""
-    discovered = []
-    plugins_dir = repo_root / "plugins"
-    if not plugins_dir.exists():
-        return discovered
-    
-    # Iterate over category folders
-    for category_path in plugins_dir.iterdir():
-        if category_path.is_dir():
-            skills_dir = category_path / "skills"
-            if skills_dir.exists() and skills_dir.is_dir():
-                for skill_path in skills_dir.iterdir():
-                    if skill_path.is_dir():
-                         rel_path = skill_path.relative_to(repo_root).as_posix()
-                         discovered.append({
-                             "name": skill_path.name,
-                             "path": rel_path,
-                             "category": category_path.name
-                         })
-    return discovered
-
-def browse_categories_and_skills(skills):
-    """
-    Interactive selection of category and then skills.
-    
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def write_json_atomic(path, data, **dump_options):
+    """Write JSON through a temporary sibling file renamed over path, so readers never see a partial file."""
+    temp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, **dump_options)
+        os.replace(temp_path, path)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+# --- Repository Cache ---
+DEFAULT_CACHE_TTL = 300  # Seconds before the cached mirror is fetched again
+
+# Fetch strategies: partial clone filter used for the mirror (None = full clone).
+# Partial strategies also restrict checkouts to a sparse cone of the selected skills.
+FETCH_STRATEGIES = {
+    "full": None,
+    "blobless": "blob:none",
+    "treeless": "tree:0",
+}
+DEFAULT_FETCH_STRATEGY = "blobless"
+
+# How skill files reach the first target: "objects" streams blobs from the mirror's
+# object store into the skill's staging directory, "worktree" checks out a temporary
+# (sparse) worktree and copies from it, writing every file twice.
+MATERIALIZE_MODES = ("objects", "worktree")
+DEFAULT_MATERIALIZE = "objects"
+
+def get_cache_root():
+    """Return the base directory for persistent caches."""
+    env_cache = os.environ.get("SKILLS_MANAGER_CACHE")
+    if env_cache:
+        return Path(env_cache)
+    if sys.platform == "win32":
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        base = Path(local_app_data) if local_app_data else Path.home() / "AppData" / "Local"
+    else:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME")
+        base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    return base / "skills-manager"
+
+def get_repo_cache_dir(repo_url):
+    """Return the cache directory dedicated to a repository URL."""
+    repo_hash = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:16]
+    return get_cache_root() / repo_hash
+
+def sync_mirror(repo_url, refresh=False):
+    """
+    Create or incrementally update the cached bare mirror of a repository.
+
+    Only branch heads are mirrored, so hosting-specific refs (e.g. pull requests)
+    are never downloaded. With a partial fetch strategy the mirror is created as a
+    partial clone and missing objects are fetched lazily on checkout. A fetch is
+    skipped while the last one is younger than the configured TTL, unless a
+    refresh was requested. Concurrent runs sharing the cache are serialized by a
+    lock on the cache directory.
+
     Args:
-        skills (list): List of skill dictionaries.
+        repo_url (str): Repository to mirror.
+        refresh (bool): Fetch even if the mirror is younger than the TTL.
 
     Returns:
-        list: Selected skill dictionaries.
+        Path: The bare mirror, or None if offline mode has nothing cached.
     """
-    categories = sorted(list(set(s['category'] for s in skills)))
-    
-    while True:
-        print(t("remote_cats"))
-        for idx, cat in enumerate(categories, 1):
-            print(f"{idx}. {cat}")
-        print(t("quit_opt"))
+    cache_dir = get_repo_cache_dir(repo_url)
+    with trace_span("fetch"), file_lock(cache_dir / LOCK_FILE):
+        return _sync_mirror_locked(repo_url, cache_dir, refresh or context().fetch_settings["refresh"])
 
-        cat_selection = input(t("select_cat")).strip()
-        if cat_selection.lower() == 'q':
-            return []
+def _sync_mirror_locked(repo_url, cache_dir, refresh):
+    mirror_path = cache_dir / "mirror.git"
+    stamp_path = cache_dir / "last_fetch"
 
+    if not mirror_path.exists():
+        if context().fetch_settings["offline"]:
+            echo(t("err_offline_no_cache", repo_url))
+            return None
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        echo(t("cache_cloning"))
+        clone_filter = FETCH_STRATEGIES.get(context().fetch_settings["strategy"])
+        filter_arg = f"--filter={clone_filter} " if clone_filter else ""
         try:
-            cat_idx = int(cat_selection) - 1
-            if not (0 <= cat_idx < len(categories)):
-                print(t("invalid_num"))
-                continue
-        except ValueError:
-            print(t("invalid_input_short"))
-            continue
-        
-        selected_category = categories[cat_idx]
-        category_skills = sorted([s for s in skills if s['category'] == selected_category], key=lambda x: x['name'])
-        
-        print(t("skills_in_cat", selected_category))
-        for idx, skill in enumerate(category_skills, 1):
-            installed_mark = "* " if skill['name'] in SKILLS_MAPPING else "  "
-            print(f"{idx}. {installed_mark}{skill['name']}")
-        
-        print(t("already_in_config"))
-        print(t("enter_install_nums"))
-        
-        skill_selection = input(t("selection_prompt")).strip()
-        if skill_selection.lower() == 'q':
-            sys.exit(0)
-        if skill_selection.lower() == 'b':
-            continue
-            
-        selected_skills_to_return = []
-        try:
-            parts = skill_selection.split()
-            valid = True
-            for part in parts:
-                idx = int(part) - 1
-                if 0 <= idx < len(category_skills):
-                    selected_skills_to_return.append(category_skills[idx])
+            run_command(f'git clone --bare --quiet {filter_arg}"{repo_url}" "{mirror_path}"', capture_output=True)
+            run_command('git config remote.origin.fetch "+refs/heads/*:refs/heads/*"', cwd=mirror_path, capture_output=True)
+        except Exception:
+            shutil.rmtree(mirror_path, ignore_errors=True)
+            raise
+    elif context().fetch_settings["offline"]:
+        echo(t("cache_offline"))
+        return mirror_path
+    elif (not refresh and stamp_path.exists()
+          and time.time() - stamp_path.stat().st_mtime < context().fetch_settings["ttl"]):
+        echo(t("cache_fresh", context().fetch_settings["ttl"]))
+        return mirror_path
+    else:
+        echo(t("cache_fetching"))
+        run_command("git fetch --prune --quiet origin", cwd=mirror_path, capture_output=True)
+
+    stamp_path.touch()
+    return mirror_path
+
+def find_link_folders(worktree_path, sparse_paths):
+    """Return the worktree folders holding the missing targets of symbolic links under sparse_paths."""
+    root = Path(os.path.realpath(worktree_path))
+    folders = set()
+    for sparse_path in sparse_paths:
+        for file_path in list_files(worktree_path / sparse_path).values():
+            if file_path.is_symlink() and not file_path.exists():
+                target = Path(os.path.realpath(file_path))
+                if root in target.parents and target.parent != root:
+                    folders.add(target.parent.relative_to(root).as_posix())
+    return folders
+
+@contextmanager
+def checkout_repository(mirror_path, sparse_paths=None, rev="HEAD"):
+    """
+    Check out a revision of the cached mirror into a temporary worktree.
+
+    Args:
+        mirror_path (Path): Bare mirror created by sync_mirror.
+        sparse_paths (list): Optional repository paths to restrict the checkout to.
+            Only honoured by partial fetch strategies, so that just the blobs of
+            the selected skills are downloaded and written.
+        rev (str): Commit to check out (default: the mirror's HEAD).
+    """
+    sparse = sparse_paths is not None and FETCH_STRATEGIES.get(context().fetch_settings["strategy"]) is not None
+    mirror_lock = mirror_path.parent / LOCK_FILE
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            worktree_path = Path(temp_dir) / "repo"
+            # Worktree registration and lazy object fetches write into the shared mirror
+            with trace_span("checkout"), file_lock(mirror_lock):
+                if sparse:
+                    run_command(f'git worktree add --detach --no-checkout --quiet "{worktree_path}" {rev}', cwd=mirror_path, capture_output=True)
+                    run_command("git sparse-checkout set --cone --stdin", cwd=worktree_path, capture_output=True,
+                                input_text="\n".join(sparse_paths) + "\n")
+                    run_command("git checkout --quiet", cwd=worktree_path, capture_output=True)
+                    # Links may point at files outside the selected folders, check those out as well
+                    added = set()
+                    for _ in range(MAX_SYMLINK_DEPTH):
+                        folders = find_link_folders(worktree_path, sparse_paths) - added
+                        if not folders:
+                            break
+                        run_command("git sparse-checkout add --stdin", cwd=worktree_path, capture_output=True,
+                                    input_text="\n".join(sorted(folders)) + "\n")
+                        added |= folders
                 else:
-                    print(t("warn_out_of_range", part))
-                    valid = False
-            
-            if valid and selected_skills_to_return:
-                return selected_skills_to_return
-        except ValueError:
-             print(t("invalid_input_short"))
+                    run_command(f'git worktree add --detach --quiet "{worktree_path}" {rev}', cwd=mirror_path, capture_output=True)
+            yield worktree_path
+    finally:
+        # Drop the registration of the now-deleted worktree (and any left by interrupted runs)
+        with file_lock(mirror_lock):
+            run_command("git worktree prune", cwd=mirror_path, check=False, capture_output=True)
+
+# --- Content Store ---
+STORE_GC_GRACE = 3600  # Seconds a newly added or recently unlinked store file survives gc
+
+def get_store_dir():
+    """Return the content-addressed store shared by all targets."""
+    return get_cache_root() / "store"
 
-def browse_and_install_remote_skills(target_dir):
-    """List remote skills and allow interactive installation."""
-    print(t("fetching_list"))
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
+def store_blob_path(sha256, mode="100644"):
+    """Return the store path of the file with the given SHA-256 and git mode (executables are kept apart)."""
+    return get_store_dir() / "files" / sha256[:2] / (f"{sha256}.x" if mode == "100755" else sha256)
+
+def clone_file(src_file, dest_file):
+    """Copy a file, letting the filesystem share extents (reflink) where copy_file_range allows it."""
+    if hasattr(os, "copy_file_range"):
         try:
-             run_command(f"git clone --depth 1 {SKILLS_REPO} .", cwd=temp_path, capture_output=True)
-        except Exception:
-            print(t("failed_clone"))
-            return
+            with open(src_file, "rb") as fsrc, open(dest_file, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                shutil.copystat(src_file, dest_file)
+                return
+        except OSError:
+            pass
+    shutil.copy2(src_file, dest_file)
 
-        skills = discover_skills(temp_path)
-        if not skills:
-            print(t("no_skills_remote"))
-            return
-        
-        selected_skills = browse_categories_and_skills(skills)
-        if not selected_skills:
-            print(t("no_skills_sel"))
+def place_file(src_file, dest_file, link=False):
+    """Hardlink src_file to dest_file if link is set, copying across filesystems or otherwise."""
+    if link:
+        try:
+            os.link(src_file, dest_file)
+            trace_count(links=1)
             return
+        except OSError:
+            pass
+    clone_file(src_file, dest_file)
+    trace_count(files=1, bytes=os.path.getsize(dest_file))
 
-        # Ask user next action
-        print(t("choose_action"))
-        print(t("act_install_only"))
-        print(t("act_install_config"))
-        print(t("quit_opt"))
-        
-        action_choice = input(t("enter_choice_short")).strip()
-        if action_choice.lower() == 'q':
-            sys.exit(0)
-        
-        save_to_config = (action_choice == '2')
+def seal_store_file(file_path):
+    """Drop the write bits of a store file, so editing it in place through a hardlink fails instead of corrupting it."""
+    file_mode = os.stat(file_path).st_mode
+    os.chmod(file_path, file_mode & ~0o222)
 
-        # If target_dir was not provided initially, ask for it now
-        if target_dir is None:
-             target_dir = get_target_directory()
-             print(t("loc_display", target_dir))
+def add_to_store(src_file, sha256):
+    """Add a file to the store unless it is already there; returns its store path."""
+    blob_path = store_blob_path(sha256, git_file_mode(os.stat(src_file)))
+    if blob_path.exists():
+        return blob_path
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = blob_path.with_name(f"{blob_path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        clone_file(src_file, temp_path)
+        seal_store_file(temp_path)
+        try:
+            # Never replace a blob another run added meanwhile, it may already be linked
+            os.link(temp_path, blob_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            os.replace(temp_path, blob_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return blob_path
 
-        # Create target dir if not exists
-        if not target_dir.exists():
-             target_dir.mkdir(parents=True)
+def save_stored_tree(tree, manifest_entry):
+    """Index the files of a git tree by hash so later installs can link them from the store."""
+    index_path = get_store_dir() / "trees" / f"{tree}.json"
+    index = {rel_path: {"sha256": info["sha256"], "size": info["size"], "mtime": info["mtime"],
+                        "mode": info.get("mode", "100644")}
+             for rel_path, info in manifest_entry["files"].items()}
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(index_path, index, sort_keys=True)
+    except OSError:
+        pass
 
-        config_changed = False
-        for skill in selected_skills:
-            print(t("processing", skill['name']))
-            
-            dest_path = target_dir / skill['name']
-            source_path = temp_path / skill['path']
-            
-            if dest_path.exists():
-                print(t("removing_existing"))
-                shutil.rmtree(dest_path)
-            
-            try:
-                shutil.copytree(source_path, dest_path)
-                print(t("installed_to", dest_path))
-                manage_dependencies(skill['name'], dest_path)
-                
-                # Update mapping
-                if save_to_config and skill['name'] not in SKILLS_MAPPING:
-                    SKILLS_MAPPING[skill['name']] = skill['path']
-                    config_changed = True
-                    print(t("added_to_config", skill['name']))
-            except Exception as e:
-                print(t("err_installing", skill['name'], e))
-
-        if config_changed:
-            config_path = Path(__file__).parent / "skills.json"
-            try:
-                CONFIG["skills"] = SKILLS_MAPPING
-                with open(config_path, "w") as f:
-                    json.dump(CONFIG, f, indent=4)
-                print(t("config_saved")) 
-            except Exception as e:
-                print(t("warn_save_config", e))
+def load_stored_tree(tree):
+    """
+    Look up a git tree in the store.
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Manage VS Code Skills - Install, update, and manage agent skills.",
-        epilog="""
-Interactive Mode:
-  Run without arguments to enter interactive mode.
-  You will be prompted to select an installation location and specific skills.
+    A store file whose size or mtime differs from the index is hashed again;
+    if it was changed, or its executable bit no longer matches the index, it
+    is removed from the store (the targets linking it keep their copies) and
+    the tree counts as not stored.
 
-Examples:
-  python install_skills.py --global-install --yes      # Install all skills to global folder silently
-  python install_skills.py --project-install           # Install to current folder (interactive selection)
-  python install_skills.py --upgrade                   # Update currently installed skills
-  python install_skills.py --ls                        # Browse and install new skills from remote
-""",
-        formatter_class=argparse.RawDescriptionHelpFormatter
-    )
-    parser.add_argument("--global-install", action="store_true", help="Install to global VS Code folder (~/.vscode/skills)")
-    parser.add_argument("--project-install", action="store_true", help="Install to current project folder (./skills)")
-    parser.add_argument("--claude-install", action="store_true", help="Install to Claude Desktop folder")
-    parser.add_argument("--upgrade", action="store_true", help="Check and update all installed skills")
-    parser.add_argument("--ls", action="store_true", help="Browse available remote skills interactively")
-    parser.add_argument("--yes", "-y", action="store_true", help="Skip interactive confirmation (installs all)")
-    parser.add_argument("--lang", help="Specify language (en/zh)", choices=["en", "zh"])
-    args = parser.parse_args()
+    Returns:
+        tuple: ({relative path: store path}, manifest entry of the store files),
+            or None if the tree is not indexed or any of its files was pruned or changed.
+    """
+    if not tree:
+        return None
+    try:
+        with open(get_store_dir() / "trees" / f"{tree}.json", "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    # Override Language if specified
-    if args.lang:
-        global CURRENT_LANG
-        CURRENT_LANG = args.lang
-
-    # Determine Target Directory
-    target_dir = None
-    if args.global_install:
-        target_dir = Path.home() / ".vscode" / "skills"
-    elif args.project_install:
-        target_dir = Path(os.getcwd()) / "skills"
-    elif args.claude_install:
-        if sys.platform == "win32":
-            app_data = os.environ.get("APPDATA")
-            base = Path(app_data) if app_data else Path.home() / "AppData" / "Roaming"
-            target_dir = base / "Claude" / "skills"
-        elif sys.platform == "darwin":
-            target_dir = Path.home() / "Library" / "Application Support" / "Claude" / "skills"
-        else:
-            target_dir = Path.home() / ".config" / "Claude" / "skills"
-    else:
-        # Check context
-        if args.ls:
-             print(t("browse_header"))
-             # We do NOT ask for target_dir yet for ls command, unless it was passed as arg
-             pass
-        elif not args.upgrade:
-             # Default install mode
-             print(t("manager_header"))
-             target_dir = get_target_directory()
-        # If upgrade is true, we fall through to below default
+    files, recorded = {}, {}
+    for rel_path, info in index.items():
+        blob_path = store_blob_path(info["sha256"], info.get("mode", "100644"))
+        try:
+            st = blob_path.stat()
+        except OSError:
+            return None
+        if (st.st_size != info["size"] or mode_differs(st, info.get("mode", git_file_mode(st)))
+                or (st.st_mtime_ns != info.get("mtime") and hash_file(blob_path) != info["sha256"])):
+            # Edited or chmodded in place through a hardlink, the store copy can no longer be trusted
+            try:
+                blob_path.unlink()
+            except OSError:
+                pass
+            return None
+        files[rel_path] = blob_path
+        recorded[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": info["sha256"],
+                              "mode": git_file_mode(st)}
+    return files, {"files": recorded}
 
-    # Only enforce target_dir if we are NOT in ls mode or upgrade mode with no dir logic
-    # Actually, upgrade needs a target dir.
-    # ls mode will ask for it inside if needed.
-    if target_dir is None and not args.ls: 
-        target_dir = get_target_directory()
+def collect_garbage():
+    """
+    Prune store files that no target links to any more.
 
-    if target_dir:
-        print(t("loc_display", target_dir))
+    A file whose link count dropped to one is only referenced by the store.
+    Files created or unlinked within STORE_GC_GRACE seconds are kept, so a
+    concurrent install never loses a file between adding and linking it. Tree
+    indexes pointing at pruned files are removed as well.
+    """
+    store_dir = get_store_dir()
+    if not (store_dir / "files").is_dir():
+        echo(t("gc_summary", 0, 0, 0))
+        return
 
-    # Operations
-    if args.ls:
-        browse_and_install_remote_skills(target_dir)
-    elif args.upgrade:
-        print(t("checking_updates"))
-        # Identify which skills are currently installed in the target dir
-        installed_skills = []
-        if target_dir.exists():
-            for item in target_dir.iterdir():
-                if item.is_dir() and item.name in SKILLS_MAPPING:
-                    installed_skills.append(item.name)
-        
-        if not installed_skills:
-            print(t("no_skills_update"))
-        else:
-            print(t("found_skills", ", ".join(installed_skills)))
-            update_or_install_skills(target_dir, specific_skills=installed_skills, auto_update=True)
-    else:
-        # Selection logic
-        selected_skills = None
-        if not args.yes:
-            selected_skills = select_skills(SKILLS_MAPPING)
-        
-        update_or_install_skills(target_dir, specific_skills=selected_skills, auto_update=True)
+    removed = freed = kept = 0
+    cutoff = time.time() - STORE_GC_GRACE
+    try:
+        with file_lock(store_dir / LOCK_FILE):
+            for blob_path in list_files(store_dir / "files").values():
+                st = blob_path.stat()
+                if st.st_nlink <= 1 and st.st_ctime < cutoff:
+                    blob_path.unlink()
+                    removed += 1
+                    freed += st.st_size
+                else:
+                    kept += 1
+            if removed:
+                for index_path in (store_dir / "trees").glob("*.json"):
+                    if load_stored_tree(index_path.stem) is None:
+                        index_path.unlink()
+    except TimeoutError as e:
+        echo(e)
+        return
+    echo(t("gc_summary", removed, freed, kept))
 
-    print(t("done"))
+# --- Install Manifest ---
+MANIFEST_FILE = ".skills-manifest.json"
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def git_file_mode(st):
+    """Return the git mode of a regular file from its stat result: "100755" if executable, else "100644"."""
+    return "100755" if st.st_mode & 0o100 and sys.platform != "win32" else "100644"
+
+def mode_differs(st, mode):
+    """Whether a file's executable bit disagrees with a git mode (never on Windows, which has no such bit)."""
+    return sys.platform != "win32" and git_file_mode(st) != mode
+
+def list_files(root):
+    """Map POSIX-style relative paths to absolute paths for every file under root."""
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            file_path = Path(dirpath) / filename
+            files[file_path.relative_to(root).as_posix()] = file_path
+    return files
+
+def list_source_files(source_path, repo_root):
+    """
+    List the files of a skill folder in a worktree, following symbolic links to files.
+
+    Links to anything but a file inside repo_root are skipped with a warning,
+    as resolve_symlink_objects does for the objects backend.
+    """
+    root = Path(os.path.realpath(repo_root))
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(source_path):
+        for name in sorted(dirnames + filenames):
+            file_path = Path(dirpath) / name
+            if file_path.is_symlink():
+                target = Path(os.path.realpath(file_path))
+                if not target.is_file() or root not in target.parents:
+                    link = target.relative_to(root).as_posix() if root in target.parents else os.readlink(file_path)
+                    echo(t("warn_symlink_skipped", file_path.relative_to(repo_root).as_posix(), link))
+                    continue
+            if name in filenames:
+                files[file_path.relative_to(source_path).as_posix()] = file_path
+    return files
+
+def load_manifest(target_dir):
+    """Load the install manifest of a target directory (empty if missing or unreadable)."""
+    try:
+        with open(target_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(target_dir, manifest):
+    """Write the install manifest of a target directory, and the state database derived from it."""
+    try:
+        write_json_atomic(target_dir / MANIFEST_FILE, manifest, sort_keys=True)
+        save_target_state(target_dir, manifest)
+    except OSError as e:
+        echo(t("warn_save_manifest", e))
+
+def recorded_hash(file_path, recorded, rel_path):
+    """Return the hash of a file, trusting the manifest while its size and mtime match."""
+    st = file_path.stat()
+    entry = recorded.get(rel_path)
+    if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+        return entry["sha256"]
+    return hash_file(file_path)
+
+def apply_file_changes(sources, dest_path, installed_digest, write_file, dry_run=False):
+    """
+    Write the files of a skill that differ from its installed copy; shared by both materialize backends.
+
+    A file is unchanged when its digest and executable bit match the source.
+    Changed files are replaced, added files written and files no longer in the
+    source deleted.
+
+    Args:
+        sources (dict): Relative path -> (git mode, digest, source), the digest being
+            comparable to installed_digest's.
+        dest_path (Path): Installed skill directory.
+        installed_digest (callable): installed_digest(rel_path, dest_file, stat) -> (digest, manifest fields).
+        write_file (callable): write_file(rel_path, source tuple, dest_file) -> manifest fields,
+            "mode" included, of the file written.
+        dry_run (bool): Only compute the changes; the returned entry then covers
+            unchanged files only.
+
+    Returns:
+        tuple: (new manifest entry, dict of added/modified/removed/unchanged counts)
+    """
+    dest_files = list_files(dest_path) if dest_path.exists() else {}
+    stats = {"added": 0, "modified": 0, "removed": 0, "unchanged": 0}
+    new_files = {}
+
+    for rel_path, source in sorted(sources.items()):
+        mode, digest = source[:2]
+        dest_file = dest_path / rel_path
+        if rel_path in dest_files:
+            st = dest_file.stat()
+            dest_digest, fields = installed_digest(rel_path, dest_file, st)
+            # A chmod leaves size and mtime alone, so the mode is compared on its own
+            if dest_digest == digest and not mode_differs(st, mode):
+                stats["unchanged"] += 1
+                new_files[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, **fields, "mode": mode}
+                continue
+            stats["modified"] += 1
+            if dry_run:
+                continue
+            # Replace rather than overwrite, the old file may be hardlinked into other targets
+            dest_file.unlink()
+        else:
+            stats["added"] += 1
+            if dry_run:
+                continue
+
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        fields = write_file(rel_path, source, dest_file)
+        st = dest_file.stat()
+        new_files[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, **fields}
+
+    stats["removed"] = remove_extra_files(dest_path, dest_files, sources, dry_run)
+    return {"files": new_files}, stats
+
+def sync_skill_files(source_path, dest_path, manifest_entry=None, source_entry=None, link=False, dry_run=False,
+                     source_files=None, store=False):
+    """
+    Bring dest_path in line with source_path, writing only what changed.
+
+    Installed files whose size and mtime still match the manifest are trusted
+    without being re-read; anything else is hashed before comparison. Files that
+    no longer exist in the source are deleted.
+
+    Args:
+        source_path (Path): Skill directory in the repository checkout or another target.
+        dest_path (Path): Installed skill directory.
+        manifest_entry (dict): Previous manifest entry for this skill, if any.
+        source_entry (dict): Manifest entry describing source_path, if it is an installed copy.
+        link (bool): Hardlink files from source_path instead of copying, falling back
+            to a copy when the two directories are on different filesystems.
+        dry_run (bool): Only compute the changes; the returned entry then covers
+            unchanged files only.
+        source_files (dict): Relative path -> file to install, instead of listing source_path.
+        store (bool): Add written files to the content store and hardlink them from there.
+
+    Returns:
+        tuple: (new manifest entry, dict of added/modified/removed/unchanged counts)
+    """
+    recorded = (manifest_entry or {}).get("files", {})
+    source_recorded = (source_entry or {}).get("files", {})
+    if source_files is None:
+        source_files = list_files(source_path)
+    sources = {}  # relative path -> (git mode, SHA-256, file)
+    for rel_path, src_file in source_files.items():
+        sources[rel_path] = (git_file_mode(src_file.stat()), recorded_hash(src_file, source_recorded, rel_path), src_file)
+
+    def installed_digest(rel_path, dest_file, st):
+        sha256 = recorded_hash(dest_file, recorded, rel_path)
+        return sha256, {"sha256": sha256}
+
+    def write_file(rel_path, source, dest_file):
+        _, sha256, src_file = source
+        if store:
+            place_file(add_to_store(src_file, sha256), dest_file, link=True)
+        else:
+            place_file(src_file, dest_file, link)
+        return {"sha256": sha256, "mode": git_file_mode(dest_file.stat())}
+
+    return apply_file_changes(sources, dest_path, installed_digest, write_file, dry_run)
+
+def remove_extra_files(dest_path, dest_files, source_files, dry_run=False):
+    """Delete the files of dest_path missing from source_files and the directories they leave empty; returns their count."""
+    extra = sorted(dest_files.keys() - source_files.keys())
+    if dry_run or not extra:
+        return len(extra)
+    for rel_path in extra:
+        dest_files[rel_path].unlink()
+    # Drop directories emptied by removals, deepest first
+    for dirpath, _, _ in sorted(os.walk(dest_path), key=lambda w: len(w[0]), reverse=True):
+        if dirpath != str(dest_path) and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return len(extra)
+
+def has_changes(stats):
+    return bool(stats["added"] or stats["modified"] or stats["removed"])
+
+def link_tree(source_dir, dest_dir):
+    """Recreate source_dir at dest_dir with hardlinks (copies where links are unsupported)."""
+    dest_dir.mkdir()
+    for rel_path, file_path in list_files(source_dir).items():
+        dest_file = dest_dir / rel_path
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        place_file(file_path, dest_file, link=True)
+
+def swap_directory(new_dir, dest_path):
+    """Move new_dir into place at dest_path, replacing any existing directory by rename."""
+    if not dest_path.exists():
+        os.rename(new_dir, dest_path)
+        return
+    old_path = dest_path.with_name(f".{dest_path.name}.old-{os.getpid()}")
+    os.rename(dest_path, old_path)
+    try:
+        os.rename(new_dir, dest_path)
+    except OSError:
+        os.rename(old_path, dest_path)
+        raise
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def remove_stale_staging(target_dir):
+    """Remove staging leftovers of interrupted runs (call while holding the target lock)."""
+    for item in target_dir.iterdir():
+        if item.name.startswith(".") and (".staging-" in item.name or ".old-" in item.name) and item.is_dir():
+            shutil.rmtree(item, ignore_errors=True)
+
+def stage_changes(dest_path, manifest_entry, sync):
+    """
+    Update an installed skill through a staging directory swapped in by rename.
+
+    The staging copy starts as hardlinks of the current installation and then
+    receives only the changed files (the sync functions replace rather than
+    overwrite), so the live directory is never seen half-written. Nothing is
+    staged when the skill is already up to date.
+
+    Args:
+        dest_path (Path): Installed skill directory.
+        manifest_entry (dict): Previous manifest entry for this skill, if any.
+        sync (callable): sync(directory, manifest_entry, dry_run) -> (manifest entry, stats),
+            bringing a directory in line with the skill's source.
+
+    Returns:
+        tuple: Same as sync.
+    """
+    if dest_path.exists():
+        entry, stats = sync(dest_path, manifest_entry, True)
+        if not has_changes(stats):
+            return entry, stats
+        # Files known to be unchanged keep their hashes for the staged pass
+        manifest_entry = {"files": {**(manifest_entry or {}).get("files", {}), **entry["files"]}}
+
+    staging_path = dest_path.with_name(f".{dest_path.name}.staging-{os.getpid()}")
+    shutil.rmtree(staging_path, ignore_errors=True)
+    try:
+        if dest_path.exists():
+            link_tree(dest_path, staging_path)
+        else:
+            staging_path.mkdir()
+        entry, stats = sync(staging_path, manifest_entry, False)
+        swap_directory(staging_path, dest_path)
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    return entry, stats
+
+def stage_skill_files(source_path, dest_path, manifest_entry=None, source_entry=None, link=False,
+                      source_files=None, store=False):
+    """
+    Stage an installed skill from a directory (see stage_changes and sync_skill_files).
+
+    Returns:
+        tuple: Same as sync_skill_files.
+    """
+    def sync(directory, entry, dry_run):
+        return sync_skill_files(source_path, directory, entry, source_entry, link, dry_run, source_files, store)
+    return stage_changes(dest_path, manifest_entry, sync)
+
+def report_changes(skill_name, existed, stats):
+    """Print the outcome of sync_skill_files for one skill."""
+    if existed and not has_changes(stats):
+        echo(t("up_to_date", skill_name))
+    else:
+        echo(t("files_changed", stats["added"], stats["modified"], stats["removed"]))
+
+# --- Installed State ---
+# Each target keeps a small database of what is installed, next to the manifest but
+# without per-file entries, so status reports read one small file per target.
+STATE_FILE = ".skills-state.json"
+STATE_VERSION = 1
+TARGET_REGISTRY = "targets.json"  # Targets ever written, in the cache directory
+
+def utc_timestamp():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def load_target_state(target_dir):
+    """
+    Load the state database of a target.
+
+    Targets installed before the database existed get one derived from their
+    manifest, with unknown install times and dependency status.
+
+    Returns:
+        dict: {"version", "updated", "skills": {name: state entry}}, or None if nothing is installed.
+    """
+    try:
+        with open(target_dir / STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError, AttributeError):
+        pass
+    manifest = load_manifest(target_dir)
+    if not manifest:
+        return None
+    return {"version": STATE_VERSION, "updated": None,
+            "skills": {name: skill_state(entry, None, None) for name, entry in manifest.items()}}
+
+def skill_state(entry, previous, now, source=None):
+    """Derive the state entry of an installed skill from its manifest entry and its previous state."""
+    files = entry.get("files", {})
+    state = {
+        "source": source,
+        "path": entry.get("source"),
+        "commit": entry.get("commit"),
+        "tree": entry.get("tree"),
+        "files": len(files),
+        "size": sum(info["size"] for info in files.values()),
+        "installed": now,
+        "updated": now,
+        "dependencies": "pending",
+    }
+    if previous:
+        state["installed"] = previous.get("installed") or now
+        state["source"] = source or previous.get("source")
+        if (previous.get("tree"), previous.get("files"), previous.get("size")) == (state["tree"], state["files"], state["size"]):
+            # Same contents: keep when they were written and what the dependency check found
+            state["updated"] = previous.get("updated") or now
+            state["dependencies"] = previous.get("dependencies", "pending")
+    return state
+
+def save_target_state(target_dir, manifest):
+    """Rewrite the state database of a target from its manifest (call while holding its lock)."""
+    previous = {}
+    try:
+        with open(target_dir / STATE_FILE, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("skills", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    now = utc_timestamp()
+    skills = {name: skill_state(entry, previous.get(name), now, context().skill_sources.get(name))
+              for name, entry in manifest.items()}
+    write_json_atomic(target_dir / STATE_FILE, {"version": STATE_VERSION, "updated": now, "skills": skills},
+                      sort_keys=True)
+    register_target(target_dir)
+
+def record_dependency_status(target_dirs, plan, ok):
+    """Store the dependency outcome of the skills checked in plan in the targets' state."""
+    if not plan["checked"]:
+        return
+    queued = ({name for name, _ in plan["requirements"]} |
+              {name for names in plan["packages"].values() for name in names})
+    statuses = {}
+    for skill_name, declared in plan["checked"].items():
+        if not declared:
+            statuses[skill_name] = "none"
+        else:
+            statuses[skill_name] = "failed" if skill_name in queued and not ok else "satisfied"
+    for target_dir in target_dirs:
+        state_path = target_dir / STATE_FILE
+        if not state_path.exists():
+            continue
+        try:
+            with file_lock(target_dir / LOCK_FILE):
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                for skill_name, status in statuses.items():
+                    if skill_name in state["skills"]:
+                        state["skills"][skill_name]["dependencies"] = status
+                write_json_atomic(state_path, state, sort_keys=True)
+        except (OSError, ValueError, KeyError):
+            pass  # The state is informational, the install itself succeeded
+
+def get_target_registry_path():
+    return get_cache_root() / TARGET_REGISTRY
+
+def load_target_registry():
+    try:
+        with open(get_target_registry_path(), "r", encoding="utf-8") as f:
+            return [Path(path) for path in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        return []
+
+def register_target(target_dir):
+    """Add a target to the registry read by status reports, if it is not listed yet."""
+    target_dir = Path(os.path.abspath(target_dir))
+    if target_dir in load_target_registry():
+        return
+    registry_path = get_target_registry_path()
+    try:
+        registry_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(registry_path.parent / LOCK_FILE):
+            targets = load_target_registry()
+            if target_dir not in targets:
+                write_json_atomic(registry_path, [str(path) for path in targets + [target_dir]])
+    except OSError:
+        pass  # Unregistered targets can still be named with --target
+
+def collect_status(target_dirs=None):
+    """
+    Report what is installed where, from the targets' state databases only.
+
+    No git command runs and no skill directory is listed.
+
+    Args:
+        target_dirs (list): Targets to report (default: the standard locations plus
+            every target this cache has installed into).
+
+    Returns:
+        dict: {"targets": [{"path", "updated", "skills": {name: state entry}}]} for the
+            targets with installed skills, and "skills" / "size" totals.
+    """
+    if target_dirs is None:
+        target_dirs = list(get_known_locations().values()) + load_target_registry()
+    report = {"targets": [], "skills": 0, "size": 0}
+    seen = set()
+    for target_dir in target_dirs:
+        key = os.path.normcase(os.path.abspath(target_dir))
+        if key in seen:
+            continue
+        seen.add(key)
+        state = load_target_state(Path(target_dir))
+        if not state or not state["skills"]:
+            continue
+        report["targets"].append({"path": str(target_dir), "updated": state["updated"], "skills": state["skills"]})
+        report["skills"] += len(state["skills"])
+        report["size"] += sum(skill["size"] for skill in state["skills"].values())
+    return report
+
+def print_status(report, as_json=False):
+    """Print a status report from collect_status."""
+    if as_json:
+        echo(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    if not report["targets"]:
+        echo(t("status_empty"))
+        return
+    for target in report["targets"]:
+        echo(t("target_header", target["path"]))
+        for skill_name, skill in sorted(target["skills"].items()):
+            commit = (skill["commit"] or "")[:12] or "-"
+            source = f"{skill['source']}@{commit}" if skill["source"] else commit
+            echo(t("status_line", skill_name, source, skill["files"], format_bytes(skill["size"]),
+                   skill["updated"] or "-", skill["dependencies"]))
+    echo(t("status_summary", report["skills"], len(report["targets"]), format_bytes(report["size"])))
+
+# --- Object Materialization ---
+BLOB_CHUNK_SIZE = 1024 * 1024
+SYMLINK_MODE = "120000"
+MAX_SYMLINK_DEPTH = 16  # Links followed in a row before a chain counts as a loop
+
+def read_skill_objects(mirror_path, rev, repo_paths):
+    """
+    List the files of skill folders at rev from tree objects and make their blobs local.
+
+    Blobs missing from a partial mirror are downloaded in one batched request
+    instead of one lazy fetch per file. Symbolic links are replaced by the file
+    they point to (see resolve_symlink_objects), as copying from a worktree does.
+
+    Returns:
+        dict: {repository path: {path relative to the skill folder: (mode, blob oid)}}
+    """
+    repo_paths = [path.rstrip("/") for path in repo_paths]
+    objects = {path: {} for path in repo_paths}
+    if not repo_paths:
+        return objects
+    quoted = " ".join(f'"{path}"' for path in repo_paths)
+    output = run_command(f"git ls-tree -r -z {rev} -- {quoted}", cwd=mirror_path, capture_output=True).stdout
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        mode, obj_type, oid = meta.split()
+        if obj_type != "blob":
+            continue  # Submodules have no contents to install
+        parts = path.split("/")
+        # Attribute the file to the deepest requested folder containing it
+        for depth in range(len(parts) - 1, 0, -1):
+            owner = "/".join(parts[:depth])
+            if owner in objects:
+                objects[owner]["/".join(parts[depth:])] = (mode, oid)
+                break
+
+    partial = FETCH_STRATEGIES.get(context().fetch_settings["strategy"]) is not None
+    missing = find_missing_objects(mirror_path, rev) if partial else set()
+    if any(mode == SYMLINK_MODE for files in objects.values() for mode, _ in files.values()):
+        resolve_symlink_objects(mirror_path, rev, objects, missing)
+    if partial:
+        oids = {oid for files in objects.values() for _, oid in files.values()}
+        with trace_span("fetch blobs"), file_lock(mirror_path.parent / LOCK_FILE):
+            fetch_missing_objects(mirror_path, sorted(oids & missing))
+    return objects
+
+def resolve_link_target(link_path, link_text):
+    """Return the repository path a symbolic link at link_path points to, or None if it leaves the repository."""
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(link_path), link_text))
+    if posixpath.isabs(link_text) or target == ".." or target.startswith("../"):
+        return None
+    return target
+
+def resolve_symlink_objects(mirror_path, rev, objects, missing=frozenset()):
+    """
+    Replace the symbolic links of read_skill_objects listings by the files they point to.
+
+    Links are followed through the whole tree at rev, also outside the skill
+    folders. Links to a directory, to a missing path or out of the repository
+    are dropped with a warning, like the worktree backend skips them.
+    """
+    pending = {}  # (skill folder, relative path) -> (repository path of the link, link blob oid)
+    for owner, files in objects.items():
+        for rel_path, (mode, oid) in files.items():
+            if mode == SYMLINK_MODE:
+                pending[(owner, rel_path)] = (f"{owner}/{rel_path}", oid)
+
+    for _ in range(MAX_SYMLINK_DEPTH):
+        if not pending:
+            return
+        link_oids = sorted({oid for _, oid in pending.values()})
+        if missing and not missing.isdisjoint(link_oids):
+            with file_lock(mirror_path.parent / LOCK_FILE):
+                fetch_missing_objects(mirror_path, [oid for oid in link_oids if oid in missing])
+        blobs = read_blobs(mirror_path, link_oids)
+        link_texts = {key: blobs.get(oid, b"").decode("utf-8", "surrogateescape") for key, (_, oid) in pending.items()}
+        targets = {key: resolve_link_target(pending[key][0], text) for key, text in link_texts.items()}
+        entries = {}  # repository path -> (mode, type, oid)
+        paths = sorted({target for target in targets.values() if target})
+        if paths:
+            quoted = " ".join(f'"{path}"' for path in paths)
+            output = run_command(f"git ls-tree -z {rev} -- {quoted}", cwd=mirror_path, capture_output=True).stdout
+            for record in output.split("\0"):
+                if record:
+                    meta, path = record.split("\t", 1)
+                    entries[path] = tuple(meta.split())
+
+        next_pending = {}
+        for (owner, rel_path), target in targets.items():
+            mode, obj_type, oid = entries.get(target, (None, None, None))
+            if obj_type == "blob" and mode == SYMLINK_MODE:
+                next_pending[(owner, rel_path)] = (target, oid)
+            elif obj_type == "blob":
+                objects[owner][rel_path] = (mode, oid)
+            else:
+                echo(t("warn_symlink_skipped", f"{owner}/{rel_path}", target or link_texts[(owner, rel_path)]))
+                del objects[owner][rel_path]
+        pending = next_pending
+
+    for owner, rel_path in pending:
+        echo(t("warn_symlink_skipped", f"{owner}/{rel_path}", pending[(owner, rel_path)][0]))
+        del objects[owner][rel_path]
+
+def blob_digests(file_path, oid_length=40):
+    """Return (git blob oid, SHA-256) of a file with a single read."""
+    blob_digest = hashlib.sha1() if oid_length == 40 else hashlib.sha256()
+    blob_digest.update(f"blob {os.path.getsize(file_path)}\0".encode("ascii"))
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(BLOB_CHUNK_SIZE), b""):
+            blob_digest.update(chunk)
+            digest.update(chunk)
+    return blob_digest.hexdigest(), digest.hexdigest()
+
+@contextmanager
+def open_blob_writer(mirror_path):
+    """
+    Keep one git cat-file process open for streaming blobs into files.
+
+    The process outlives the skills using it, so each blob streamed is traced
+    as a subprocess span of its own.
+
+    Yields:
+        callable: write_blob(oid, dest_file) -> SHA-256 of the contents written.
+    """
+    process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=mirror_path,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=subprocess_env())
+
+    def write_blob(oid, dest_file):
+        with trace_span("git cat-file", "subprocess"):
+            process.stdin.write(f"{oid}\n".encode("ascii"))
+            process.stdin.flush()
+            header = process.stdout.readline().decode("utf-8").split()
+            if len(header) < 3 or header[1] != "blob":
+                raise OSError(t("err_blob_missing", oid))
+            remaining = int(header[2])
+            digest = hashlib.sha256()
+            with open(dest_file, "wb") as f:
+                while remaining:
+                    chunk = process.stdout.read(min(remaining, BLOB_CHUNK_SIZE))
+                    if not chunk:
+                        raise OSError(t("err_blob_missing", oid))
+                    digest.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            process.stdout.read(1)  # Newline terminating the object
+        trace_count(files=1, bytes=int(header[2]))
+        return digest.hexdigest()
+
+    try:
+        yield write_blob
+    finally:
+        process.stdin.close()
+        process.stdout.close()
+        process.wait()
+
+class BlobWriterPool:
+    """git cat-file processes of one mirror, reused by the skills installed concurrently from it."""
+
+    def __init__(self, mirror_path):
+        self.mirror_path = mirror_path
+        self.idle = []
+        self.lock = threading.Lock()
+        self.processes = ExitStack()
+
+    @contextmanager
+    def writer(self):
+        """Borrow a write_blob callable (see open_blob_writer), starting a process if none is idle."""
+        with self.lock:
+            write_blob = self.idle.pop() if self.idle else self.processes.enter_context(open_blob_writer(self.mirror_path))
+        yield write_blob
+        # Not reached when the body raised: the process may be left mid-object and is only closed
+        with self.lock:
+            self.idle.append(write_blob)
+
+    def close(self):
+        self.processes.close()
+
+def link_into_store(file_path, sha256):
+    """Add a freshly written file to the content store by hardlink, or relink it to the stored copy."""
+    blob_path = store_blob_path(sha256, git_file_mode(os.stat(file_path)))
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(file_path, blob_path)
+        seal_store_file(blob_path)
+        return
+    except FileExistsError:
+        pass
+    except OSError:
+        add_to_store(file_path, sha256)
+        return
+    file_path.unlink()
+    place_file(blob_path, file_path, link=True)
+
+def sync_skill_objects(source_files, dest_path, manifest_entry=None, write_blob=None, store=False):
+    """
+    Bring dest_path in line with the blobs of a skill, writing only what changed.
+
+    Files are compared by git blob id: the manifest's id is trusted while size
+    and mtime match, otherwise the installed file is hashed. Changed files are
+    streamed from the object store straight into dest_path, with the skill's
+    repository folder mapped onto dest_path.
+
+    Args:
+        source_files (dict): Relative path -> (mode, blob oid), from read_skill_objects.
+        dest_path (Path): Installed skill directory.
+        manifest_entry (dict): Previous manifest entry for this skill, if any.
+        write_blob (callable): Writer from open_blob_writer; None only computes the
+            changes (the returned entry then covers unchanged files only).
+        store (bool): Add written files to the content store and hardlink them from there.
+
+    Returns:
+        tuple: Same as sync_skill_files.
+    """
+    recorded = (manifest_entry or {}).get("files", {})
+
+    def installed_digest(rel_path, dest_file, st):
+        info = recorded.get(rel_path)
+        if info and info.get("oid") and info["size"] == st.st_size and info["mtime"] == st.st_mtime_ns:
+            dest_oid, dest_hash = info["oid"], info["sha256"]
+        else:
+            dest_oid, dest_hash = blob_digests(dest_file, len(source_files[rel_path][1]))
+        return dest_oid, {"sha256": dest_hash, "oid": dest_oid}
+
+    def write_file(rel_path, source, dest_file):
+        mode, oid = source
+        sha256 = write_blob(oid, dest_file)
+        if mode == "100755":
+            file_mode = dest_file.stat().st_mode
+            os.chmod(dest_file, file_mode | (file_mode & 0o444) >> 2)
+        if store:
+            link_into_store(dest_file, sha256)
+        return {"sha256": sha256, "oid": oid, "mode": mode}
+
+    return apply_file_changes(source_files, dest_path, installed_digest, write_file, dry_run=write_blob is None)
+
+def stage_skill_objects(blob_writers, source_files, dest_path, manifest_entry=None, store=False):
+    """
+    Stage an installed skill straight from the mirror's object store (see stage_changes).
+
+    Args:
+        blob_writers (BlobWriterPool): Processes reading the mirror's blobs.
+
+    Returns:
+        tuple: Same as sync_skill_files.
+    """
+    def sync(directory, entry, dry_run):
+        if dry_run:
+            return sync_skill_objects(source_files, directory, entry)
+        with blob_writers.writer() as write_blob:
+            return sync_skill_objects(source_files, directory, entry, write_blob, store)
+    return stage_changes(dest_path, manifest_entry, sync)
+
+@contextmanager
+def open_skill_source(mirror_path, commit, repo_paths, source_state):
+    """
+    Make the files of skill folders at commit available to install_from_checkout.
+
+    With the "objects" backend nothing is checked out: the folders' blob lists
+    are added to source_state and the checkout path yielded is None.
+
+    Args:
+        mirror_path (Path): Bare mirror created by sync_mirror.
+        commit (str): Commit to install from.
+        repo_paths (list): Repository paths of the skill folders needed.
+        source_state (dict): State passed to install_from_checkout, updated in place.
+
+    Yields:
+        Path: Root of the temporary checkout, or None.
+    """
+    if context().fetch_settings["materialize"] == "worktree":
+        with checkout_repository(mirror_path, sparse_paths=repo_paths, rev=commit) as temp_path:
+            yield temp_path
+        return
+    with trace_span("read trees"):
+        objects = read_skill_objects(mirror_path, commit, repo_paths)
+    blob_writers = BlobWriterPool(mirror_path)
+    source_state.update(objects=objects, blob_writers=blob_writers)
+    try:
+        yield None
+    finally:
+        blob_writers.close()
+
+# --- Tool Probes ---
+VERSION_PATTERN = re.compile(r"(\d+(?:\.\d+)+)")
+
+def parse_version(version):
+    """Turn '1.7.3' (or '1.7.0rc1') into a comparable tuple of integers."""
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+def get_probe_cache_path():
+    return get_cache_root() / "tool_probes.json"
+
+def load_probe_cache():
+    """Load cached probe results from disk (once per run)."""
+    run_context = context()
+    if run_context.probe_cache is None:
+        try:
+            with open(get_probe_cache_path(), "r", encoding="utf-8") as f:
+                run_context.probe_cache = json.load(f)
+        except (OSError, ValueError):
+            run_context.probe_cache = {}
+    return run_context.probe_cache
+
+def save_probe_cache():
+    try:
+        cache_path = get_probe_cache_path()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(cache_path, context().probe_cache)
+    except OSError:
+        pass  # The cache is an optimisation only
+
+def run_probe(tool_name, tool):
+    """
+    Return (installed, version) for a tool.
+
+    The executable is looked up on PATH first, so missing tools never spawn a
+    process. Probe results are cached on disk keyed by PATH, the resolved
+    executable and its mtime, so the probe command only runs again when the
+    tool is reinstalled or the environment changes.
+    """
+    probe = tool.get("probe") or [tool_name, "--version"]
+    if isinstance(probe, str):
+        probe = probe.split()
+    executable = shutil.which(probe[0])
+    if executable is None:
+        return False, None
+
+    cache_key = hashlib.sha256(json.dumps([
+        os.environ.get("PATH", ""), executable, os.stat(executable).st_mtime_ns, probe
+    ]).encode("utf-8")).hexdigest()
+    cache = load_probe_cache()
+    if cache_key in cache:
+        return cache[cache_key]["installed"], cache[cache_key]["version"]
+
+    try:
+        with trace_span(f"probe {tool_name}", "subprocess"):
+            result = subprocess.run([executable] + probe[1:], capture_output=True, text=True, timeout=120)
+        installed = result.returncode == 0
+        match = VERSION_PATTERN.search(result.stdout + result.stderr)
+    except (OSError, subprocess.TimeoutExpired):
+        installed, match = False, None
+    version = match.group(1) if installed and match else None
+
+    cache[cache_key] = {"installed": installed, "version": version}
+    save_probe_cache()
+    return installed, version
+
+def check_installed(tool_name, tool):
+    """Check if a tool is installed and recent enough, probing it at most once per run."""
+    if tool_name not in context().probe_results:
+        installed, version = run_probe(tool_name, tool)
+        min_version = tool.get("min_version")
+        if installed and min_version and (version is None or parse_version(version) < parse_version(min_version)):
+            echo(t("tool_outdated", tool_name, version or "?", min_version))
+            installed = False
+        elif installed:
+            echo(t("installed", tool_name))
+        else:
+            echo(t("not_installed", tool_name))
+        context().probe_results[tool_name] = installed
+    return context().probe_results[tool_name]
+
+def get_skill_tools(skill_name, repo_path=None):
+    """Return the tool names a skill declares in skills.json (by name, then by source folder)."""
+    tool_names = context().skill_tools.get(skill_name)
+    if tool_names is None and repo_path:
+        tool_names = context().skill_tools.get(repo_path.rstrip("/").split("/")[-1])
+    return tool_names or []
+
+def install_python_packages(requirement_files=(), packages=()):
+    """Install requirement files and packages using a single pip invocation (from the wheelhouse, if set)."""
+    # Quote package specs, the shell would read "pkg>=1.0" as a redirection
+    args = [f'-r "{req_file}"' for req_file in requirement_files] + [f'"{package}"' for package in packages]
+    echo(t("installing_pkg", ", ".join(str(arg) for arg in list(requirement_files) + list(packages))))
+    wheelhouse = context().wheelhouse_settings["path"]
+    if wheelhouse:
+        if not Path(wheelhouse).is_dir():
+            raise FileNotFoundError(t("err_wheelhouse_missing", wheelhouse))
+        echo(t("wheelhouse_install", wheelhouse))
+        args = ["--no-index", f'--find-links "{wheelhouse}"'] + args
+    run_pip(f'install {" ".join(args)}')
+
+def run_pip(arguments):
+    """Run pip for this interpreter, passing its output on to the output stream instead of the process's stdout."""
+    # Use quotes around sys.executable to handle paths with spaces
+    result = run_command(f'"{sys.executable}" -m pip {arguments}', capture_output=True)
+    echo(result.stdout + result.stderr, end="")
+
+# --- Dependency Planning ---
+REQUIREMENT_PATTERN = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*([^;]*)")
+
+def new_dependency_plan():
+    """
+    Create an empty dependency plan.
+
+    Skills add to the plan while they are installed; install_dependencies then
+    resolves everything in one pip run.
+    """
+    return {
+        "requirements": [],  # (skill_name, requirements.txt path)
+        "packages": {},      # package -> [skill names needing it]
+        "checked": {},       # skill name -> whether it declares any dependencies
+    }
+
+def canonical_package_name(name):
+    """Normalize a package name as pip does (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def read_requirement_pins(req_file):
+    """
+    Return {package: version} for the exact (==) pins of a requirements file.
+
+    Options, includes, URLs and environment markers are left to pip.
+    """
+    pins = {}
+    for line in req_file.read_text(encoding="utf-8").splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")) or "://" in line:
+            continue
+        match = REQUIREMENT_PATTERN.match(line)
+        if not match:
+            continue
+        for clause in match.group(2).replace(" ", "").split(","):
+            if clause.startswith("==") and not clause.startswith("===") and "*" not in clause:
+                pins[canonical_package_name(match.group(1))] = clause[2:]
+    return pins
+
+def find_dependency_conflicts(plan):
+    """Return {package: {version: [skill names]}} for packages pinned to different versions."""
+    pins = {}
+    for skill_name, req_file in plan["requirements"]:
+        for package, version in read_requirement_pins(req_file).items():
+            pins.setdefault(package, {}).setdefault(version, []).append(skill_name)
+    return {package: versions for package, versions in pins.items() if len(versions) > 1}
+
+def collect_dependencies(skill_name, skill_path, plan, repo_path=None):
+    """Check the dependencies of a skill and add what is missing to the plan."""
+    echo(t("check_deps", skill_name))
+    
+    # Generic requirements.txt check
+    req_file = skill_path / "requirements.txt"
+    if req_file.exists():
+        echo(t("found_reqs"))
+        plan["requirements"].append((skill_name, req_file))
+    
+    # Tool checks declared in skills.json
+    skill_tools = get_skill_tools(skill_name, repo_path)
+    plan["checked"][skill_name] = req_file.exists() or bool(skill_tools)
+    for tool_name in skill_tools:
+        tool = context().tools.get(tool_name)
+        if tool is None:
+            echo(t("warn_unknown_tool", tool_name))
+            continue
+        if not check_installed(tool_name, tool):
+            package = tool.get("package", tool_name)
+            if tool.get("min_version"):
+                package += f">={tool['min_version']}"
+            echo(t("queued_pkg", package))
+            plan["packages"].setdefault(package, []).append(skill_name)
+
+def install_dependencies(plan, target_dirs=()):
+    """
+    Resolve and install all planned dependencies with one pip run.
+
+    Conflicting exact pins across skills are reported up front instead of
+    letting pip fail (or silently pick one) halfway through. The outcome is
+    recorded for each checked skill in the state of the targets.
+
+    Returns:
+        bool: True if nothing needed installing or pip succeeded.
+    """
+    ok = _install_dependencies(plan)
+    record_dependency_status(target_dirs, plan, ok)
+    return ok
+
+def _install_dependencies(plan):
+    if not plan["requirements"] and not plan["packages"]:
+        return True
+
+    conflicts = find_dependency_conflicts(plan)
+    if conflicts:
+        echo(t("deps_conflict"))
+        for package, versions in sorted(conflicts.items()):
+            for version, skill_names in sorted(versions.items()):
+                echo(t("deps_conflict_item", package, version, ", ".join(skill_names)))
+        return False
+
+    skill_names = sorted({name for name, _ in plan["requirements"]} |
+                         {name for names in plan["packages"].values() for name in names})
+    fingerprints = dependency_fingerprints(plan)
+    if not context().dependency_settings["force"] and fingerprints <= load_satisfied_dependencies():
+        echo(t("deps_satisfied", ", ".join(skill_names)))
+        return True
+
+    echo(t("installing_deps", ", ".join(skill_names)))
+    try:
+        with trace_span("dependencies"):
+            install_python_packages([req_file for _, req_file in plan["requirements"]], sorted(plan["packages"]))
+    except Exception as e:
+        echo(t("err_deps_failed", e))
+        return False
+    record_satisfied_dependencies(fingerprints)
+    return True
+
+def get_dependency_cache_path():
+    return get_cache_root() / "dependency_fingerprints.json"
+
+def dependency_fingerprints(plan):
+    """Return a fingerprint for each requirements file (by content) and package spec of a plan."""
+    fingerprints = {hash_file(req_file) for _, req_file in plan["requirements"]}
+    fingerprints.update(hashlib.sha256(f"package\0{package}".encode("utf-8")).hexdigest() for package in plan["packages"])
+    return fingerprints
+
+def distributions_state():
+    """Hash the names (with versions) of the distributions installed for this interpreter, without importing them."""
+    paths = sysconfig.get_paths()
+    site_dirs = {paths["purelib"], paths["platlib"]}
+    if site.ENABLE_USER_SITE:
+        site_dirs.add(site.getusersitepackages())
+    digest = hashlib.sha256(f"{sys.executable}\0{sys.version}\n".encode("utf-8"))
+    for site_dir in sorted(site_dirs):
+        try:
+            names = sorted(name for name in os.listdir(site_dir) if name.endswith((".dist-info", ".egg-info")))
+        except OSError:
+            continue
+        digest.update(f"{site_dir}\0{chr(0).join(names)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def load_satisfied_dependencies():
+    """Return the fingerprints of the dependencies known to be satisfied right now."""
+    try:
+        with open(get_dependency_cache_path(), "r", encoding="utf-8") as f:
+            entry = json.load(f).get(sys.executable, {})
+    except (OSError, ValueError, AttributeError):
+        return set()
+    if entry.get("distributions") != distributions_state():
+        return set()
+    return set(entry.get("fingerprints", []))
+
+def record_satisfied_dependencies(fingerprints):
+    """
+    Remember the dependencies pip just satisfied.
+
+    The cache holds {sys.executable: {"distributions": distributions_state(),
+    "fingerprints": [see dependency_fingerprints]}}. A fingerprint only counts
+    while the installed distributions are exactly as pip left them, so earlier
+    fingerprints are kept only when this run changed nothing.
+    """
+    cache_path = get_dependency_cache_path()
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    state = distributions_state()
+    previous = cache.get(sys.executable, {})
+    if previous.get("distributions") == state:
+        fingerprints = fingerprints | set(previous.get("fingerprints", []))
+    cache[sys.executable] = {"distributions": state, "fingerprints": sorted(fingerprints)}
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(cache_path, cache)
+    except OSError:
+        pass  # The cache is an optimisation only
+
+# --- Wheelhouse ---
+# Local directory of pre-built wheels that dependencies are installed from with
+# pip --no-index, for machines without access to a package index
+WHEELHOUSE_MANIFEST = "wheelhouse.json"
+
+def read_skill_requirements(mirror_path, rev, repo_paths):
+    """
+    Return {repository path: requirements.txt text} for the skill folders at rev that have one.
+
+    The files are located from tree objects and their blobs fetched in one
+    batched request, so no checkout is needed.
+    """
+    requirement_paths = [f"{path.rstrip('/')}/requirements.txt" for path in repo_paths]
+    if not requirement_paths:
+        return {}
+    quoted = " ".join(f'"{path}"' for path in requirement_paths)
+    output = run_command(f"git ls-tree -z {rev} -- {quoted}", cwd=mirror_path, capture_output=True).stdout
+    oids = {}  # repository path -> blob oid
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        if meta.split()[1] == "blob":
+            oids[path[:-len("/requirements.txt")]] = meta.split()[2]
+
+    missing = find_missing_objects(mirror_path, rev)
+    fetch_missing_objects(mirror_path, [oid for oid in oids.values() if oid in missing])
+    contents = read_blobs(mirror_path, list(oids.values()))
+    return {path: contents[oid].decode("utf-8", errors="replace") for path, oid in oids.items() if oid in contents}
+
+def build_wheelhouse(wheel_dir):
+    """
+    Download and build wheels for the dependencies of every configured skill.
+
+    Covers each skill's requirements.txt at its source's current ref and the
+    packages of the tools the skills declare. The requirement files are kept
+    in the wheelhouse next to a wheelhouse.json describing the build, so the
+    directory can be copied to machines without network access and used with
+    --wheelhouse.
+
+    Args:
+        wheel_dir (Path): Wheelhouse directory (created if missing).
+
+    Returns:
+        bool: True if the wheelhouse was built (or nothing needed building).
+    """
+    wheel_dir = Path(wheel_dir).expanduser()
+    paths_by_source = {}
+    for skill_name, repo_path in context().skills_mapping.items():
+        paths_by_source.setdefault(context().skill_sources[skill_name], []).append((skill_name, repo_path))
+
+    echo(t("fetching_repo"))
+
+    def read_source(source_name):
+        source = context().sources[source_name]
+        try:
+            mirror_path = sync_mirror(source["url"])
+            commit = get_mirror_head(mirror_path, source["ref"])
+        except Exception:
+            echo(t("failed_clone"))
+            return None
+        return commit, read_skill_requirements(mirror_path, commit, [path for _, path in paths_by_source[source_name]])
+
+    source_names = list(paths_by_source)
+    requirements = {}  # skill name -> requirements.txt text
+    commits = {}
+    for source_name, fetched in zip(source_names, run_in_parallel(read_source, source_names)):
+        if fetched is None:
+            return False
+        commits[source_name], texts = fetched
+        for skill_name, repo_path in paths_by_source[source_name]:
+            if repo_path.rstrip("/") in texts:
+                requirements[skill_name] = texts[repo_path.rstrip("/")]
+
+    packages = set()
+    for skill_name, repo_path in context().skills_mapping.items():
+        for tool_name in get_skill_tools(skill_name, repo_path):
+            tool = context().tools.get(tool_name)
+            if tool is not None:
+                package = tool.get("package", tool_name)
+                packages.add(f"{package}>={tool['min_version']}" if tool.get("min_version") else package)
+
+    if not requirements and not packages:
+        echo(t("wheelhouse_empty"))
+        return True
+
+    echo(t("wheelhouse_building", wheel_dir, len(requirements), len(packages)))
+    try:
+        requirements_dir = wheel_dir / "requirements"
+        shutil.rmtree(requirements_dir, ignore_errors=True)
+        requirements_dir.mkdir(parents=True)
+        requirement_files = []
+        for skill_name, text in sorted(requirements.items()):
+            requirement_files.append(requirements_dir / f"{skill_name}.txt")
+            requirement_files[-1].write_text(text, encoding="utf-8")
+
+        args = [f'-r "{req_file}"' for req_file in requirement_files] + [f'"{package}"' for package in sorted(packages)]
+        with trace_span("wheelhouse"):
+            run_pip(f'wheel --wheel-dir "{wheel_dir}" {" ".join(args)}')
+
+        wheels = sorted(path.name for path in wheel_dir.glob("*.whl"))
+        write_json_atomic(wheel_dir / WHEELHOUSE_MANIFEST, {
+            "python": platform.python_version(),
+            "platform": sysconfig.get_platform(),
+            "sources": {name: {"url": context().sources[name]["url"], "commit": commit}
+                        for name, commit in commits.items()},
+            "requirements": sorted(requirements),
+            "packages": sorted(packages),
+            "wheels": wheels,
+        }, sort_keys=True)
+    except Exception as e:
+        echo(t("err_wheelhouse_build", e))
+        return False
+    echo(t("wheelhouse_built", len(wheels), wheel_dir))
+    return True
+
+# --- Lockfile ---
+LOCKFILE_VERSION = 2
+
+def content_hash(manifest_entry):
+    """Return an aggregate SHA-256 over the relative paths and file hashes of a skill."""
+    digest = hashlib.sha256()
+    for rel_path, info in sorted(manifest_entry.get("files", {}).items()):
+        digest.update(f"{rel_path}\0{info['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def aggregate_hash(locked_skills):
+    """Return a single hash covering the content hashes of all locked skills."""
+    digest = hashlib.sha256()
+    for skill_name, entry in sorted(locked_skills.items()):
+        digest.update(f"{skill_name}\0{entry['content_hash']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def load_lockfile():
+    """Load skills.lock (None if missing, unreadable or written by an incompatible version)."""
+    if context().lockfile_path is None:
+        return None
+    try:
+        with open(context().lockfile_path, "r", encoding="utf-8") as f:
+            lock = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if lock.get("version") != LOCKFILE_VERSION:
+        return None
+    return lock
+
+def describe_lock(lock):
+    """Short description of the locked commits, e.g. "default@1a2b3c4d5e6f"."""
+    return ", ".join(f"{name}@{source['commit'][:12]}" for name, source in sorted(lock["sources"].items()))
+
+def write_lockfile(results):
+    """
+    Record the commits and content of the installed skills in skills.lock.
+
+    Skills installed by an earlier run stay locked while their source is still
+    configured the same way and, for sources fetched in this run, their tree at
+    the new commit is unchanged (same tree, same content); the others are
+    dropped until they are installed again.
+
+    Args:
+        results (dict): {source name: (mirror path, commit, {skill name: manifest entry})} of this run.
+    """
+    if context().lockfile_path is None:
+        return
+    sources, mapping, owners = context().sources, context().skills_mapping, context().skill_sources
+    previous = load_lockfile() or {"sources": {}, "skills": {}}
+    kept = {name: entry for name, entry in previous["skills"].items()
+            if owners.get(name) == entry.get("source") and mapping.get(name) == entry.get("path")
+            and previous["sources"].get(entry["source"], {}).get("url") == sources[entry["source"]]["url"]
+            and not any(name in installed for _, _, installed in results.values())}
+
+    locked_sources = {}
+    locked_skills = {}
+    for name, entry in kept.items():
+        if entry["source"] not in results:
+            locked_sources[entry["source"]] = previous["sources"][entry["source"]]
+            locked_skills[name] = entry
+    for source_name, (mirror_path, commit, installed) in results.items():
+        source_kept = {name: entry for name, entry in kept.items() if entry["source"] == source_name}
+        trees = resolve_trees(mirror_path, commit, {entry["path"] for entry in source_kept.values()})
+        locked_skills.update({name: entry for name, entry in source_kept.items()
+                              if trees.get(entry["path"]) == entry.get("tree")})
+        for skill_name, entry in installed.items():
+            locked_skills[skill_name] = {
+                "source": source_name,
+                "path": mapping[skill_name],
+                "tree": entry.get("tree"),
+                "content_hash": content_hash(entry),
+            }
+        locked_sources[source_name] = {"url": sources[source_name]["url"], "ref": sources[source_name]["ref"],
+                                       "commit": commit}
+
+    lock = {
+        "version": LOCKFILE_VERSION,
+        "sources": {name: source for name, source in locked_sources.items()
+                    if any(entry["source"] == name for entry in locked_skills.values())},
+        "content_hash": aggregate_hash(locked_skills),
+        "skills": locked_skills,
+    }
+    try:
+        with file_lock(context().lockfile_path.with_name(".skills.json.lock")):
+            write_json_atomic(context().lockfile_path, lock, sort_keys=True)
+        echo(t("lock_written", describe_lock(lock)))
+    except (OSError, TimeoutError) as e:
+        echo(t("warn_save_lock", e))
+
+def verify_targets(target_dirs, lock):
+    """
+    Compare the installed skills of each target with skills.lock.
+
+    Files whose size and mtime match the install manifest are not re-read, so
+    an unchanged target is verified from stat calls alone.
+
+    Returns:
+        bool: True if every target holds exactly the locked content.
+    """
+    matches = True
+    for target_dir in target_dirs:
+        manifest = load_manifest(target_dir)
+        for skill_name, locked in sorted(lock["skills"].items()):
+            dest_path = target_dir / skill_name
+            if not dest_path.is_dir():
+                echo(t("lock_skill_missing", skill_name, target_dir))
+                matches = False
+                continue
+            recorded = manifest.get(skill_name, {}).get("files", {})
+            files = {rel_path: {"sha256": recorded_hash(file_path, recorded, rel_path)}
+                     for rel_path, file_path in list_files(dest_path).items()}
+            if content_hash({"files": files}) != locked["content_hash"]:
+                echo(t("lock_skill_differs", skill_name, target_dir))
+                matches = False
+    return matches
+
+def ensure_target_dir(target_dir):
+    """Create a target directory if needed. Returns False if it cannot be created."""
+    if not target_dir.exists():
+        try:
+            target_dir.mkdir(parents=True)
+            echo(t("created_dir", target_dir))
+        except Exception as e:
+            echo(t("err_create_dir", target_dir, e))
+            return False
+    return True
+
+def install_skill(checkout_path, target_dir, skill_name, repo_path, manifest, primary_copies, installed_only=False,
+                  source_state=None):
+    """
+    Materialize one skill into a target; calls for different skills may run concurrently.
+
+    Skills already installed in another target during this run are hardlinked
+    from that copy; with the content store enabled, skills whose tree is in the
+    store are hardlinked from it and need no checkout, and newly fetched files
+    are added to it. Other skills are streamed from the mirror's objects when
+    source_state lists them, or copied from the checkout. The skill is staged
+    and swapped in by rename.
+
+    Returns:
+        dict: {"status": "installed", "updated", "skipped" (already current) or "failed",
+            or None when an upgrade finds the skill absent; "entry": the new manifest entry
+            (also stored in manifest); "materialized": whether the files were staged;
+            "stats": file change counts; "seconds": time taken}
+    """
+    start = time.perf_counter()
+    result = {"status": None, "entry": None, "materialized": False, "stats": None, "seconds": 0.0}
+    dest_path = target_dir / skill_name
+    if installed_only and not dest_path.is_dir():
+        return result
+
+    source_tree = source_state["trees"].get(repo_path)
+    entry = manifest.get(skill_name, {})
+    if installed_only and source_tree and entry.get("tree") == source_tree:
+        entry["commit"] = source_state["commit"]
+        echo(t("up_to_date", skill_name))
+        result.update(status="skipped", entry=entry, seconds=time.perf_counter() - start)
+        return result
+
+    stored = None
+    if context().store_settings["enabled"] and skill_name not in primary_copies:
+        stored = load_stored_tree(source_tree)
+    source_objects = source_state.get("objects", {}).get(repo_path)
+    source_path = checkout_path / repo_path if checkout_path else Path(repo_path)
+    if (skill_name not in primary_copies and stored is None and not source_objects
+            and not (checkout_path and source_path.exists())):
+        echo(t("err_source_not_found", skill_name, source_path))
+        result.update(status="failed", seconds=time.perf_counter() - start)
+        return result
+
+    action = t("installing")
+    existed = dest_path.exists()
+    if existed:
+        # Only files that differ from the recorded manifest are rewritten
+        action = t("updating")
+        echo(t("found_existing", skill_name))
+
+    echo(f"{action} {skill_name}...")
+    with trace_span(skill_name, "skill"):
+        try:
+            if skill_name in primary_copies:
+                primary_path, primary_entry = primary_copies[skill_name]
+                entry, stats = stage_skill_files(
+                    primary_path, dest_path, manifest.get(skill_name), source_entry=primary_entry, link=True)
+            elif stored:
+                store_files, store_entry = stored
+                entry, stats = stage_skill_files(
+                    None, dest_path, manifest.get(skill_name), source_entry=store_entry, link=True,
+                    source_files=store_files)
+            else:
+                if source_objects:
+                    entry, stats = stage_skill_objects(
+                        source_state["blob_writers"], source_objects, dest_path, manifest.get(skill_name),
+                        store=context().store_settings["enabled"])
+                else:
+                    entry, stats = stage_skill_files(
+                        source_path, dest_path, manifest.get(skill_name), store=context().store_settings["enabled"],
+                        source_files=list_source_files(source_path, checkout_path or source_path))
+                if context().store_settings["enabled"] and source_tree:
+                    save_stored_tree(source_tree, entry)
+            entry.update(source=repo_path, tree=source_tree, commit=source_state["commit"])
+            manifest[skill_name] = entry
+            report_changes(skill_name, existed, stats)
+            echo(t("processed_success", skill_name))
+            status = "skipped" if not has_changes(stats) else "updated" if existed else "installed"
+            result.update(status=status, entry=entry, materialized=True, stats=stats)
+        except Exception as e:
+            echo(t("failed_copy", skill_name, e))
+            result["status"] = "failed"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+PRIMARY_LOCK = threading.Lock()  # Guards primary copies and the dependency plan when targets install concurrently
+
+def install_into_target(checkout_path, target_dir, skills, dependency_plan, primary_copies, installed_only=False,
+                        source_state=None):
+    """
+    Materialize skills into a single target (call while holding its lock).
+
+    Skills are installed concurrently on up to --jobs threads; their output is
+    printed in skill order as each one finishes. Dependencies of each newly
+    copied skill are checked on this thread while later skills are still
+    being copied. The source commit and tree SHA of every installed skill are
+    recorded in the manifest; when upgrading, skills whose recorded tree still
+    matches are skipped without reading any files.
+
+    Returns:
+        dict: Manifest entries of the skills installed successfully, by name.
+    """
+    source_state = source_state or {"commit": None, "trees": {}}
+    remove_stale_staging(target_dir)
+    manifest = load_manifest(target_dir)
+    succeeded = {}
+
+    def install(skill):
+        skill_name, repo_path = skill
+        return install_skill(checkout_path, target_dir, skill_name, repo_path, manifest, primary_copies,
+                             installed_only, source_state)
+
+    for (skill_name, repo_path), result in zip(skills, run_in_parallel(install, skills)):
+        if result["status"] is not None:
+            emit_progress("skill", target=str(target_dir), skill=skill_name, status=result["status"],
+                          seconds=round(result["seconds"], 6), **(result["stats"] or {}))
+        entry = result["entry"]
+        if entry is None:
+            continue
+        succeeded[skill_name] = entry
+        # Dependencies are shared by all targets, so they are checked for the first copy only
+        if result["materialized"]:
+            with PRIMARY_LOCK:
+                if skill_name not in primary_copies:
+                    primary_copies[skill_name] = (target_dir / skill_name, entry)
+                    collect_dependencies(skill_name, target_dir / skill_name, dependency_plan, repo_path)
+
+    save_manifest(target_dir, manifest)
+    return succeeded
+
+def install_from_checkout(checkout_path, target_dirs, skills, dependency_plan, installed_only=False, source_state=None,
+                          parallel_targets=False):
+    """
+    Materialize skills from a repository checkout into one or more targets.
+
+    The first target receives copies from the checkout (or the mirror's objects); every further target is
+    populated from that first copy with hardlinks where the filesystem allows.
+    Each target is locked while it is written, so concurrent runs sharing a
+    target wait for each other instead of racing.
+
+    Args:
+        checkout_path (Path): Root of the repository checkout (None: no checkout).
+        target_dirs (list): Destination base directories.
+        skills (list): (skill name, repository path) pairs.
+        dependency_plan (dict): Plan collecting the dependencies of installed skills.
+        installed_only (bool): Only touch skills already present in each target (upgrade).
+        source_state (dict): {"commit": SHA, "trees": {repository path: tree SHA}} of the checkout,
+            plus "objects" (see read_skill_objects) and "blob_writers" when streaming from the object store.
+        parallel_targets (bool): Install up to --jobs targets concurrently (their skills one by one)
+            instead of one target at a time.
+
+    Returns:
+        dict: Manifest entry of the first successful copy of each installed skill, by name.
+    """
+    primary_copies = {}  # skill name -> (dest path, manifest entry) of its first installed copy
+    succeeded = {}
+
+    def install_target(target_dir):
+        if len(target_dirs) > 1:
+            echo(t("target_header", target_dir))
+        if not ensure_target_dir(target_dir):
+            return {}
+        try:
+            with trace_span(f"target {target_dir}"), file_lock(target_dir / LOCK_FILE):
+                return install_into_target(
+                    checkout_path, target_dir, skills, dependency_plan, primary_copies, installed_only, source_state)
+        except TimeoutError as e:
+            echo(e)
+            return {}
+
+    for installed in run_in_parallel(install_target, target_dirs, jobs=None if parallel_targets else 1):
+        for skill_name, entry in installed.items():
+            succeeded.setdefault(skill_name, entry)
+
+    return succeeded
+
+def update_or_install_skills(target_dirs, specific_skills=None, auto_update=False, installed_only=False,
+                             frozen_lock=None, fleet=False):
+    """
+    Install or update skills.
+
+    The repositories of all sources involved are fetched concurrently, then the
+    skills of each source are installed from their own checkout.
+    
+    Args:
+        target_dirs (list): Destination base directories; each repository is fetched once for all of them.
+        specific_skills (list): Optional list of skill keys to install/update.
+        auto_update (bool): If True, defaults to updating without prompting per skill (though we overwrite anyway).
+        installed_only (bool): Only update skills already present in each target.
+        frozen_lock (dict): Install exactly the commits and skills of this skills.lock instead of the latest refs.
+        fleet (bool): Upgrade many targets at once: targets holding no stale skill of a source are
+            left untouched and the others are updated concurrently (see upgrade_fleet).
+
+    Returns:
+        bool: False if a requested skill is unknown, a repository could not be fetched or a frozen
+            install did not match the lock.
+    """
+    if frozen_lock:
+        sources = frozen_lock["sources"]
+        mapping = {name: (entry["source"], entry["path"]) for name, entry in frozen_lock["skills"].items()}
+    else:
+        sources = context().sources
+        mapping = {name: (context().skill_sources[name], path) for name, path in context().skills_mapping.items()}
+
+    skills_by_source = {}  # source name -> [(skill name, repository path)]
+    unknown_skills = []
+    for skill_name in (specific_skills if specific_skills else mapping.keys()):
+        if skill_name not in mapping:
+            echo(t("warn_skill_not_found", skill_name))
+            unknown_skills.append(skill_name)
+            continue
+        source_name, repo_path = mapping[skill_name]
+        skills_by_source.setdefault(source_name, []).append((skill_name, repo_path))
+    for skill_name in unknown_skills:
+        for target_dir in target_dirs:
+            emit_progress("skill", target=str(target_dir), skill=skill_name, status="failed", seconds=0.0)
+
+    echo(t("fetching_repo"))
+
+    def fetch(source_name):
+        # Incrementally update the persistent mirror instead of cloning from scratch
+        echo(f"Repository: {sources[source_name]['url']}")
+        try:
+            return sync_mirror(sources[source_name]["url"])
+        except Exception:
+            echo(t("failed_clone"))
+            return None
+
+    source_names = list(skills_by_source)
+    mirrors = dict(zip(source_names, run_in_parallel(fetch, source_names)))
+
+    ok = not unknown_skills
+    dependency_plan = new_dependency_plan()
+    results = {}  # source name -> (mirror path, commit, installed entries)
+    def fail_source(source_name, skill_names=None):
+        for target_dir in target_dirs:
+            for skill_name in skill_names or [name for name, _ in skills_by_source[source_name]]:
+                if not installed_only or (target_dir / skill_name).is_dir():
+                    emit_progress("skill", target=str(target_dir), skill=skill_name, status="failed", seconds=0.0)
+
+    for source_name, skills_to_process in skills_by_source.items():
+        mirror_path = mirrors[source_name]
+        emit_progress("fetch", source=source_name, url=sources[source_name]["url"], ok=mirror_path is not None)
+        if mirror_path is None:
+            fail_source(source_name)
+            ok = False
+            continue
+        if len(skills_by_source) > 1:
+            echo(t("source_header", source_name, sources[source_name]["url"]))
+
+        if frozen_lock:
+            commit = sources[source_name]["commit"]
+            if not has_commit(mirror_path, commit) and not refresh_for_commit(sources[source_name]["url"], commit):
+                echo(t("err_lock_commit", commit[:12], sources[source_name]["url"]))
+                fail_source(source_name)
+                ok = False
+                continue
+        else:
+            commit = get_mirror_head(mirror_path, sources[source_name]["ref"])
+        with trace_span("resolve trees"):
+            source_state = {"commit": commit, "trees": resolve_trees(mirror_path, commit, [path for _, path in skills_to_process])}
+
+        # When upgrading, only skills whose upstream tree moved in some target need their files
+        needed = skills_to_process
+        if installed_only:
+            needed = [(name, path) for name, path in skills_to_process
+                      if is_stale_anywhere(target_dirs, name, source_state["trees"].get(path))]
+        if context().store_settings["enabled"]:
+            # Skills whose tree is already in the content store are linked from it without a checkout
+            needed = [(name, path) for name, path in needed if load_stored_tree(source_state["trees"].get(path)) is None]
+        if needed and context().fetch_settings["offline"]:
+            # A partial mirror only holds the files of skills installed from it before
+            uncached = find_uncached_trees(mirror_path, {source_state["trees"].get(path) for _, path in needed} - {None})
+            uncached_skills = [name for name, path in needed if source_state["trees"].get(path) in uncached]
+            for skill_name in uncached_skills:
+                echo(t("err_offline_not_cached", skill_name))
+            if uncached_skills:
+                fail_source(source_name, uncached_skills)
+                ok = False
+                needed = [(name, path) for name, path in needed if name not in uncached_skills]
+                skills_to_process = [(name, path) for name, path in skills_to_process if name not in uncached_skills]
+
+        source_targets = target_dirs
+        if fleet:
+            source_targets = [target_dir for target_dir in target_dirs
+                              if any(is_stale_anywhere([target_dir], name, source_state["trees"].get(path))
+                                     for name, path in skills_to_process)]
+            if not source_targets:
+                results[source_name] = (mirror_path, commit, {})
+                continue
+
+        if needed:
+            with open_skill_source(mirror_path, commit, [path for _, path in needed], source_state) as temp_path:
+                installed = install_from_checkout(
+                    temp_path, source_targets, skills_to_process, dependency_plan, installed_only, source_state, fleet)
+        else:
+            # Everything is current or in the store: no files to read
+            installed = install_from_checkout(
+                None, source_targets, skills_to_process, dependency_plan, installed_only, source_state, fleet)
+        results[source_name] = (mirror_path, commit, installed)
+
+        if frozen_lock:
+            mismatched = [name for name, entry in installed.items()
+                          if content_hash(entry) != frozen_lock["skills"][name]["content_hash"]]
+            for skill_name in mismatched:
+                echo(t("err_lock_content", skill_name, commit[:12]))
+            ok = ok and not mismatched and len(installed) == len(skills_to_process)
+
+    if not install_dependencies(dependency_plan, target_dirs):
+        ok = False
+
+    if not frozen_lock and any(installed for _, _, installed in results.values()):
+        write_lockfile(results)
+    return ok
+
+def find_installed_skills(target_dirs):
+    """Return the configured skills present in any of the targets, in discovery order."""
+    installed_skills = []
+    for target_dir in target_dirs:
+        found = []
+        state = load_target_state(target_dir)
+        if state is not None:
+            # The state database lists the installed skills, no need to list the target
+            found = [name for name in state["skills"] if name in context().skills_mapping]
+        elif target_dir.exists():
+            for item in target_dir.iterdir():
+                if item.is_dir() and item.name in context().skills_mapping:
+                    found.append(item.name)
+        if found:
+            echo(t("found_skills_in", target_dir, ", ".join(found)))
+        installed_skills.extend(name for name in found if name not in installed_skills)
+    return installed_skills
+
+def upgrade_installed_skills(target_dirs):
+    """
+    Update the configured skills already installed in the targets.
+
+    Returns:
+        bool: False if an install step failed.
+    """
+    echo(t("checking_updates"))
+    installed_skills = find_installed_skills(target_dirs)
+    if not installed_skills:
+        echo(t("no_skills_update"))
+        return True
+    return update_or_install_skills(target_dirs, specific_skills=installed_skills, auto_update=True, installed_only=True)
+
+# --- Fleet Mode ---
+DEFAULT_FLEET_DEPTH = 4
+DEFAULT_FLEET_IGNORE = (".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__", ".tox", ".cache")
+
+def find_skill_targets(root, max_depth=DEFAULT_FLEET_DEPTH, ignore=()):
+    """
+    Find the skill target directories under root.
+
+    A directory is a target if it holds an install manifest or a folder named
+    after a configured skill; targets are not searched any further. Directories
+    matching an ignore pattern (fnmatch, against the name or the path relative
+    to root) are skipped, as are the usual VCS, virtualenv and cache folders.
+
+    Args:
+        root (Path): Directory to scan.
+        max_depth (int): Deepest level below root that is searched (root itself is level 0).
+        ignore (list): Additional patterns of directories to skip.
+
+    Returns:
+        list: Target directories, in path order.
+    """
+    root = Path(root)
+    patterns = [*DEFAULT_FLEET_IGNORE, *ignore]
+    targets = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        path = Path(dirpath)
+        if MANIFEST_FILE in filenames or any(name in context().skills_mapping for name in dirnames):
+            targets.append(path)
+            dirnames[:] = []
+            continue
+        if len(path.relative_to(root).parts) >= max_depth:
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if not any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch((path / name).relative_to(root).as_posix(), pattern)
+                       for pattern in patterns))
+    return targets
+
+def upgrade_fleet(root, max_depth=DEFAULT_FLEET_DEPTH, ignore=()):
+    """
+    Upgrade every skill directory found under root in one pass.
+
+    Each source repository is fetched once for all targets. Only targets that
+    hold a stale skill are locked and written, up to --jobs of them at a time,
+    and an aggregate report is printed at the end.
+
+    Args:
+        root (Path): Directory to scan (see find_skill_targets).
+        max_depth (int): Deepest directory level searched below root.
+        ignore (list): Additional patterns of directories to skip.
+
+    Returns:
+        dict: "ok" and "targets": {target path: "current", "updated" or "failed"}.
+    """
+    start = time.perf_counter()
+    root = Path(root).expanduser()
+    echo(t("fleet_scanning", root, max_depth))
+    with trace_span("scan"):
+        target_dirs = find_skill_targets(root, max_depth, ignore)
+    if not target_dirs:
+        echo(t("fleet_none", root))
+        return {"ok": True, "targets": {}}
+    echo(t("fleet_found", len(target_dirs)))
+
+    installed_skills = find_installed_skills(target_dirs)
+    ok = True
+    records = []
+    if installed_skills:
+        run_context = context()
+        forward = run_context.progress
+        def record(event, data):
+            if event == "skill":
+                records.append(data)
+            if forward is not None:
+                forward(event, data)
+
+        run_context.progress = record
+        try:
+            ok = update_or_install_skills(target_dirs, specific_skills=installed_skills, auto_update=True,
+                                          installed_only=True, fleet=True)
+        finally:
+            run_context.progress = forward
+
+    statuses = {str(target_dir): "current" for target_dir in target_dirs}
+    failures = {}  # target -> failed skill names
+    touched = set()
+    for data in records:
+        touched.add(data["target"])
+        if data["status"] == "failed":
+            statuses[data["target"]] = "failed"
+            failures.setdefault(data["target"], []).append(data["skill"])
+        elif data["status"] in ("installed", "updated") and statuses[data["target"]] != "failed":
+            statuses[data["target"]] = "updated"
+
+    counts = list(statuses.values())
+    echo(t("fleet_summary", len(target_dirs), len(touched), counts.count("updated"), counts.count("failed"),
+           sum(1 for data in records if data["status"] in ("installed", "updated")), time.perf_counter() - start))
+    for target, skills in failures.items():
+        echo(t("fleet_failed_target", target, ", ".join(skills)))
+    return {"ok": ok and not failures, "targets": statuses}
+
+# --- Watch Mode ---
+DEFAULT_WATCH_INTERVAL = 300  # Seconds between two ref lookups
+MAX_WATCH_BACKOFF = 3600  # Longest wait after repeated failures
+WATCH_JITTER = 0.1  # Random +/- fraction added to every wait, so many hosts do not poll in step
+
+def watch_delay(interval, failures):
+    """Seconds to wait before the next poll: exponential backoff after failures, with jitter."""
+    delay = min(interval * 2 ** failures, max(interval, MAX_WATCH_BACKOFF))
+    return max(1, round(delay * random.uniform(1 - WATCH_JITTER, 1 + WATCH_JITTER)))
+
+def watch_targets(target_dirs, interval=DEFAULT_WATCH_INTERVAL, polls=None):
+    """
+    Keep the installed skills of the targets current until interrupted.
+
+    Each poll only looks up the ref of every source involved (git ls-remote).
+    When a ref moved and some installed skill of that source was installed
+    from another commit, its mirror is fetched and the skills of that source
+    are upgraded incrementally, each target under its lock. Unreachable
+    remotes and failed updates are retried with exponential backoff.
+
+    Args:
+        target_dirs (list): Targets to keep current.
+        interval (int): Seconds between polls while everything succeeds.
+        polls (int): Stop after this many polls (default: run until interrupted).
+
+    Returns:
+        int: Number of updates applied.
+    """
+    if context().fetch_settings["offline"]:
+        echo(t("err_watch_offline"))
+        return 0
+    installed_skills = find_installed_skills(target_dirs)
+    if not installed_skills:
+        echo(t("no_skills_update"))
+        return 0
+    echo(t("watch_start", len(target_dirs), interval))
+    sources, owners = context().sources, context().skill_sources
+
+    seen = {}  # source name -> last remote commit the targets were brought to
+    updates = 0
+    failures = 0
+    poll = 0
+    try:
+        while polls is None or poll < polls:
+            if poll:
+                time.sleep(watch_delay(interval, failures))
+            poll += 1
+            failed = False
+            source_names = [name for name in sources if any(owners[skill] == name for skill in installed_skills)]
+            heads = dict(zip(source_names, run_in_parallel(
+                lambda name: get_remote_head(sources[name]["url"], sources[name]["ref"]), source_names)))
+            for source_name in source_names:
+                remote_commit = heads[source_name]
+                if remote_commit is None:
+                    failed = True
+                    echo(t("watch_poll_failed", time.strftime("%H:%M:%S"), sources[source_name]["url"],
+                           watch_delay(interval, failures + 1)))
+                    continue
+                if seen.get(source_name) == remote_commit:
+                    continue
+                skills = [name for name in installed_skills if owners[name] == source_name]
+                # Only manifests are read here; nothing is fetched unless a skill is behind
+                if all(load_manifest(target_dir).get(name, {}).get("commit") == remote_commit
+                       for target_dir in target_dirs for name in skills if (target_dir / name).is_dir()):
+                    seen[source_name] = remote_commit
+                    continue
+                echo(t("watch_changed", time.strftime("%H:%M:%S"), source_name, remote_commit[:12]))
+                try:
+                    sync_mirror(sources[source_name]["url"], refresh=True)
+                    ok = update_or_install_skills(target_dirs, specific_skills=skills, auto_update=True,
+                                                  installed_only=True)
+                except Exception:
+                    ok = False
+                if ok:
+                    seen[source_name] = remote_commit
+                    updates += 1
+                else:
+                    failed = True
+                    echo(t("watch_update_failed", time.strftime("%H:%M:%S"), watch_delay(interval, failures + 1)))
+            failures = failures + 1 if failed else 0
+    except KeyboardInterrupt:
+        echo(t("watch_stopped"))
+    return updates
+
+# --- Bundles ---
+# A bundle is a compressed tar archive holding bundle.json (always the first
+# member) followed by the files of each skill under skills/<name>/, skill by
+# skill, so it can be installed from a stream without git or a full extraction
+BUNDLE_VERSION = 1
+BUNDLE_MANIFEST = "bundle.json"
+BUNDLE_PREFIX = "skills/"
+BUNDLE_FORMATS = {".tar.gz": "gz", ".tgz": "gz", ".tar.xz": "xz", ".tar.bz2": "bz2", ".tar": ""}
+ZSTD_SUFFIXES = (".tar.zst", ".tzst")
+if "zst" in tarfile.TarFile.OPEN_METH:  # Python 3.14+
+    BUNDLE_FORMATS.update(dict.fromkeys(ZSTD_SUFFIXES, "zst"))
+
+def bundle_compression(bundle_path):
+    """Return the tarfile compression for a bundle file name (gzip unless the suffix says otherwise)."""
+    name = str(bundle_path).lower()
+    for suffix, compression in BUNDLE_FORMATS.items():
+        if name.endswith(suffix):
+            return compression
+    return "gz"
+
+def unsupported_bundle_format(bundle_path):
+    """Return True (after printing why) if the bundle's suffix asks for a compression this Python lacks."""
+    if str(bundle_path).lower().endswith(ZSTD_SUFFIXES) and "zst" not in BUNDLE_FORMATS.values():
+        echo(t("err_bundle_zstd", bundle_path, platform.python_version()))
+        return True
+    return False
+
+def is_valid_skill_name(skill_name):
+    """Whether a skill name from a bundle can safely name a folder of a target (no path, nothing hidden)."""
+    return (isinstance(skill_name, str) and bool(skill_name) and not skill_name.startswith(".")
+            and not any(separator in skill_name for separator in ("/", "\\", os.sep)))
+
+def normalize_bundle_member(member):
+    """Drop ownership details and reduce modes to 644/755, as git stores them."""
+    member.uid = member.gid = 0
+    member.uname = member.gname = ""
+    member.mode = 0o755 if member.mode & 0o111 else 0o644
+    return member
+
+def export_bundle(bundle_path, specific_skills=None):
+    """
+    Write skills and a manifest into a single compressed archive.
+
+    Each source is fetched once and the selected skills are read from a sparse
+    checkout of its current ref. The manifest records every source commit and,
+    per skill, its tree SHA and file hashes, so imports can verify the content
+    and later upgrades from git know what is installed.
+
+    Args:
+        bundle_path (Path): Archive to write; the suffix selects the compression
+            (.tar.gz/.tgz, .tar.xz, .tar.bz2, .tar.zst/.tzst on Python 3.14+, or .tar).
+        specific_skills (list): Skill names to export (default: all configured skills).
+
+    Returns:
+        bool: True if the bundle was written.
+    """
+    bundle_path = Path(bundle_path).expanduser()
+    if unsupported_bundle_format(bundle_path):
+        return False
+    mapping, owners = context().skills_mapping, context().skill_sources
+    skills_by_source = {}  # source name -> [(skill name, repository path)]
+    for skill_name in (specific_skills if specific_skills else mapping.keys()):
+        if skill_name not in mapping:
+            echo(t("warn_skill_not_found", skill_name))
+            continue
+        skills_by_source.setdefault(owners[skill_name], []).append((skill_name, mapping[skill_name]))
+
+    echo(t("fetching_repo"))
+
+    def fetch(source_name):
+        echo(f"Repository: {context().sources[source_name]['url']}")
+        try:
+            return sync_mirror(context().sources[source_name]["url"])
+        except Exception:
+            echo(t("failed_clone"))
+            return None
+
+    source_names = list(skills_by_source)
+    mirrors = dict(zip(source_names, run_in_parallel(fetch, source_names)))
+    if any(mirror_path is None for mirror_path in mirrors.values()):
+        return False
+
+    manifest = {"version": BUNDLE_VERSION, "sources": {}, "skills": {}}
+    members = []  # (archive name, file path)
+    compression = bundle_compression(bundle_path)
+    temp_path = bundle_path.with_name(f".{bundle_path.name}.tmp-{os.getpid()}")
+    try:
+        with ExitStack() as checkouts, trace_span("export"):
+            for source_name, skills in skills_by_source.items():
+                source = context().sources[source_name]
+                commit = get_mirror_head(mirrors[source_name], source["ref"])
+                trees = resolve_trees(mirrors[source_name], commit, [path for _, path in skills])
+                for skill_name, repo_path in skills:
+                    if trees.get(repo_path) is None:
+                        echo(t("err_source_not_found", skill_name, repo_path))
+                skills = [(name, path) for name, path in skills if trees.get(path)]
+                if not skills:
+                    continue
+                checkout_path = checkouts.enter_context(
+                    checkout_repository(mirrors[source_name], sparse_paths=[path for _, path in skills], rev=commit))
+                manifest["sources"][source_name] = {"url": source["url"], "ref": source["ref"], "commit": commit}
+                for skill_name, repo_path in skills:
+                    files = {}
+                    for rel_path, file_path in sorted(list_source_files(checkout_path / repo_path, checkout_path).items()):
+                        files[rel_path] = {"size": file_path.stat().st_size, "sha256": hash_file(file_path)}
+                        members.append((f"{BUNDLE_PREFIX}{skill_name}/{rel_path}", file_path))
+                    manifest["skills"][skill_name] = {"source": source_name, "path": repo_path, "tree": trees[repo_path],
+                                                      "content_hash": content_hash({"files": files}), "files": files}
+
+            data = json.dumps(manifest, indent=4, sort_keys=True).encode("utf-8")
+            info = tarfile.TarInfo(BUNDLE_MANIFEST)
+            info.size, info.mtime, info.mode = len(data), int(time.time()), 0o644
+            with tarfile.open(temp_path, f"w:{compression}" if compression else "w", dereference=True) as tar:
+                tar.addfile(info, io.BytesIO(data))
+                for arcname, file_path in members:
+                    tar.add(file_path, arcname=arcname, filter=normalize_bundle_member)
+        os.replace(temp_path, bundle_path)
+    except (OSError, tarfile.TarError, ValueError) as e:
+        temp_path.unlink(missing_ok=True)
+        echo(t("err_bundle_write", bundle_path, e))
+        return False
+    echo(t("bundle_written", bundle_path, len(manifest["skills"]), len(members),
+           format_bytes(bundle_path.stat().st_size)))
+    return bool(manifest["skills"])
+
+def import_bundle(bundle_path, target_dirs):
+    """
+    Install the skills of a bundle into one or more targets straight from the archive stream.
+
+    The archive is read once, front to back ("-" reads standard input), and is
+    never held in memory or extracted elsewhere first. Each file is written
+    into the first target's staging directory for its skill while being
+    hashed, and hardlinked into the staging directories of the other targets;
+    when a skill's last file has arrived and every hash matches the manifest,
+    the staged skill is swapped in by rename in every target. Skills whose
+    installed content already matches are skipped. All targets stay locked
+    during the import.
+
+    Returns:
+        bool: False if the bundle could not be read or a skill failed.
+    """
+    if unsupported_bundle_format(bundle_path):
+        return False
+    targets = [target_dir for target_dir in target_dirs if ensure_target_dir(target_dir)]
+    if not targets:
+        return False
+
+    ok = True
+    dependency_plan = new_dependency_plan()
+    manifests = {}
+    current = None  # Skill being received: name, expected entry, commit, staging dirs, received hashes, error
+    done = set()
+
+    def begin(skill_name, bundle):
+        expected = bundle["skills"][skill_name]
+        state = {"name": skill_name, "expected": expected, "start": time.perf_counter(),
+                 "commit": bundle["sources"].get(expected["source"], {}).get("commit"),
+                 "staging": {}, "received": {}, "error": None}
+        for target_dir in targets:
+            installed = manifests[target_dir].get(skill_name)
+            if installed and (target_dir / skill_name).is_dir() and content_hash(installed) == expected["content_hash"]:
+                emit_progress("skill", target=str(target_dir), skill=skill_name, status="skipped", seconds=0.0)
+                continue
+            staging_path = target_dir / f".{skill_name}.staging-{os.getpid()}"
+            shutil.rmtree(staging_path, ignore_errors=True)
+            staging_path.mkdir()
+            state["staging"][target_dir] = staging_path
+        if state["staging"]:
+            existed = any((target_dir / skill_name).exists() for target_dir in state["staging"])
+            echo(f"{t('updating') if existed else t('installing')} {skill_name}...")
+        else:
+            echo(t("up_to_date", skill_name))
+        return state
+
+    def receive(state, rel_path, member, tar):
+        staging = list(state["staging"].values())
+        dest_file = staging[0] / rel_path
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with tar.extractfile(member) as src, open(dest_file, "wb") as dest:
+            while chunk := src.read(1024 * 1024):
+                digest.update(chunk)
+                dest.write(chunk)
+        if member.mode & 0o111:
+            os.chmod(dest_file, 0o755)
+        trace_count(files=1, bytes=member.size)
+        for staging_path in staging[1:]:
+            (staging_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            place_file(dest_file, staging_path / rel_path, link=True)
+        state["received"][rel_path] = digest.hexdigest()
+
+    def finish(state):
+        nonlocal ok
+        skill_name, expected = state["name"], state["expected"]
+        done.add(skill_name)
+        if not state["staging"]:
+            return
+        if state["error"] is None and (
+                state["received"] != {rel: info["sha256"] for rel, info in expected["files"].items()}
+                or content_hash(expected) != expected["content_hash"]):
+            state["error"] = t("bundle_mismatch")
+        seconds = round(time.perf_counter() - state["start"], 6)
+        if state["error"] is not None:
+            for staging_path in state["staging"].values():
+                shutil.rmtree(staging_path, ignore_errors=True)
+            echo(t("failed_copy", skill_name, state["error"]))
+            for target_dir in state["staging"]:
+                emit_progress("skill", target=str(target_dir), skill=skill_name, status="failed", seconds=seconds)
+            ok = False
+            return
+        for target_dir, staging_path in state["staging"].items():
+            dest_path = target_dir / skill_name
+            existed = dest_path.exists()
+            swap_directory(staging_path, dest_path)
+            files = {}
+            for rel_path, sha256 in state["received"].items():
+                st = (dest_path / rel_path).stat()
+                files[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": sha256,
+                                   "mode": git_file_mode(st)}
+            manifests[target_dir][skill_name] = {"files": files, "source": expected["path"], "tree": expected["tree"],
+                                                 "commit": state["commit"]}
+            emit_progress("skill", target=str(target_dir), skill=skill_name, status="updated" if existed else "installed",
+                          seconds=seconds, added=len(files))
+        echo(t("processed_success", skill_name))
+        first_target = next(iter(state["staging"]))
+        collect_dependencies(skill_name, first_target / skill_name, dependency_plan, expected["path"])
+
+    try:
+        stream = sys.stdin.buffer if str(bundle_path) == "-" else open(Path(bundle_path).expanduser(), "rb")
+        with ExitStack() as stack, trace_span("import"):
+            if stream is not sys.stdin.buffer:
+                stack.enter_context(stream)
+            for target_dir in targets:
+                stack.enter_context(file_lock(target_dir / LOCK_FILE))
+                remove_stale_staging(target_dir)
+                manifests[target_dir] = load_manifest(target_dir)
+            # Stream mode ("r|*") reads members strictly in order and never seeks
+            tar = stack.enter_context(tarfile.open(fileobj=stream, mode="r|*"))
+            first = tar.next()
+            bundle = json.load(tar.extractfile(first)) if first is not None and first.name == BUNDLE_MANIFEST else {}
+            if bundle.get("version") != BUNDLE_VERSION:
+                echo(t("err_bundle_invalid", bundle_path, BUNDLE_MANIFEST, BUNDLE_VERSION))
+                return False
+            # Skill names become folders of the targets, a crafted manifest must not reach outside them
+            invalid_names = [name for name in bundle["skills"] if not is_valid_skill_name(name)]
+            if invalid_names:
+                echo(t("err_bundle_skill_name", bundle_path, ", ".join(repr(name) for name in invalid_names)))
+                return False
+            commits = ", ".join(f"{name}@{source['commit'][:12]}" for name, source in sorted(bundle["sources"].items()))
+            echo(t("bundle_importing", bundle_path, len(bundle["skills"]), commits))
+
+            try:
+                for member in tar:
+                    if member is first or member.isdir():
+                        continue
+                    skill_name, _, rel_path = member.name[len(BUNDLE_PREFIX):].partition("/")
+                    parts = rel_path.split("/")
+                    if (not member.name.startswith(BUNDLE_PREFIX) or not member.isfile() or skill_name in done
+                            or not is_valid_skill_name(skill_name) or skill_name not in bundle["skills"]
+                            or "" in parts or ".." in parts or "." in parts):
+                        echo(t("err_bundle_member", member.name))
+                        ok = False
+                        if current is not None and current["name"] == skill_name:
+                            current["error"] = t("bundle_bad_member", member.name)
+                        continue
+                    if current is None or current["name"] != skill_name:
+                        if current is not None:
+                            finish(current)
+                        current = begin(skill_name, bundle)
+                    if current["staging"] and current["error"] is None:
+                        try:
+                            receive(current, rel_path, member, tar)
+                        except OSError as e:
+                            current["error"] = e
+                if current is not None:
+                    finish(current)
+                    current = None
+            finally:
+                if current is not None:
+                    for staging_path in current["staging"].values():
+                        shutil.rmtree(staging_path, ignore_errors=True)
+                for target_dir in targets:
+                    save_manifest(target_dir, manifests[target_dir])
+
+            for skill_name in sorted(bundle["skills"].keys() - done):
+                echo(t("err_bundle_missing", skill_name))
+                ok = False
+    except TimeoutError as e:
+        echo(e)
+        return False
+    except (OSError, tarfile.TarError, ValueError, KeyError) as e:
+        echo(t("err_bundle_read", bundle_path, e))
+        return False
+
+    if not install_dependencies(dependency_plan, target_dirs):
+        ok = False
+    return ok
+
+def install_from_lockfile(target_dirs, verify_only=False):
+    """
+    Reproduce, or only verify, the install recorded in skills.lock.
+
+    Targets that already match the lock are confirmed from the manifest
+    without fetching anything.
+
+    Returns:
+        int: Exit status: 0 when the targets match the lock (installing first unless
+            verify_only), 1 on mismatch or failure, 2 without a usable lockfile.
+    """
+    lock = load_lockfile()
+    if lock is None:
+        echo(t("err_no_lock"))
+        return 2
+    # Fast path: a target that already matches the lock needs no fetch at all
+    if verify_targets(target_dirs, lock):
+        echo(t("lock_verified", describe_lock(lock)))
+        return 0
+    if verify_only:
+        echo(t("lock_mismatch"))
+        return 1
+    echo(t("frozen_install", describe_lock(lock)))
+    return 0 if update_or_install_skills(target_dirs, auto_update=True, frozen_lock=lock) else 1
+
+def is_stale_anywhere(target_dirs, skill_name, source_tree):
+    """Return True if any target holds skill_name at a tree other than source_tree."""
+    for target_dir in target_dirs:
+        if (target_dir / skill_name).is_dir():
+            if source_tree is None or load_manifest(target_dir).get(skill_name, {}).get("tree") != source_tree:
+                return True
+    return False
+
+def check_for_updates(target_dirs, installed_skills):
+    """
+    Report which installed skills have upstream changes, without downloading files.
+
+    The remote ref of each source is looked up with git ls-remote (all sources
+    concurrently); when every skill of a source was installed from that commit
+    nothing else is needed. Otherwise its mirror is fetched (commits and trees
+    only for partial strategies) and each skill's recorded tree SHA is
+    compared with the current one.
+
+    Returns:
+        int: Exit status: 0 when everything is current, 1 when updates are available, 2 on error.
+    """
+    sources, mapping, owners = context().sources, context().skills_mapping, context().skill_sources
+    installed = []  # (target_dir, skill name, manifest entry)
+    for target_dir in target_dirs:
+        manifest = load_manifest(target_dir)
+        for skill_name in installed_skills:
+            if (target_dir / skill_name).is_dir():
+                installed.append((target_dir, skill_name, manifest.get(skill_name, {})))
+
+    def check_source(source_name):
+        """Return (remote commit, {repository path: tree SHA}) for one source, or None on error."""
+        source = sources[source_name]
+        entries = [(name, entry) for _, name, entry in installed if owners[name] == source_name]
+        remote_commit = None if context().fetch_settings["offline"] else get_remote_head(source["url"], source["ref"])
+        if remote_commit and all(entry.get("commit") == remote_commit and entry.get("source") == mapping[name]
+                                 for name, entry in entries):
+            return remote_commit, {mapping[name]: entry.get("tree") for name, entry in entries}
+        try:
+            # The cached mirror may be younger than the TTL but behind the remote
+            mirror_path = sync_mirror(source["url"], refresh=bool(remote_commit))
+        except Exception:
+            mirror_path = None
+        if mirror_path is None:
+            echo(t("err_check_remote", source["url"]))
+            return None
+        remote_commit = get_mirror_head(mirror_path, source["ref"])
+        return remote_commit, resolve_trees(mirror_path, remote_commit, {mapping[name] for name, _ in entries})
+
+    source_names = [name for name in sources if any(owners[skill] == name for _, skill, _ in installed)]
+    remote_state = dict(zip(source_names, run_in_parallel(check_source, source_names)))
+    if any(state is None for state in remote_state.values()):
+        return 2
+
+    stale = 0
+    current_target = None
+    for target_dir, skill_name, entry in installed:
+        if target_dir != current_target:
+            echo(t("target_header", target_dir))
+            current_target = target_dir
+        remote_tree = remote_state[owners[skill_name]][1].get(mapping[skill_name])
+        if remote_tree is None:
+            echo(t("update_gone", skill_name, mapping[skill_name]))
+            stale += 1
+        elif entry.get("tree") != remote_tree:
+            echo(t("update_available", skill_name, (entry.get("tree") or "?")[:12], remote_tree[:12]))
+            stale += 1
+        else:
+            echo(t("update_current", skill_name, remote_tree[:12]))
+
+    commits = ", ".join(commit[:12] for commit, _ in remote_state.values())
+    echo(t("updates_summary", stale, len(installed), commits))
+    return 1 if stale else 0
+
+def show_interactive_help():
+    echo(t("interactive_help"))
+
+PAGE_SIZE = 20  # Entries per page of interactive lists
+
+def print_page(lines, page):
+    """Print one page of lines (with a page indicator for long lists) and return the page shown."""
+    pages = max(1, (len(lines) + PAGE_SIZE - 1) // PAGE_SIZE)
+    page = min(max(page, 0), pages - 1)
+    for line in lines[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
+        echo(line)
+    if pages > 1:
+        echo(t("page_info", page + 1, pages))
+    return page
+
+def turn_page(selection, page):
+    """Return the new page for an 'n' / 'p' selection, or None for any other input."""
+    if selection.lower() == 'n':
+        return page + 1
+    if selection.lower() == 'p':
+        return page - 1
+    return None
+
+def select_skills(skills_mapping):
+    """Interactive skill selection."""
+    skills_list = list(skills_mapping.keys())
+    # Names and categories of the configured skills, searchable with '/text'
+    entries = [{"name": name, "category": path.split("/")[1] if path.count("/") >= 3 else "", "description": ""}
+               for name, path in skills_mapping.items()]
+    index = None
+    shown = list(range(len(skills_list)))  # Indices of the listed skills (all, or those matching the filter)
+    page = 0
+    while True:
+        echo(t("avail_skills"))
+        page = print_page([f"{idx + 1}. {skills_list[idx]}" for idx in shown], page)
+        echo(t("install_all"))
+        echo(t("help_opt"))
+        echo(t("quit_opt"))
+        
+        selection = input(t("enter_selection")).strip()
+        
+        if selection.upper() == 'Q':
+            sys.exit(0)
+
+        if selection.upper() == 'H':
+            show_interactive_help()
+            continue
+
+        if turn_page(selection, page) is not None:
+            page = turn_page(selection, page)
+            continue
+
+        if selection.startswith("/"):
+            query = selection[1:].strip()
+            if query:
+                index = index or build_search_index(entries)
+                positions = {id(entry): i for i, entry in enumerate(entries)}
+                shown = [positions[id(entry)] for entry in search_catalog(entries, index, query)]
+                if not shown:
+                    echo(t("search_none", query))
+                    shown = list(range(len(skills_list)))
+            else:
+                shown = list(range(len(skills_list)))
+            page = 0
+            continue
+            
+        if not selection or selection.upper() == 'A':
+            return None  # None implies all in the current logic
+        
+        selected_keys = []
+        try:
+            parts = selection.split()
+            valid = True
+            for part in parts:
+                try:
+                    idx = int(part) - 1
+                    if 0 <= idx < len(skills_list):
+                        key = skills_list[idx]
+                        if key not in selected_keys:
+                            selected_keys.append(key)
+                    else:
+                        echo(t("warn_out_of_range", part))
+                except ValueError:
+                    echo(t("warn_not_number", part))
+            
+            if selected_keys:
+                echo(t("selected", ', '.join(selected_keys)))
+                return selected_keys
+            else:
+                echo(t("no_valid_selection"))
+        except ValueError:
+            echo(t("invalid_input"))
+
+def list_tree(mirror_path, rev, prefix):
+    """
+    Return (mode, type, oid, path) for every entry below prefix at rev.
+
+    Only tree objects are read, so this works on a blobless mirror without
+    downloading any file contents.
+    """
+    output = run_command(f'git ls-tree -r -t -z {rev} -- "{prefix}"', cwd=mirror_path, capture_output=True).stdout
+    entries = []
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        mode, obj_type, oid = meta.split()
+        entries.append((mode, obj_type, oid, path))
+    return entries
+
+def discover_skills(mirror_path, rev="HEAD"):
+    """Find the plugins/*/skills/* folders of the repository from its tree objects."""
+    skills = {}
+    entries = list_tree(mirror_path, rev, "plugins")
+    for _, obj_type, oid, path in entries:
+        parts = path.split("/")
+        if obj_type == "tree" and len(parts) == 4 and parts[2] == "skills":
+            skills[path] = {
+                "name": parts[3],
+                "path": path,
+                "category": parts[1],
+                "tree": oid,
+                "blobs": {},
+            }
+    for _, obj_type, oid, path in entries:
+        parts = path.split("/")
+        if obj_type == "blob" and len(parts) > 4:
+            skill = skills.get("/".join(parts[:4]))
+            if skill is not None:
+                skill["blobs"]["/".join(parts[4:])] = oid
+    return list(skills.values())
+
+def find_missing_objects(mirror_path, rev):
+    """
+    Return the oids of objects in rev's tree that are not present locally.
+
+    The objects are reached by walking from the commit, which unlike naming
+    them directly never triggers a lazy fetch in a partial clone.
+    """
+    result = run_command(f"git rev-list --objects --no-walk --missing=print {rev}", cwd=mirror_path,
+                         check=False, capture_output=True)
+    return {line[1:].split()[0] for line in result.stdout.splitlines() if line.startswith("?")}
+
+def find_uncached_trees(mirror_path, trees):
+    """Return the trees whose objects are not all present in a (partial) mirror, without fetching any."""
+    uncached = set()
+    for tree in trees:
+        result = run_command(f"git rev-list --objects --missing=print {tree}", cwd=mirror_path,
+                             check=False, capture_output=True)
+        if result.returncode != 0 or any(line.startswith("?") for line in result.stdout.splitlines()):
+            uncached.add(tree)
+    return uncached
+
+def fetch_missing_objects(mirror_path, oids):
+    """Download specific objects into a partial mirror with a single request."""
+    if not oids or context().fetch_settings["offline"]:
+        return
+    # Same request git issues for its own lazy fetches, but batched
+    run_command("git -c fetch.negotiationAlgorithm=noop fetch origin --no-tags --no-write-fetch-head "
+                "--recurse-submodules=no --filter=blob:none --stdin", cwd=mirror_path,
+                check=False, capture_output=True, input_text="\n".join(oids) + "\n")
+
+def read_blobs(mirror_path, oids):
+    """Return {oid: bytes} for locally available blobs using one git cat-file process."""
+    if not oids:
+        return {}
+    with trace_span("git cat-file", "subprocess"):
+        result = subprocess.run(["git", "cat-file", "--batch"], cwd=mirror_path, capture_output=True,
+                                input=("\n".join(oids) + "\n").encode("utf-8"), env=subprocess_env())
+    blobs = {}
+    data = result.stdout
+    pos = 0
+    while pos < len(data):
+        header_end = data.index(b"\n", pos)
+        header = data[pos:header_end].decode("utf-8").split()
+        pos = header_end + 1
+        if len(header) < 3 or header[1] == "missing":
+            continue
+        size = int(header[2])
+        blobs[header[0]] = data[pos:pos + size]
+        pos += size + 1
+    return blobs
+
+def read_blob_sizes(mirror_path, oids):
+    """Return {oid: size} for locally available objects."""
+    if not oids:
+        return {}
+    result = run_command('git cat-file --batch-check="%(objectname) %(objectsize)"', cwd=mirror_path,
+                         check=False, capture_output=True, input_text="\n".join(oids) + "\n")
+    sizes = {}
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1].isdigit():
+            sizes[parts[0]] = int(parts[1])
+    return sizes
+
+def resolve_trees(mirror_path, rev, paths):
+    """
+    Return {path: tree SHA} for repository paths at rev (None where a path does not exist).
+
+    Uses a single git cat-file process and reads tree objects only.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+    result = run_command("git cat-file --batch-check", cwd=mirror_path, check=False, capture_output=True,
+                         input_text="".join(f"{rev}:{path}\n" for path in paths))
+    trees = {}
+    for path, line in zip(paths, result.stdout.splitlines()):
+        parts = line.split()
+        trees[path] = parts[0] if len(parts) == 3 and parts[1] == "tree" else None
+    return trees
+
+def get_remote_head(repo_url, ref="HEAD"):
+    """Return the commit SHA of a remote ref (HEAD or a branch) with a ref-only lookup, or None."""
+    if re.fullmatch(r"[0-9a-f]{40}", ref):
+        return ref
+    remote_ref = ref if ref == "HEAD" or ref.startswith("refs/") else f"refs/heads/{ref}"
+    result = run_command(f'git ls-remote "{repo_url}" {remote_ref}', check=False, capture_output=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+# --- Skill Catalog ---
+CATALOG_VERSION = 2
+METADATA_FILES = ("SKILL.md", "requirements.txt")
+
+def read_frontmatter(text):
+    """Parse the simple 'key: value' YAML frontmatter at the top of a SKILL.md."""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}
+    fields = {}
+    key = None
+    for line in lines[1:]:
+        if line.strip() == "---":
+            break
+        if key and line[:1].isspace():
+            # Continuation of a folded/multi-line value
+            fields[key] = (fields[key] + " " + line.strip()).strip()
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = name.strip()
+        value = value.strip()
+        if value in (">", "|", ">-", "|-"):
+            value = ""
+        fields[key] = value.strip("'\"")
+    return fields
+
+def parse_requirements(text):
+    """Return the requirement lines of a requirements.txt, without comments."""
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+def build_catalog(mirror_path, commit):
+    """
+    Describe every skill at commit straight from the object store.
+
+    Structure and file counts come from tree objects. The only blobs read are
+    each skill's SKILL.md and requirements.txt, fetched in one batched request
+    when the mirror is a partial clone; sizes are reported when all of a skill's
+    blobs are already local and left as None otherwise.
+    """
+    skills = discover_skills(mirror_path, commit)
+    all_oids = sorted({oid for skill in skills for oid in skill["blobs"].values()})
+    missing = find_missing_objects(mirror_path, commit)
+
+    metadata_oids = sorted({skill["blobs"][name] for skill in skills for name in METADATA_FILES if name in skill["blobs"]})
+    fetch_missing_objects(mirror_path, [oid for oid in metadata_oids if oid in missing])
+    contents = read_blobs(mirror_path, metadata_oids)
+    sizes = read_blob_sizes(mirror_path, [oid for oid in all_oids if oid not in missing])
+
+    catalog = []
+    for skill in skills:
+        blobs = skill.pop("blobs")
+        skill_md = contents.get(blobs.get("SKILL.md"), b"").decode("utf-8", errors="replace")
+        requirements = contents.get(blobs.get("requirements.txt"), b"").decode("utf-8", errors="replace")
+        catalog.append({
+            **skill,
+            "description": read_frontmatter(skill_md).get("description", ""),
+            "files": len(blobs),
+            "size": sum(sizes[oid] for oid in blobs.values()) if all(oid in sizes for oid in blobs.values()) else None,
+            "requirements": parse_requirements(requirements),
+        })
+    catalog.sort(key=lambda s: (s["category"], s["name"]))
+    return catalog
+
+def has_commit(mirror_path, commit):
+    """Return True if the mirror contains the given commit."""
+    result = run_command(f"git cat-file -e {commit}^{{commit}}", cwd=mirror_path, check=False, capture_output=True)
+    return result.returncode == 0
+
+def refresh_for_commit(repo_url, commit):
+    """
+    Fetch a mirror again, ignoring its TTL, and return True if it then contains commit.
+
+    A mirror fetched within the TTL can predate a commit recorded elsewhere (e.g. in skills.lock).
+    """
+    try:
+        mirror_path = sync_mirror(repo_url, refresh=True)
+    except Exception:
+        return False
+    return mirror_path is not None and has_commit(mirror_path, commit)
+
+def get_mirror_head(mirror_path, ref="HEAD"):
+    """Return the commit SHA a ref (HEAD, a branch or a commit) points to in the mirror."""
+    return run_command(f'git rev-parse --verify "{ref}^{{commit}}"', cwd=mirror_path, capture_output=True).stdout.strip()
+
+def load_catalog(mirror_path):
+    """
+    Return the skill catalog for the mirror's current HEAD.
+
+    The catalog is built once per upstream commit from the mirror's tree
+    objects (no checkout) and stored next to it as catalog-<sha>.json; later
+    runs reuse it until the fetched HEAD moves.
+
+    Returns:
+        tuple: (commit SHA, list of skill dictionaries)
+    """
+    commit = get_mirror_head(mirror_path)
+    catalog_path = mirror_path.parent / f"catalog-{commit}.json"
+    try:
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        if catalog.get("version") == CATALOG_VERSION:
+            echo(t("catalog_cached", commit[:12]))
+            return commit, catalog["skills"]
+    except (OSError, ValueError):
+        pass
+
+    echo(t("catalog_building", commit[:12]))
+    with file_lock(mirror_path.parent / LOCK_FILE):
+        with trace_span("catalog"):
+            skills = build_catalog(mirror_path, commit)
+        # Catalogs of older commits are never needed again
+        for old_catalog in mirror_path.parent.glob("catalog-*.json"):
+            if old_catalog != catalog_path:
+                old_catalog.unlink()
+        write_json_atomic(catalog_path, {"version": CATALOG_VERSION, "commit": commit, "skills": skills})
+    return commit, skills
+
+def fetch_catalog():
+    """Update the mirror and return (mirror path, commit, skills), or None on failure."""
+    try:
+        mirror_path = sync_mirror(context().skills_repo)
+    except Exception:
+        echo(t("failed_clone"))
+        return None
+    if mirror_path is None:
+        return None
+    commit, skills = load_catalog(mirror_path)
+    return mirror_path, commit, skills
+
+# --- Catalog Search ---
+SEARCH_INDEX_VERSION = 1
+SEARCH_FIELDS = (("name", 3), ("category", 2), ("description", 1))  # Field and its weight in the ranking
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+FUZZY_THRESHOLD = 0.5  # Minimum trigram similarity for a fuzzy token match
+DEFAULT_SEARCH_LIMIT = 20
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def trigrams(token):
+    """Return the trigrams of a token padded with boundary markers ("dbt" -> ^db, dbt, bt$)."""
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_search_index(skills):
+    """
+    Build the search index of a catalog.
+
+    Every token of a skill's name, category and description is posted with
+    the weight of the best field it appears in. The sorted vocabulary serves
+    prefix lookups by bisection, and a trigram table over the vocabulary
+    serves fuzzy matches, so a query never scans the skills themselves.
+
+    Returns:
+        dict: {"vocabulary": [token], "postings": [[[skill index, weight]] per token],
+            "trigrams": {trigram: [vocabulary index]}}
+    """
+    postings = {}  # token -> {skill index: weight}
+    for skill_index, skill in enumerate(skills):
+        for field, weight in SEARCH_FIELDS:
+            for token in tokenize(skill.get(field) or ""):
+                token_postings = postings.setdefault(token, {})
+                token_postings[skill_index] = max(token_postings.get(skill_index, 0), weight)
+    vocabulary = sorted(postings)
+    grams = {}
+    for token_index, token in enumerate(vocabulary):
+        for gram in trigrams(token):
+            grams.setdefault(gram, []).append(token_index)
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "vocabulary": vocabulary,
+        "postings": [sorted(postings[token].items()) for token in vocabulary],
+        "trigrams": grams,
+    }
+
+def load_search_index(mirror_path, commit, skills):
+    """Return the search index of the catalog at commit, built once and stored as search-<sha>.json."""
+    index_path = mirror_path.parent / f"search-{commit}.json"
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == SEARCH_INDEX_VERSION and index.get("skills") == len(skills):
+            return index
+    except (OSError, ValueError):
+        pass
+
+    echo(t("search_index_building", commit[:12]))
+    with trace_span("search index"):
+        index = build_search_index(skills)
+    index["skills"] = len(skills)
+    try:
+        for old_index in mirror_path.parent.glob("search-*.json"):
+            if old_index != index_path:
+                old_index.unlink()
+        write_json_atomic(index_path, index)
+    except OSError:
+        pass  # The stored index is an optimisation only
+    return index
+
+def search_catalog(skills, index, query, limit=None):
+    """
+    Rank the skills matching every word of query.
+
+    Each query word matches vocabulary tokens exactly, by prefix or (from three
+    characters on) by trigram similarity, scoring less in that order; a skill
+    scores the weight of the best field matched, summed over the words. An
+    exact name match ranks first, ties are broken by name.
+
+    Returns:
+        list: Matching skill dictionaries, best first (at most limit if given).
+    """
+    vocabulary = index["vocabulary"]
+    scores = None  # skill index -> score so far
+    for term in tokenize(query):
+        matches = {}  # vocabulary index -> similarity
+        for token_index in range(bisect.bisect_left(vocabulary, term), len(vocabulary)):
+            if not vocabulary[token_index].startswith(term):
+                break
+            matches[token_index] = 1.0 if vocabulary[token_index] == term else 0.8
+        if len(term) >= 3:
+            term_grams = trigrams(term)
+            shared = Counter(token_index for gram in term_grams for token_index in index["trigrams"].get(gram, ()))
+            for token_index, count in shared.items():
+                # Dice coefficient; a token of n characters has n padded trigrams
+                similarity = 2 * count / (len(term_grams) + len(vocabulary[token_index]))
+                if similarity >= FUZZY_THRESHOLD:
+                    matches[token_index] = max(matches.get(token_index, 0), 0.6 * similarity)
+
+        term_scores = {}
+        for token_index, similarity in matches.items():
+            for skill_index, weight in index["postings"][token_index]:
+                term_scores[skill_index] = max(term_scores.get(skill_index, 0), similarity * weight)
+        scores = term_scores if scores is None else {i: scores[i] + score for i, score in term_scores.items() if i in scores}
+        if not scores:
+            return []
+    if scores is None:
+        return []
+
+    name = query.strip().lower()
+    ranked = sorted(scores, key=lambda i: (skills[i]["name"].lower() != name, -scores[i], skills[i]["name"]))
+    return [skills[i] for i in (ranked[:limit] if limit else ranked)]
+
+def match_skill_names(skills, query):
+    """
+    Return the skills whose name is the whole query or starts with it, exact match first.
+
+    Names and query are compared normalized ("SQL Patterns" -> "sql-patterns"),
+    and descriptions and categories are ignored.
+    """
+    name = "-".join(tokenize(query))
+    if not name:
+        return []
+    matches = [skill for skill in skills if "-".join(tokenize(skill["name"])).startswith(name)]
+    return sorted(matches, key=lambda skill: ("-".join(tokenize(skill["name"])) != name, skill["name"]))
+
+def format_skill_line(skill, number=None):
+    """One line describing a catalog skill: number, installed mark, name, category and description."""
+    prefix = f"{number}. " if number is not None else "  "
+    installed_mark = "* " if skill['name'] in context().skills_mapping else "  "
+    description = skill.get('description', '')
+    if len(description) > 60:
+        description = description[:57] + "..."
+    return f"{prefix}{installed_mark}{skill['name']:<40} [{skill['category']}] {description}"
+
+def search_remote_skills(query, limit=DEFAULT_SEARCH_LIMIT, as_json=False, names_only=False):
+    """
+    Print the catalog skills matching query, best first.
+
+    With names_only, only skills named query or by a name starting with it
+    match (see match_skill_names) instead of the ranked word search.
+
+    Returns:
+        tuple: (mirror path, commit, matching skills), or None if the catalog could not be fetched.
+    """
+    with redirect_output(sys.stderr) if as_json else nullcontext():
+        fetched = fetch_catalog()
+        if fetched is None:
+            return None
+        mirror_path, commit, skills = fetched
+        if names_only:
+            matches = match_skill_names(skills, query)
+        else:
+            matches = search_catalog(skills, load_search_index(mirror_path, commit, skills), query)
+    shown = matches[:limit] if limit else matches
+    if as_json:
+        echo(json.dumps({"commit": commit, "query": query, "total": len(matches), "skills": shown},
+                        indent=4, ensure_ascii=False))
+        return mirror_path, commit, shown
+    if not matches:
+        echo(t("search_none", query))
+        return mirror_path, commit, shown
+    echo(t("search_results", query))
+    for skill in shown:
+        echo(format_skill_line(skill))
+    echo(t("search_count", len(matches), len(shown), commit[:12]))
+    return mirror_path, commit, shown
+
+def install_matching_skills(query, target_dirs, limit=DEFAULT_SEARCH_LIMIT, assume_yes=False):
+    """
+    Install the catalog skills matching query (the first limit of them) into the targets.
+
+    Only skill names count, matched as a whole or by prefix: a word match is
+    fine for browsing but would install unrelated skills (e.g. "helm" is
+    similar to "help", and a description may mention any word of the query).
+
+    Returns:
+        bool: False if the catalog could not be fetched or an install step failed.
+    """
+    found = search_remote_skills(query, limit, names_only=True)
+    if found is None:
+        return False
+    mirror_path, commit, matches = found
+    if not matches:
+        return True
+    if not assume_yes and input(t("confirm_install_matching", len(matches))).strip().lower() not in ("y", "yes"):
+        echo(t("no_skills_sel"))
+        return True
+    installed = install_catalog_skills(mirror_path, commit, matches, target_dirs)
+    return len(installed) == len(matches)
+
+def list_remote_skills(as_json=False):
+    """Print the remote skill catalog without any interaction."""
+    if as_json:
+        # Keep stdout clean for the JSON document
+        with redirect_output(sys.stderr):
+            fetched = fetch_catalog()
+    else:
+        fetched = fetch_catalog()
+    if fetched is None:
+        return
+    _, commit, skills = fetched
+    if as_json:
+        echo(json.dumps({"commit": commit, "skills": skills}, indent=4, ensure_ascii=False))
+        return
+    categories = sorted(set(s['category'] for s in skills))
+    for category in categories:
+        echo(f"\n[{category}]")
+        for skill in skills:
+            if skill['category'] == category:
+                installed_mark = "* " if skill['name'] in context().skills_mapping else "  "
+                echo(f"  {installed_mark}{skill['name']:<40} {skill.get('description', '')}")
+    echo(t("catalog_count", len(skills), len(categories), commit[:12]))
+
+def pick_skills(candidates, header):
+    """
+    Let the user pick skills from a paginated list.
+
+    Returns:
+        list: Selected skill dictionaries, or None to go back.
+    """
+    page = 0
+    while True:
+        echo(header)
+        page = print_page([format_skill_line(skill, idx) for idx, skill in enumerate(candidates, 1)], page)
+
+        echo(t("already_in_config"))
+        echo(t("enter_install_nums"))
+
+        skill_selection = input(t("selection_prompt")).strip()
+        if skill_selection.lower() == 'q':
+            sys.exit(0)
+        if skill_selection.lower() == 'b':
+            return None
+        if turn_page(skill_selection, page) is not None:
+            page = turn_page(skill_selection, page)
+            continue
+
+        selected_skills_to_return = []
+        try:
+            parts = skill_selection.split()
+            valid = True
+            for part in parts:
+                idx = int(part) - 1
+                if 0 <= idx < len(candidates):
+                    selected_skills_to_return.append(candidates[idx])
+                else:
+                    echo(t("warn_out_of_range", part))
+                    valid = False
+
+            if valid and selected_skills_to_return:
+                return selected_skills_to_return
+        except ValueError:
+             echo(t("invalid_input_short"))
+
+def browse_categories_and_skills(skills, index=None):
+    """
+    Interactive selection of category and then skills, or of skills found by search.
+    
+    Args:
+        skills (list): List of skill dictionaries (sorted by category, then name).
+        index (dict): Search index of skills (built here when '/text' is first used if None).
+
+    Returns:
+        list: Selected skill dictionaries.
+    """
+    skills_by_category = {}
+    for skill in skills:
+        skills_by_category.setdefault(skill['category'], []).append(skill)
+    categories = sorted(skills_by_category)
+    page = 0
+    
+    while True:
+        echo(t("remote_cats"))
+        page = print_page([f"{idx}. {cat} ({len(skills_by_category[cat])})" for idx, cat in enumerate(categories, 1)], page)
+        echo(t("search_opt"))
+        echo(t("quit_opt"))
+
+        cat_selection = input(t("select_cat")).strip()
+        if cat_selection.lower() == 'q':
+            return []
+        if turn_page(cat_selection, page) is not None:
+            page = turn_page(cat_selection, page)
+            continue
+
+        if cat_selection.startswith("/") and cat_selection[1:].strip():
+            query = cat_selection[1:].strip()
+            index = index or build_search_index(skills)
+            matches = search_catalog(skills, index, query)
+            if not matches:
+                echo(t("search_none", query))
+                continue
+            selected = pick_skills(matches, t("search_results", query))
+            if selected:
+                return selected
+            continue
+
+        try:
+            cat_idx = int(cat_selection) - 1
+            if not (0 <= cat_idx < len(categories)):
+                echo(t("invalid_num"))
+                continue
+        except ValueError:
+            echo(t("invalid_input_short"))
+            continue
+        
+        selected_category = categories[cat_idx]
+        selected = pick_skills(sorted(skills_by_category[selected_category], key=lambda x: x['name']),
+                               t("skills_in_cat", selected_category))
+        if selected:
+            return selected
+
+def install_catalog_skills(mirror_path, commit, selected_skills, target_dirs):
+    """
+    Install skills picked from the catalog into the targets.
+
+    Only the files of selected skills missing from the content store are read.
+
+    Returns:
+        dict: Manifest entry of the first successful copy of each installed skill, by name.
+    """
+    dependency_plan = new_dependency_plan()
+    source_state = {"commit": commit, "trees": {skill['path']: skill['tree'] for skill in selected_skills}}
+    skills = [(skill['name'], skill['path']) for skill in selected_skills]
+    needed = [skill['path'] for skill in selected_skills
+              if not (context().store_settings["enabled"] and load_stored_tree(skill['tree']))]
+    if needed:
+        with open_skill_source(mirror_path, commit, needed, source_state) as temp_path:
+            installed = install_from_checkout(temp_path, target_dirs, skills, dependency_plan, source_state=source_state)
+    else:
+        installed = install_from_checkout(None, target_dirs, skills, dependency_plan, source_state=source_state)
+    install_dependencies(dependency_plan, target_dirs)
+    return installed
+
+def browse_and_install_remote_skills(target_dirs):
+    """List remote skills and allow interactive installation into one or more targets."""
+    echo(t("fetching_list"))
+    fetched = fetch_catalog()
+    if fetched is None:
+        return
+    mirror_path, commit, skills = fetched
+
+    if not skills:
+        echo(t("no_skills_remote"))
+        return
+    
+    selected_skills = browse_categories_and_skills(skills, load_search_index(mirror_path, commit, skills))
+    if not selected_skills:
+        echo(t("no_skills_sel"))
+        return
+
+    # Ask user next action
+    echo(t("choose_action"))
+    echo(t("act_install_only"))
+    echo(t("act_install_config"))
+    echo(t("quit_opt"))
+    
+    action_choice = input(t("enter_choice_short")).strip()
+    if action_choice.lower() == 'q':
+        sys.exit(0)
+    
+    save_to_config = (action_choice == '2')
+
+    # If no target was provided initially, ask for it now
+    if not target_dirs:
+         target_dirs = [get_target_directory()]
+         echo(t("loc_display", target_dirs[0]))
+
+    installed = install_catalog_skills(mirror_path, commit, selected_skills, target_dirs)
+
+    # Update mapping
+    new_config_skills = {}
+    for skill in selected_skills:
+        if save_to_config and skill['name'] in installed and skill['name'] not in context().skills_mapping:
+            context().skills_mapping[skill['name']] = skill['path']
+            context().skill_sources[skill['name']] = DEFAULT_SOURCE
+            new_config_skills[skill['name']] = skill['path']
+            echo(t("added_to_config", skill['name']))
+
+    if new_config_skills:
+        try:
+            save_config_skills(new_config_skills)
+            echo(t("config_saved")) 
+        except Exception as e:
+            echo(t("warn_save_config", e))
+
+# --- Programmatic API ---
+DEFAULT_CONTEXT = RunContext()  # Current outside any manager
+SKILL_STATUSES = ("installed", "updated", "skipped", "failed")
+
+class NullOutput:
+    """Output stream that discards everything (the default for SkillsManager)."""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+class SkillsManager:
+    """
+    Install, update and inspect skills from Python code.
+
+    A manager carries its own configuration, settings and per-run caches in a
+    RunContext; importing this module reads no files. Operations run with the
+    manager's context made current for the calling thread only (see active()),
+    so managers can run concurrently in different threads, each using its own
+    worker pool, and sys.stdout is never replaced. Messages go to output
+    (discarded by default) and progress events to the progress callback,
+    called as progress(event, data) with event "fetch" (source, url, ok) or
+    "skill" (target, skill, status, seconds and file counts).
+
+    Example:
+        manager = SkillsManager.from_file("skills.json", progress=print)
+        result = manager.install(["/srv/workspace/skills"], skills=["sql-patterns"])
+        print(result["installed"], result["failed"], result["seconds"])
+    """
+
+    def __init__(self, config, config_path=None, lockfile_path=None, lang="en", output=None, progress=None,
+                 fetch_strategy=None, cache_ttl=None, lock_timeout=None, jobs=None, store=None,
+                 wheelhouse=None, materialize=None, force_deps=False, refresh=False, offline=False, trace=False):
+        """
+        Args:
+            config (dict): Configuration in the skills.json format ("repo_url" is required).
+            config_path (Path): skills.json that browse mode adds skills to (None: never written).
+            lockfile_path (Path): skills.lock to write and install from (None: no lockfile).
+            lang (str): Message language ("en" or "zh").
+            output: Stream receiving the usual console messages (default: discarded).
+            progress (callable): Called as progress(event, data) for each progress event.
+            fetch_strategy, cache_ttl, lock_timeout, jobs, store, wheelhouse, materialize: Override the matching
+                skills.json settings ("store" is "use_store"). A relative "wheelhouse" in the
+                configuration is relative to config_path.
+            force_deps (bool): Run pip even when the requirements are known to be satisfied.
+            refresh (bool): Fetch even if cached mirrors are still fresh.
+            offline (bool): Work from cached mirrors only.
+            trace (bool): Record timing spans (see the spans property).
+        """
+        if wheelhouse is None and config.get("wheelhouse"):
+            wheelhouse = Path(config_path).parent / config["wheelhouse"] if config_path else Path(config["wheelhouse"])
+        self.progress = progress
+        self.output = output if output is not None else NullOutput()
+        self.records = None
+        self.context = RunContext(config, config_path=config_path, lockfile_path=lockfile_path, lang=lang,
+                                  output=self.output, progress=self._record)
+        self.context.fetch_settings.update({
+            "strategy": fetch_strategy or config.get("fetch_strategy", DEFAULT_FETCH_STRATEGY),
+            "ttl": cache_ttl if cache_ttl is not None else config.get("cache_ttl", DEFAULT_CACHE_TTL),
+            "refresh": refresh,
+            "offline": offline,
+            "materialize": materialize or config.get("materialize", DEFAULT_MATERIALIZE),
+        })
+        self.context.lock_settings["timeout"] = (lock_timeout if lock_timeout is not None
+                                                 else config.get("lock_timeout", DEFAULT_LOCK_TIMEOUT))
+        self.context.store_settings["enabled"] = bool(store if store is not None else config.get("use_store", False))
+        self.context.dependency_settings["force"] = force_deps
+        self.context.wheelhouse_settings["path"] = Path(wheelhouse).expanduser() if wheelhouse else None
+        self.context.job_settings["jobs"] = max(1, int(jobs or config.get("jobs") or DEFAULT_JOBS))
+        self.context.trace_settings["enabled"] = trace
+
+    @classmethod
+    def from_file(cls, config_path=None, **options):
+        """Create a manager from a skills.json file, with skills.lock next to it."""
+        config_path = Path(config_path or CONFIG_PATH)
+        options.setdefault("lockfile_path", config_path.with_name("skills.lock"))
+        return cls(load_config(config_path), config_path=config_path, **options)
+
+    @property
+    def skills(self):
+        """Configured skills: {skill name: repository path}."""
+        return dict(self.context.skills_mapping)
+
+    @property
+    def spans(self):
+        """Timing spans recorded so far (with trace=True)."""
+        return list(self.context.trace_spans)
+
+    @contextmanager
+    def active(self):
+        """Make this manager's context the one the module functions use in the calling thread."""
+        with use_context(self.context):
+            yield self
+
+    def _record(self, event, data):
+        if event == "skill" and self.records is not None:
+            self.records.append(data)
+        if self.progress is not None:
+            self.progress(event, data)
+
+    def _run(self, operation, *args, **kwargs):
+        """Run an operation, collecting per-skill results into a summary dict."""
+        records, self.records = self.records, []
+        start = time.perf_counter()
+        try:
+            with self.active():
+                outcome = operation(*args, **kwargs)
+        finally:
+            skills, self.records = self.records, records
+        result = {"outcome": outcome, "seconds": round(time.perf_counter() - start, 6), "skills": skills}
+        for status in SKILL_STATUSES:
+            result[status] = sorted({record["skill"] for record in skills if record["status"] == status})
+        return result
+
+    def install(self, target_dirs, skills=None):
+        """
+        Install skills into one or more target directories.
+
+        Args:
+            target_dirs (list): Destination directories (fetched once for all of them).
+            skills (list): Skill names to install (default: all configured skills).
+
+        Returns:
+            dict: "ok", "seconds", lists of skill names per status ("installed", "updated",
+                "skipped", "failed") and "skills" with one record per target and skill.
+        """
+        result = self._run(update_or_install_skills, [Path(d) for d in target_dirs], specific_skills=skills)
+        result["ok"] = bool(result.pop("outcome")) and not result["failed"]
+        return result
+
+    def upgrade(self, target_dirs):
+        """Update the configured skills already installed in the targets; returns the same summary as install()."""
+        result = self._run(upgrade_installed_skills, [Path(d) for d in target_dirs])
+        result["ok"] = bool(result.pop("outcome")) and not result["failed"]
+        return result
+
+    def upgrade_fleet(self, root, max_depth=DEFAULT_FLEET_DEPTH, ignore=()):
+        """
+        Upgrade every skill directory under root, fetching each source once.
+
+        Returns:
+            dict: The install() summary plus "targets": {target path: "current", "updated" or "failed"}.
+        """
+        result = self._run(upgrade_fleet, Path(root), max_depth, ignore)
+        outcome = result.pop("outcome")
+        result["targets"] = outcome["targets"]
+        result["ok"] = outcome["ok"] and not result["failed"]
+        return result
+
+    def watch(self, target_dirs, interval=None, polls=None):
+        """
+        Keep the installed skills of the targets current, polling the remote refs (blocks until interrupted).
+
+        Args:
+            target_dirs (list): Targets to keep current.
+            interval (int): Seconds between polls (default: "watch_interval" in the configuration, or 300).
+            polls (int): Stop after this many polls.
+
+        Returns:
+            dict: The install() summary of all updates applied plus "updates", their number.
+        """
+        interval = interval or self.context.config.get("watch_interval", DEFAULT_WATCH_INTERVAL)
+        result = self._run(watch_targets, [Path(d) for d in target_dirs], interval, polls)
+        result["updates"] = result.pop("outcome")
+        result["ok"] = not result["failed"]
+        return result
+
+    def install_frozen(self, target_dirs):
+        """
+        Install exactly what skills.lock records (nothing is fetched if the targets match).
+
+        Returns:
+            dict: The install() summary plus "status" (0 ok, 1 mismatch or failure, 2 no lockfile).
+        """
+        result = self._run(install_from_lockfile, [Path(d) for d in target_dirs])
+        result["status"] = result.pop("outcome")
+        result["ok"] = result["status"] == 0
+        return result
+
+    def verify(self, target_dirs):
+        """Compare the targets with skills.lock; returns 0 if they match, 1 if not, 2 without a lockfile."""
+        with self.active():
+            return install_from_lockfile([Path(d) for d in target_dirs], verify_only=True)
+
+    def check(self, target_dirs):
+        """Look for upstream changes of the installed skills; returns 0 (current), 1 (updates) or 2 (error)."""
+        with self.active():
+            target_dirs = [Path(d) for d in target_dirs]
+            echo(t("checking_updates"))
+            installed_skills = find_installed_skills(target_dirs)
+            if not installed_skills:
+                echo(t("no_skills_update"))
+                return 0
+            return check_for_updates(target_dirs, installed_skills)
+
+    def status(self, target_dirs=None):
+        """Report the skills installed in the targets (default: all known ones) from their state databases."""
+        with self.active():
+            return collect_status([Path(d) for d in target_dirs] if target_dirs else None)
+
+    def list_skills(self):
+        """Return the catalog of the default source (list of skill dicts), or None if it cannot be fetched."""
+        with self.active():
+            fetched = fetch_catalog()
+            return fetched[2] if fetched else None
+
+    def search(self, query, limit=None):
+        """Return the catalog skills matching query, best first, or None if the catalog cannot be fetched."""
+        with self.active():
+            fetched = search_remote_skills(query, limit)
+            return fetched[2] if fetched else None
+
+    def install_matching(self, query, target_dirs, limit=DEFAULT_SEARCH_LIMIT):
+        """Install the (first limit) catalog skills named query or by a name starting with it; returns the same summary as install()."""
+        result = self._run(install_matching_skills, query, [Path(d) for d in target_dirs], limit, assume_yes=True)
+        result["ok"] = bool(result.pop("outcome")) and not result["failed"]
+        return result
+
+    def collect_garbage(self):
+        """Prune content store files that no target uses any more."""
+        with self.active():
+            collect_garbage()
+
+    def export_bundle(self, bundle_path, skills=None):
+        """Write the given skills (default: all configured) into a bundle archive; returns True on success."""
+        with self.active():
+            return export_bundle(Path(bundle_path), specific_skills=skills)
+
+    def import_bundle(self, bundle_path, target_dirs):
+        """Install the skills of a bundle archive into the targets; returns the same summary as install()."""
+        result = self._run(import_bundle, bundle_path, [Path(d) for d in target_dirs])
+        result["ok"] = bool(result.pop("outcome")) and not result["failed"]
+        return result
+
+    def build_wheelhouse(self, wheel_dir):
+        """Build wheels for the dependencies of all configured skills into wheel_dir; returns True on success."""
+        with self.active():
+            return build_wheelhouse(wheel_dir)
+
+def run_cli(manager, args):
+    """Run the operation selected by the parsed command line arguments (inside manager.active())."""
+    if args.gc:
+        manager.collect_garbage()
+        return
+
+    if args.build_wheelhouse:
+        if not manager.build_wheelhouse(args.build_wheelhouse):
+            sys.exit(1)
+        return
+
+    if args.list:
+        list_remote_skills(as_json=args.json)
+        return
+
+    if args.search and not args.install_matching:
+        if search_remote_skills(args.search, args.limit, as_json=args.json) is None:
+            sys.exit(1)
+        return
+
+    if args.export:
+        selected_skills = None if args.yes else select_skills(context().skills_mapping)
+        if not manager.export_bundle(args.export, skills=selected_skills):
+            sys.exit(1)
+        return
+
+    if args.fleet:
+        if args.check:
+            target_dirs = find_skill_targets(Path(args.fleet).expanduser(), args.max_depth, args.ignore or [])
+            sys.exit(manager.check(target_dirs))
+        if not manager.upgrade_fleet(args.fleet, args.max_depth, args.ignore or [])["ok"]:
+            sys.exit(1)
+        return
+
+    # Determine Target Directories (several flags may be combined; the repository is fetched once)
+    locations = get_known_locations()
+    target_dirs = []
+    if args.global_install or args.all_targets:
+        target_dirs.append(locations["global"])
+    if args.project_install or args.all_targets:
+        target_dirs.append(locations["project"])
+    if args.claude_install or args.all_targets:
+        target_dirs.append(locations["claude"])
+    for custom_path in args.target or []:
+        target_dirs.append(Path(custom_path).expanduser())
+
+    # Drop duplicates (e.g. --project-install and --target ./skills)
+    unique_dirs = []
+    for target_dir in target_dirs:
+        if target_dir.resolve() not in [d.resolve() for d in unique_dirs]:
+            unique_dirs.append(target_dir)
+    target_dirs = unique_dirs
+
+    if args.status:
+        print_status(manager.status(target_dirs or None), as_json=args.json)
+        return
+
+    if not target_dirs:
+        # Check context
+        if args.ls:
+             echo(t("browse_header"))
+             # We do NOT ask for target_dir yet for ls command, unless it was passed as arg
+        elif not (args.upgrade or args.check or args.watch or args.frozen or args.verify or args.import_bundle
+                  or args.search):
+             # Default install mode
+             echo(t("manager_header"))
+
+    # ls mode will ask for a location inside if needed, everything else needs one now.
+    if not target_dirs and not args.ls: 
+        target_dirs = [get_target_directory()]
+
+    for target_dir in target_dirs:
+        echo(t("loc_display", target_dir))
+
+    # Operations
+    if args.frozen or args.verify:
+        status = manager.verify(target_dirs) if args.verify else manager.install_frozen(target_dirs)["status"]
+        if status:
+            sys.exit(status)
+    elif args.import_bundle:
+        if not manager.import_bundle(args.import_bundle, target_dirs)["ok"]:
+            sys.exit(1)
+    elif args.search:
+        if not install_matching_skills(args.search, target_dirs, args.limit, assume_yes=args.yes):
+            sys.exit(1)
+    elif args.ls:
+        browse_and_install_remote_skills(target_dirs)
+    elif args.check:
+        sys.exit(manager.check(target_dirs))
+    elif args.watch:
+        manager.watch(target_dirs, args.interval)
+    elif args.upgrade:
+        if not manager.upgrade(target_dirs)["ok"]:
+            sys.exit(1)
+    else:
+        # Selection logic
+        selected_skills = None
+        if not args.yes:
+            selected_skills = select_skills(context().skills_mapping)
+        
+        if not manager.install(target_dirs, skills=selected_skills)["ok"]:
+            sys.exit(1)
+
+    echo(t("done"))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage VS Code Skills - Install, update, and manage agent skills.",
+        epilog="""
+Interactive Mode:
+  Run without arguments to enter interactive mode.
+  You will be prompted to select an installation location and specific skills.
+
+Examples:
+  python install_skills.py --global-install --yes      # Install all skills to global folder silently
+  python install_skills.py --project-install           # Install to current folder (interactive selection)
+  python install_skills.py --upgrade                   # Update currently installed skills
+  python install_skills.py --project-install --check   # Exit 1 if installed skills have upstream changes
+  python install_skills.py --global-install --watch --interval 600   # Keep installed skills current
+  python install_skills.py --ls                        # Browse and install new skills from remote
+  python install_skills.py --list --json               # Print the remote skill catalog as JSON
+  python install_skills.py --search "sql optim"        # Find remote skills by name, category or description
+  python install_skills.py --search dbt --install-matching --project-install -y   # Install every match
+  python install_skills.py --status --json            # What is installed in every known target
+  python install_skills.py --upgrade --offline         # Update from the local mirror cache only
+  python install_skills.py --global-install --claude-install -y   # Install to several targets from one fetch
+  python install_skills.py --project-install --frozen  # Reproduce the install recorded in skills.lock
+  python install_skills.py --project-install --verify  # Exit 1 if installed files differ from skills.lock
+  python install_skills.py --all-targets --store -y    # Hardlink every target from the shared content store
+  python install_skills.py --gc                        # Prune store files no target uses any more
+  python install_skills.py --export skills.tar.gz -y   # Pack all configured skills into one bundle
+  python install_skills.py --all-targets --import skills.tar.gz   # Install a bundle without git access
+  python install_skills.py --build-wheelhouse wheels   # Pre-build dependency wheels for offline machines
+  python install_skills.py --project-install -y --wheelhouse wheels   # Install dependencies without an index
+  python install_skills.py --upgrade --timings --trace-file trace.json   # Profile an upgrade
+  python install_skills.py --fleet ~/src --ignore 'archive*' -j 16   # Upgrade every skills folder under ~/src
+""",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--global-install", action="store_true", help="Install to global VS Code folder (~/.vscode/skills)")
+    parser.add_argument("--project-install", action="store_true", help="Install to current project folder (./skills)")
+    parser.add_argument("--claude-install", action="store_true", help="Install to Claude Desktop folder")
+    parser.add_argument("--target", action="append", metavar="PATH", help="Install to a custom folder (repeatable, combines with the flags above)")
+    parser.add_argument("--all-targets", action="store_true", help="Install to the global, project and Claude Desktop folders at once")
+    parser.add_argument("--upgrade", action="store_true", help="Check and update all installed skills")
+    parser.add_argument("--check", action="store_true", help="Only report installed skills with upstream changes; exit status 1 if any (for CI)")
+    parser.add_argument("--watch", action="store_true", help="Stay running and update installed skills whenever the upstream ref moves")
+    parser.add_argument("--interval", type=int, metavar="SECONDS", help=f"Seconds between remote checks in --watch mode (default: {DEFAULT_WATCH_INTERVAL})")
+    parser.add_argument("--frozen", action="store_true", help="Install exactly the commit and skills recorded in skills.lock")
+    parser.add_argument("--verify", action="store_true", help="Only compare installed skills with skills.lock; exit status 1 on mismatch")
+    parser.add_argument("--fleet", metavar="ROOT", help="Upgrade every skills directory found under ROOT in one pass (with --check: only report)")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_FLEET_DEPTH, metavar="N", help=f"Directory levels searched below the --fleet root (default: {DEFAULT_FLEET_DEPTH})")
+    parser.add_argument("--ignore", action="append", metavar="PATTERN", help="Skip directories matching this pattern during --fleet scans (repeatable)")
+    parser.add_argument("--ls", action="store_true", help="Browse available remote skills interactively")
+    parser.add_argument("--list", action="store_true", help="Print the remote skill catalog (non-interactive)")
+    parser.add_argument("--search", metavar="QUERY", help="Print the remote skills matching QUERY (name, category, description), best first")
+    parser.add_argument("--install-matching", action="store_true", help="Install the skills found by --search into the targets (exact and prefix matches only)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_SEARCH_LIMIT, metavar="N", help=f"Show or install at most N search results, 0 for all (default: {DEFAULT_SEARCH_LIMIT})")
+    parser.add_argument("--status", action="store_true", help="Report the skills installed in the targets (default: all known targets) without git or directory scans")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON output (with --list, --search or --status)")
+    parser.add_argument("--yes", "-y", action="store_true", help="Skip interactive confirmation (installs all)")
+    parser.add_argument("--lang", help="Specify language (en/zh)", choices=["en", "zh"])
+    parser.add_argument("--store", action="store_true", help="Hardlink installed files from the shared content-addressed store")
+    parser.add_argument("--gc", action="store_true", help="Remove content store files no longer used by any target")
+    parser.add_argument("--export", metavar="FILE", help=f"Write the selected skills and a manifest into a bundle archive ({', '.join(BUNDLE_FORMATS)})")
+    parser.add_argument("--import", dest="import_bundle", metavar="FILE", help="Install the skills of a bundle archive into the targets without git ('-' reads stdin)")
+    parser.add_argument("--build-wheelhouse", metavar="DIR", help="Build wheels for the dependencies of all configured skills into DIR")
+    parser.add_argument("--wheelhouse", metavar="DIR", help="Install dependencies from the wheels in DIR only (pip --no-index)")
+    parser.add_argument("--force-deps", action="store_true", help="Run pip even when the skills' requirements are known to be satisfied")
+    parser.add_argument("--jobs", "-j", type=int, metavar="N", help=f"Install up to N skills concurrently (default: {DEFAULT_JOBS})")
+    parser.add_argument("--timings", action="store_true", help="Print a table of phase, skill and subprocess timings at the end")
+    parser.add_argument("--trace-file", metavar="PATH", help="Write phase, skill and subprocess spans as a Chrome trace JSON file")
+    parser.add_argument("--refresh", action="store_true", help="Fetch from the remote even if the cached mirror is still fresh")
+    parser.add_argument("--offline", action="store_true", help="Work from the cached mirrors only, never fetching; skills whose files were never downloaded fail")
+    parser.add_argument("--fetch-strategy", choices=list(FETCH_STRATEGIES), help=f"How the repository is fetched: full clone or partial clone with sparse checkout (default: {DEFAULT_FETCH_STRATEGY})")
+    parser.add_argument("--materialize", choices=list(MATERIALIZE_MODES), help=f"How skill files are written: streamed from git objects or copied from a temporary worktree (default: {DEFAULT_MATERIALIZE})")
+    parser.add_argument("--lock-timeout", type=int, metavar="SECONDS", help=f"Seconds to wait for another run holding a target or cache lock (default: {DEFAULT_LOCK_TIMEOUT})")
+    parser.add_argument("--cache-ttl", type=int, metavar="SECONDS", help=f"Seconds before the cached mirror is fetched again (default: {DEFAULT_CACHE_TTL})")
+    args = parser.parse_args()
+    if args.install_matching and not args.search:
+        parser.error("--install-matching requires --search")
+
+    # Override Language if specified
+    lang = args.lang or get_language()
+
+    try:
+        manager = SkillsManager.from_file(
+            lang=lang, output=sys.stdout, fetch_strategy=args.fetch_strategy, cache_ttl=args.cache_ttl,
+            lock_timeout=args.lock_timeout, jobs=args.jobs, store=True if args.store else None, wheelhouse=args.wheelhouse,
+            materialize=args.materialize, force_deps=args.force_deps, refresh=args.refresh, offline=args.offline, trace=args.timings or bool(args.trace_file))
+    except OSError:
+        with use_context(RunContext(lang=lang)):
+            echo(t("config_not_found"))
+        sys.exit(1)
+
+    try:
+        with manager.active(), trace_span("total"):
+            run_cli(manager, args)
+    finally:
+        # Keep machine-readable output on stdout clean
+        with manager.active(), redirect_output(sys.stderr) if args.json else nullcontext():
+            if args.timings:
+                print_timings()
+            if args.trace_file:
+                write_trace_file(args.trace_file)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,130 @@
+"""
+Shared fixtures of the install_skills.py tests.
+
+Every test works on a bare repository created by benchmark_skills.generate_repository
+and reached through a file:// URL, with its own cache directory, so no network
+access is needed.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import benchmark_skills  # noqa: E402
+import install_skills  # noqa: E402
+
+
+def git(args, cwd):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, text=True, capture_output=True)
+
+
+def read_tree(root):
+    """{relative path: contents} of every file under root."""
+    return {rel_path: file_path.read_bytes() for rel_path, file_path in install_skills.list_files(root).items()}
+
+
+class Upstream:
+    """A generated upstream repository and helpers to install from it."""
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.bare_path, self.src_path, self.skills = benchmark_skills.generate_repository(
+            work_dir, categories=2, skills_per_category=3, file_count=3, file_size=256)
+        self.lockfile_path = work_dir / "skills.lock"
+        self.installer = benchmark_skills.prepare_installer(work_dir, self.bare_path, self.skills)
+
+    @property
+    def url(self):
+        return self.bare_path.resolve().as_uri()
+
+    @property
+    def mirror_path(self):
+        """The cached mirror of this upstream (in the cache selected by SKILLS_MANAGER_CACHE)."""
+        return install_skills.get_repo_cache_dir(self.url) / "mirror.git"
+
+    def missing_objects(self):
+        """Objects of the mirror's HEAD that a partial clone has not downloaded."""
+        listing = git(["rev-list", "--objects", "--missing=print", "HEAD"], self.mirror_path).stdout
+        return [line[1:] for line in listing.splitlines() if line.startswith("?")]
+
+    @property
+    def config(self):
+        return {"repo_url": self.url, "skills": dict(self.skills)}
+
+    def manager(self, config=None, **options):
+        options.setdefault("lockfile_path", self.lockfile_path)
+        return install_skills.SkillsManager(config or self.config, **options)
+
+    def cli(self, *args, python=sys.executable, env=None):
+        """Run a copy of the installer configured for this upstream as a separate process."""
+        return subprocess.run([str(python), str(self.installer), "--lang", "en", *args], cwd=self.installer.parent,
+                              text=True, capture_output=True, stdin=subprocess.DEVNULL,
+                              env={**os.environ, **env} if env else None)
+
+    def mutate(self, fraction=0.5, seed=1):
+        """Change some skills upstream; returns the number changed."""
+        return benchmark_skills.mutate_repository(self.src_path, self.bare_path, self.skills, fraction, seed=seed)
+
+    def commit(self, files, message="Update skills"):
+        """Write {repository path: text} into the source tree and push it upstream."""
+        for repo_path, text in files.items():
+            file_path = self.src_path / repo_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(text, encoding="utf-8")
+        benchmark_skills.run_git(["add", "-A"], self.src_path)
+        benchmark_skills.run_git(["commit", "-q", "-m", message], self.src_path)
+        benchmark_skills.run_git(["push", "-q", str(self.bare_path), "main"], self.src_path)
+
+    def head(self):
+        return git(["rev-parse", "HEAD"], self.src_path).stdout.strip()
+
+    def source_files(self, skill_name, rev=None):
+        """{relative path: contents} of a skill in the source tree, or at a commit of it."""
+        repo_path = self.skills[skill_name]
+        if rev is None:
+            return read_tree(self.src_path / repo_path)
+        listing = git(["ls-tree", "-r", "--name-only", rev, "--", repo_path], self.src_path).stdout.split()
+        return {path[len(repo_path) + 1:]: subprocess.run(["git", "show", f"{rev}:{path}"], cwd=self.src_path,
+                                                          check=True, capture_output=True).stdout
+                for path in listing}
+
+    def assert_installed(self, target_dir, skill_names=None, rev=None):
+        for skill_name in skill_names or self.skills:
+            assert read_tree(target_dir / skill_name) == self.source_files(skill_name, rev), skill_name
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKILLS_MANAGER_CACHE", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def upstream(tmp_path, cache_dir):
+    return Upstream(tmp_path)
+
+
+@pytest.fixture
+def make_upstream(tmp_path, cache_dir):
+    """Create further upstreams, each in its own folder of tmp_path."""
+    def make(name):
+        (tmp_path / name).mkdir()
+        return Upstream(tmp_path / name)
+    return make
+
+
+@pytest.fixture
+def pip_runs(monkeypatch):
+    """Record the pip runs instead of installing anything."""
+    runs = []
+
+    def install_python_packages(requirement_files=(), packages=()):
+        runs.append((sorted(req_file.read_text(encoding="utf-8") for req_file in requirement_files), list(packages)))
+
+    monkeypatch.setattr(install_skills, "install_python_packages", install_python_packages)
+    return runs
@@ -0,0 +1,81 @@
+import io
+import json
+import shutil
+import subprocess
+import sys
+import threading
+
+import install_skills
+
+
+def test_import_has_no_side_effects(tmp_path):
+    code = "import install_skills, sys; assert sys.stdout is sys.__stdout__"
+    env = {"PATH": "", "HOME": str(tmp_path), "XDG_CACHE_HOME": str(tmp_path / "cache"),
+           "PYTHONPATH": str(install_skills.Path(install_skills.__file__).parent)}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_skill_is_reported_as_failed(upstream, tmp_path):
+    events = []
+    manager = upstream.manager(progress=lambda event, data: events.append((event, data)))
+    skill_name = sorted(upstream.skills)[0]
+
+    result = manager.install([tmp_path / "target"], skills=["no-such-skill", skill_name])
+    assert not result["ok"]
+    assert result["failed"] == ["no-such-skill"]
+    assert result["installed"] == [skill_name]
+    assert ("skill", {"target": str(tmp_path / "target"), "skill": "no-such-skill", "status": "failed",
+                      "seconds": 0.0}) in events
+
+
+def test_concurrent_managers_keep_their_output_apart(upstream, make_upstream, tmp_path):
+    other = make_upstream("other")
+    outputs = {"first": io.StringIO(), "second": io.StringIO()}
+    results = {}
+
+    def run(name, source):
+        manager = source.manager(output=outputs[name], lockfile_path=tmp_path / f"{name}.lock", jobs=4)
+        results[name] = manager.install([tmp_path / name])
+
+    threads = [threading.Thread(target=run, args=("first", upstream)),
+               threading.Thread(target=run, args=("second", other))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results["first"]["ok"] and results["second"]["ok"]
+    assert upstream.url in outputs["first"].getvalue() and other.url not in outputs["first"].getvalue()
+    assert other.url in outputs["second"].getvalue() and upstream.url not in outputs["second"].getvalue()
+
+
+def test_pip_output_goes_to_the_output_stream(upstream, tmp_path, monkeypatch, capfd):
+    # pip is already installed, so nothing is downloaded
+    monkeypatch.setenv("PIP_NO_INDEX", "1")
+    monkeypatch.setenv("PIP_DISABLE_PIP_VERSION_CHECK", "1")
+    skill_name = sorted(upstream.skills)[0]
+    upstream.commit({f"{upstream.skills[skill_name]}/requirements.txt": "pip\n"})
+
+    output = io.StringIO()
+    assert upstream.manager(output=output).install([tmp_path / "target"], skills=[skill_name])["ok"]
+    assert capfd.readouterr().out == ""
+    assert "Requirement already satisfied: pip" in output.getvalue()
+
+
+def test_cli_exits_1_when_a_skill_fails(upstream, tmp_path):
+    config_path = upstream.installer.parent / "skills.json"
+    config = json.loads(config_path.read_text(encoding="utf-8"))
+    config["skills"]["vanished-skill"] = "plugins/vanished/skills/vanished-skill"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    target = tmp_path / "target"
+
+    run = upstream.cli("--target", str(target), "--yes")
+    assert run.returncode == 1, run.stdout
+    upstream.assert_installed(target)
+
+    # An installed skill removed upstream cannot be updated
+    removed = sorted(upstream.skills)[0]
+    shutil.rmtree(upstream.src_path / upstream.skills[removed])
+    upstream.commit({})
+    run = upstream.cli("--target", str(target), "--upgrade", "--refresh")
+    assert run.returncode == 1, run.stdout
@@ -0,0 +1,87 @@
+import io
+import json
+import tarfile
+
+import pytest
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+def rename_bundle_skill(bundle_path, crafted_path, old_name, new_name):
+    """Copy a bundle with one skill renamed, both in the manifest and in its members."""
+    with tarfile.open(bundle_path) as source, tarfile.open(crafted_path, "w:gz") as crafted:
+        for member in source:
+            data = source.extractfile(member).read()
+            if member.name == install_skills.BUNDLE_MANIFEST:
+                manifest = json.loads(data)
+                manifest["skills"][new_name] = manifest["skills"].pop(old_name)
+                data = json.dumps(manifest).encode("utf-8")
+            elif member.name.startswith(f"{install_skills.BUNDLE_PREFIX}{old_name}/"):
+                member.name = install_skills.BUNDLE_PREFIX + new_name + member.name[len(install_skills.BUNDLE_PREFIX) + len(old_name):]
+            member.size = len(data)
+            crafted.addfile(member, io.BytesIO(data))
+
+
+def test_bundle_round_trip(upstream, tmp_path):
+    bundle_path = tmp_path / "skills.tar.gz"
+    assert upstream.manager().export_bundle(bundle_path)
+    with tarfile.open(bundle_path) as tar:
+        assert tar.getnames()[0] == install_skills.BUNDLE_MANIFEST
+
+    target = tmp_path / "target"
+    result = upstream.manager().import_bundle(bundle_path, [target])
+    assert result["ok"]
+    assert result["installed"] == sorted(upstream.skills)
+    upstream.assert_installed(target)
+
+    # The bundle records the source commit, so a later upgrade from git has nothing to do
+    result = upstream.manager().upgrade([target])
+    assert result["ok"] and result["updated"] == []
+
+    result = upstream.manager().import_bundle(bundle_path, [target])
+    assert result["ok"] and result["installed"] == [] and result["updated"] == []
+
+
+@pytest.mark.skipif("zst" in install_skills.BUNDLE_FORMATS.values(), reason="tarfile supports zstd")
+def test_bundle_rejects_unsupported_zstd(upstream, tmp_path):
+    bundle_path = tmp_path / "skills.tar.zst"
+    assert not upstream.manager().export_bundle(bundle_path)
+    assert not bundle_path.exists()
+
+
+@pytest.mark.parametrize("skill_name", ["", ".", "..", ".hidden", "a/b", "..\\escape"])
+def test_bundle_rejects_unsafe_skill_names(upstream, tmp_path, skill_name):
+    bundle_path, crafted_path = tmp_path / "skills.tar.gz", tmp_path / "crafted.tar.gz"
+    assert upstream.manager().export_bundle(bundle_path)
+    rename_bundle_skill(bundle_path, crafted_path, sorted(upstream.skills)[0], skill_name)
+
+    output = io.StringIO()
+    target = tmp_path / "area" / "target"
+    result = upstream.manager(output=output).import_bundle(crafted_path, [target])
+    assert not result["ok"]
+    assert result["installed"] == []
+    assert TEXTS["err_bundle_skill_name"].format(crafted_path, repr(skill_name)) in output.getvalue()
+    assert sorted(path.name for path in (tmp_path / "area").iterdir()) in ([], ["target"])
+    assert not target.exists() or [path for path in target.iterdir() if path.is_dir()] == []
+
+
+def test_bundle_rejects_members_of_unlisted_skills(upstream, tmp_path):
+    bundle_path, crafted_path = tmp_path / "skills.tar.gz", tmp_path / "crafted.tar.gz"
+    assert upstream.manager().export_bundle(bundle_path)
+    with tarfile.open(bundle_path) as source, tarfile.open(crafted_path, "w:gz") as crafted:
+        for member in source:
+            crafted.addfile(member, source.extractfile(member))
+        data = b"outside"
+        member = tarfile.TarInfo(f"{install_skills.BUNDLE_PREFIX}../outside.txt")
+        member.size = len(data)
+        crafted.addfile(member, io.BytesIO(data))
+
+    output = io.StringIO()
+    target = tmp_path / "target"
+    result = upstream.manager(output=output).import_bundle(crafted_path, [target])
+    assert not result["ok"]
+    assert TEXTS["err_bundle_member"].format(member.name) in output.getvalue()
+    assert not (tmp_path / "outside.txt").exists()
+    upstream.assert_installed(target)
@@ -0,0 +1,28 @@
+import io
+
+
+def test_check_exit_codes(upstream, tmp_path, monkeypatch):
+    target = str(tmp_path / "target")
+    assert upstream.cli("--target", target, "--yes").returncode == 0
+    assert upstream.cli("--target", target, "--check").returncode == 0
+
+    upstream.mutate()
+    assert upstream.cli("--target", target, "--check").returncode == 1
+
+    # An unreachable remote is only an error when no mirror is cached
+    upstream.bare_path.rename(tmp_path / "moved.git")
+    assert upstream.cli("--target", target, "--check").returncode == 1
+    monkeypatch.setenv("SKILLS_MANAGER_CACHE", str(tmp_path / "empty-cache"))
+    assert upstream.cli("--target", target, "--check").returncode == 2
+
+
+def test_check_reports_changed_skills_only(upstream, tmp_path):
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    changed = sorted(upstream.skills)[0]
+    upstream.commit({f"{upstream.skills[changed]}/SKILL.md": "changed\n"})
+
+    output = io.StringIO()
+    assert upstream.manager(output=output).check([target]) == 1
+    stale = [name for name in upstream.skills if f"↑ {name}:" in output.getvalue()]
+    assert stale == [changed], output.getvalue()
@@ -0,0 +1,92 @@
+import io
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+def add_requirements(upstream, requirements):
+    """Commit a requirements.txt into the given skills: {skill name: text}."""
+    upstream.commit({f"{upstream.skills[name]}/requirements.txt": text for name, text in requirements.items()})
+
+
+def test_dependencies_are_installed_in_one_pip_run(upstream, tmp_path, pip_runs):
+    first, second, third = sorted(upstream.skills)[:3]
+    add_requirements(upstream, {first: "alpha==1.0\n", second: "beta>=2\n"})
+    config = dict(upstream.config, tools={"xyz-tool": {"probe": "xyz-tool-not-on-path --version",
+                                                       "package": "xyz-pkg", "min_version": "1.5"}},
+                  skill_tools={third: ["xyz-tool"]})
+
+    result = upstream.manager(config).install([tmp_path / "first", tmp_path / "second"])
+    assert result["ok"]
+    assert pip_runs == [(["alpha==1.0\n", "beta>=2\n"], ["xyz-pkg>=1.5"])]
+
+
+def test_conflicting_pins_are_reported_before_pip(upstream, tmp_path, pip_runs):
+    first, second = sorted(upstream.skills)[:2]
+    add_requirements(upstream, {first: "Alpha_Pkg==1.0\n", second: "alpha-pkg == 2.0  # newer\n"})
+
+    output = io.StringIO()
+    result = upstream.manager(output=output).install([tmp_path / "target"])
+    assert not result["ok"]
+    assert pip_runs == []
+    assert TEXTS["deps_conflict_item"].format("alpha-pkg", "1.0", first) in output.getvalue()
+    assert TEXTS["deps_conflict_item"].format("alpha-pkg", "2.0", second) in output.getvalue()
+
+
+def test_skills_without_dependencies_skip_pip(upstream, tmp_path, pip_runs):
+    assert upstream.manager().install([tmp_path / "target"])["ok"]
+    assert pip_runs == []
+
+
+def test_satisfied_dependencies_skip_pip(upstream, tmp_path, pip_runs):
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+    assert upstream.manager().install([tmp_path / "first"])["ok"]
+    assert len(pip_runs) == 1
+
+    output = io.StringIO()
+    assert upstream.manager(output=output).install([tmp_path / "second"])["ok"]
+    assert len(pip_runs) == 1
+    assert TEXTS["deps_satisfied"].format(first) in output.getvalue()
+
+    assert upstream.manager(force_deps=True).install([tmp_path / "third"])["ok"]
+    assert len(pip_runs) == 2
+
+
+def test_changed_requirements_rerun_pip(upstream, tmp_path, pip_runs):
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+
+    add_requirements(upstream, {first: "alpha==1.1\n"})
+    assert upstream.manager(refresh=True).upgrade([target])["ok"]
+    assert [requirements for requirements, _ in pip_runs] == [["alpha==1.0\n"], ["alpha==1.1\n"]]
+
+
+def test_changed_distributions_rerun_pip(upstream, tmp_path, pip_runs, monkeypatch):
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+    assert upstream.manager().install([tmp_path / "first"])["ok"]
+
+    # Something else changed the environment since pip satisfied the requirements
+    monkeypatch.setattr(install_skills, "distributions_state", lambda: "changed")
+    assert upstream.manager().install([tmp_path / "second"])["ok"]
+    assert len(pip_runs) == 2
+
+
+def test_failed_pip_run_is_not_remembered(upstream, tmp_path, pip_runs, monkeypatch):
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+
+    def failing_pip(requirement_files=(), packages=()):
+        raise RuntimeError("pip failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(install_skills, "install_python_packages", failing_pip)
+        assert not upstream.manager().install([tmp_path / "first"])["ok"]
+    assert not install_skills.get_dependency_cache_path().exists()
+
+    assert upstream.manager().install([tmp_path / "second"])["ok"]
+    assert len(pip_runs) == 1
@@ -0,0 +1,39 @@
+import pytest
+
+import install_skills
+
+
+@pytest.mark.parametrize("materialize", list(install_skills.MATERIALIZE_MODES))
+@pytest.mark.parametrize("fetch_strategy", list(install_skills.FETCH_STRATEGIES))
+def test_install_and_upgrade(upstream, tmp_path, fetch_strategy, materialize):
+    target = tmp_path / "target"
+    options = {"fetch_strategy": fetch_strategy, "materialize": materialize}
+
+    result = upstream.manager(**options).install([target])
+    assert result["ok"]
+    assert result["installed"] == sorted(upstream.skills)
+    upstream.assert_installed(target)
+
+    changed = upstream.mutate()
+    result = upstream.manager(refresh=True, **options).upgrade([target])
+    assert result["ok"]
+    assert len(result["updated"]) == changed
+    upstream.assert_installed(target)
+
+    result = upstream.manager(**options).upgrade([target])
+    assert result["ok"]
+    assert result["updated"] == [] and result["installed"] == []
+
+
+@pytest.mark.parametrize("fetch_strategy", ["blobless", "treeless"])
+def test_partial_mirror_fetches_only_requested_skills(upstream, tmp_path, fetch_strategy):
+    skill_name = sorted(upstream.skills)[0]
+    assert upstream.manager(fetch_strategy=fetch_strategy).install([tmp_path / "target"], skills=[skill_name])["ok"]
+    upstream.assert_installed(tmp_path / "target", [skill_name])
+    # The files of the other skills stay on the server
+    assert len(upstream.missing_objects()) >= (len(upstream.skills) - 1) * 3
+
+
+def test_full_mirror_has_every_object(upstream, tmp_path):
+    assert upstream.manager(fetch_strategy="full").install([tmp_path / "target"], skills=[sorted(upstream.skills)[0]])["ok"]
+    assert upstream.missing_objects() == []
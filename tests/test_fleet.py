@@ -0,0 +1,54 @@
+import io
+import shutil
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+def test_fleet_updates_only_stale_targets(upstream, tmp_path):
+    first, second = sorted(upstream.skills)[:2]
+    root = tmp_path / "root"
+    targets = {
+        "all": root / "a" / "skills",
+        "first": root / "b" / ".claude" / "skills",
+        "second": root / "c" / "skills",
+        "ignored": root / "d" / "node_modules" / "pkg" / "skills",
+        "too-deep": root / "e" / "1" / "2" / "3" / "4" / "skills",
+    }
+    manager = upstream.manager()
+    assert manager.install([targets["all"]])["ok"]
+    assert manager.install([targets["first"], targets["ignored"], targets["too-deep"]], skills=[first])["ok"]
+    assert manager.install([targets["second"]], skills=[second])["ok"]
+    old_commit = upstream.head()
+    upstream.commit({f"{upstream.skills[first]}/SKILL.md": "changed\n"})
+
+    output = io.StringIO()
+    result = upstream.manager(refresh=True, output=output).upgrade_fleet(root)
+    assert result["ok"]
+    assert result["targets"] == {str(targets["all"]): "updated", str(targets["first"]): "updated",
+                                 str(targets["second"]): "current"}
+    assert result["updated"] == [first]
+    upstream.assert_installed(targets["all"])
+    upstream.assert_installed(targets["first"], [first])
+    for name in ("ignored", "too-deep"):
+        upstream.assert_installed(targets[name], [first], rev=old_commit)
+
+
+def test_fleet_cli_reports_failed_targets(upstream, tmp_path):
+    root = tmp_path / "root"
+    skill_name = sorted(upstream.skills)[0]
+    assert upstream.manager().install([root / "a" / "skills"], skills=[skill_name])["ok"]
+
+    assert upstream.cli("--fleet", str(root), "--check").returncode == 0
+    upstream.mutate(fraction=1.0)
+    assert upstream.cli("--fleet", str(root), "--check").returncode == 1
+    assert upstream.cli("--fleet", str(root), "--refresh").returncode == 0
+    upstream.assert_installed(root / "a" / "skills", [skill_name])
+
+    # A skill removed upstream fails its target
+    shutil.rmtree(upstream.src_path / upstream.skills[skill_name])
+    upstream.commit({})
+    run = upstream.cli("--fleet", str(root), "--refresh")
+    assert run.returncode == 1
+    assert TEXTS["fleet_failed_target"].format(root / "a" / "skills", skill_name) in run.stdout
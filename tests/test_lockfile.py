@@ -0,0 +1,45 @@
+import json
+
+
+def test_install_writes_lockfile(upstream, tmp_path):
+    assert upstream.manager().install([tmp_path / "target"])["ok"]
+    lock = json.loads(upstream.lockfile_path.read_text(encoding="utf-8"))
+    assert [source["commit"] for source in lock["sources"].values()] == [upstream.head()]
+    assert sorted(lock["skills"]) == sorted(upstream.skills)
+
+
+def test_frozen_and_verify(upstream, tmp_path):
+    target = tmp_path / "target"
+    assert upstream.manager().verify([target]) == 2  # No skills.lock yet
+
+    locked_commit = upstream.head()
+    assert upstream.manager().install([target])["ok"]
+    assert upstream.manager().verify([target]) == 0
+
+    skill_file = target / sorted(upstream.skills)[0] / "SKILL.md"
+    skill_file.write_text("edited\n", encoding="utf-8")
+    assert upstream.manager().verify([target]) == 1
+    assert upstream.manager().install_frozen([target])["status"] == 0
+    assert upstream.manager().verify([target]) == 0
+
+    # A new commit upstream does not change what --frozen installs
+    upstream.mutate(fraction=1.0)
+    other = tmp_path / "other"
+    result = upstream.manager(refresh=True).install_frozen([other])
+    assert result["status"] == 0
+    upstream.assert_installed(other, rev=locked_commit)
+
+
+def test_frozen_refreshes_mirror_for_newer_lock(upstream, tmp_path, monkeypatch):
+    first = tmp_path / "first"
+    assert upstream.manager(fetch_strategy="full").install([first])["ok"]
+
+    # Another machine locks a newer commit while this cache is still fresh
+    upstream.mutate(fraction=1.0)
+    monkeypatch.setenv("SKILLS_MANAGER_CACHE", str(tmp_path / "other-cache"))
+    assert upstream.manager(fetch_strategy="full").install([tmp_path / "other"])["ok"]
+    monkeypatch.setenv("SKILLS_MANAGER_CACHE", str(tmp_path / "cache"))
+
+    result = upstream.manager(fetch_strategy="full", cache_ttl=3600).install_frozen([first])
+    assert result["status"] == 0
+    upstream.assert_installed(first)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import install_skills
+
+
+def test_file_lock_times_out_while_held(tmp_path):
+    lock_path = tmp_path / install_skills.LOCK_FILE
+    with install_skills.file_lock(lock_path):
+        with pytest.raises(TimeoutError):
+            with install_skills.file_lock(lock_path, timeout=0.2):
+                pass
+    with install_skills.file_lock(lock_path, timeout=0):
+        pass
+
+
+def leftovers(target_dir):
+    return [path.name for path in target_dir.iterdir() if ".staging-" in path.name or ".old-" in path.name]
+
+
+def test_concurrent_runs_share_target_and_cache(upstream, tmp_path):
+    target = str(tmp_path / "target")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        runs = list(pool.map(lambda _: upstream.cli("--target", target, "--yes"), range(4)))
+    assert [run.returncode for run in runs] == [0] * 4, [run.stdout for run in runs]
+    upstream.assert_installed(tmp_path / "target")
+    assert leftovers(tmp_path / "target") == []
+
+
+def test_failed_swap_keeps_the_installed_skill(upstream, tmp_path, monkeypatch):
+    target = tmp_path / "target"
+    old_commit = upstream.head()
+    assert upstream.manager().install([target])["ok"]
+    upstream.mutate(fraction=1.0)
+
+    def swap_directory(new_dir, dest_path):
+        raise OSError("simulated failure")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(install_skills, "swap_directory", swap_directory)
+        result = upstream.manager(refresh=True).upgrade([target])
+    assert not result["ok"] and result["failed"] == sorted(upstream.skills)
+    upstream.assert_installed(target, rev=old_commit)
+
+    assert upstream.manager().upgrade([target])["ok"]
+    upstream.assert_installed(target)
+    assert leftovers(target) == []
+
+
+def test_stale_staging_is_removed(upstream, tmp_path):
+    target = tmp_path / "target"
+    (target / ".some-skill.staging-12345" / "references").mkdir(parents=True)
+    (target / ".other-skill.old-12345").mkdir()
+    assert upstream.manager().install([target])["ok"]
+    assert leftovers(target) == []
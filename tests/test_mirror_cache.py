@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+def test_mirror_is_reused_within_ttl(upstream, tmp_path):
+    output = io.StringIO()
+    assert upstream.manager(output=output).install([tmp_path / "first"])["ok"]
+    assert TEXTS["cache_cloning"] in output.getvalue()
+
+    output = io.StringIO()
+    assert upstream.manager(output=output).install([tmp_path / "second"])["ok"]
+    assert TEXTS["cache_cloning"] not in output.getvalue()
+    assert TEXTS["cache_fresh"].format(install_skills.DEFAULT_CACHE_TTL) in output.getvalue()
+
+    # A refresh fetches the new upstream commit into the existing mirror
+    upstream.mutate(fraction=1.0)
+    output = io.StringIO()
+    assert upstream.manager(output=output, refresh=True).install([tmp_path / "second"])["ok"]
+    assert TEXTS["cache_fetching"] in output.getvalue()
+    upstream.assert_installed(tmp_path / "second")
+
+
+def test_offline_without_cache_fails(upstream, tmp_path):
+    output = io.StringIO()
+    result = upstream.manager(output=output, offline=True).install([tmp_path / "target"])
+    assert not result["ok"]
+    assert TEXTS["err_offline_no_cache"].format(upstream.url) in output.getvalue()
+
+
+@pytest.mark.parametrize("materialize", list(install_skills.MATERIALIZE_MODES))
+@pytest.mark.parametrize("fetch_strategy", list(install_skills.FETCH_STRATEGIES))
+def test_offline_never_fetches(upstream, tmp_path, fetch_strategy, materialize):
+    cached, uncached = sorted(upstream.skills)[:2]
+    options = {"fetch_strategy": fetch_strategy, "materialize": materialize}
+    assert upstream.manager(**options).install([tmp_path / "first"], skills=[cached])["ok"]
+    missing = upstream.missing_objects()
+    upstream.bare_path.rename(tmp_path / "moved.git")
+
+    result = upstream.manager(offline=True, **options).install([tmp_path / "second"], skills=[cached])
+    assert result["ok"] and result["installed"] == [cached]
+    upstream.assert_installed(tmp_path / "second", [cached])
+
+    output = io.StringIO()
+    result = upstream.manager(offline=True, output=output, **options).install([tmp_path / "second"], skills=[uncached])
+    if fetch_strategy == "full":
+        assert result["ok"] and result["installed"] == [uncached]
+    else:
+        assert result["failed"] == [uncached]
+        assert TEXTS["err_offline_not_cached"].format(uncached) in output.getvalue()
+        assert upstream.missing_objects() == missing
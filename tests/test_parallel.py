@@ -0,0 +1,47 @@
+import io
+import os
+import sys
+
+import pytest
+
+import install_skills
+
+
+def install_output(upstream, target, jobs):
+    output = io.StringIO()
+    events = []
+    manager = upstream.manager(output=output, jobs=jobs, progress=lambda event, data: events.append((event, data)))
+    assert manager.install([target])["ok"]
+    return output.getvalue().replace(str(target), "TARGET"), [data["skill"] for event, data in events if event == "skill"]
+
+
+def test_parallel_output_reads_like_a_sequential_run(upstream, tmp_path):
+    assert upstream.manager().install([tmp_path / "warm"])["ok"]  # Both runs below find a fresh mirror
+    sequential = install_output(upstream, tmp_path / "sequential", jobs=1)
+    parallel = install_output(upstream, tmp_path / "parallel", jobs=8)
+    assert parallel == sequential
+    assert sequential[1] == list(upstream.skills)
+
+
+@pytest.mark.parametrize("materialize", list(install_skills.MATERIALIZE_MODES))
+def test_change_counts_match_across_backends(upstream, tmp_path, materialize):
+    skill_name = sorted(upstream.skills)[0]
+    repo_path = upstream.skills[skill_name]
+    target = tmp_path / "target"
+    assert upstream.manager(materialize=materialize).install([target])["ok"]
+
+    (upstream.src_path / repo_path / "references" / "ref-001.md").unlink()
+    upstream.commit({f"{repo_path}/SKILL.md": "changed\n", f"{repo_path}/scripts/run.sh": "#!/bin/sh\n"})
+    result = upstream.manager(materialize=materialize, refresh=True).upgrade([target])
+    record = next(record for record in result["skills"] if record["skill"] == skill_name)
+    assert (record["added"], record["modified"], record["removed"]) == (1, 1, 1)
+    upstream.assert_installed(target)
+    assert not (target / skill_name / "references" / "ref-001.md").exists()
+
+    if sys.platform != "win32":
+        os.chmod(upstream.src_path / repo_path / "scripts" / "run.sh", 0o755)
+        upstream.commit({})
+        result = upstream.manager(materialize=materialize, refresh=True).upgrade([target])
+        record = next(record for record in result["skills"] if record["skill"] == skill_name)
+        assert (record["added"], record["modified"], record["removed"]) == (0, 1, 0)
+        assert os.stat(target / skill_name / "scripts" / "run.sh").st_mode & 0o100
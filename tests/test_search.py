@@ -0,0 +1,65 @@
+import io
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+CATEGORY_001 = ["category-001-skill-000", "category-001-skill-001", "category-001-skill-002"]
+
+
+def names(skills):
+    return [skill["name"] for skill in skills]
+
+
+def test_search_ranks_exact_name_first(upstream):
+    manager = upstream.manager(output=io.StringIO())
+    assert names(manager.search("category-001-skill-001"))[0] == "category-001-skill-001"
+    # Every skill mentions "synthetic" in its description
+    assert names(manager.search("synthetic")) == sorted(upstream.skills)
+    assert names(manager.search("synthetic", limit=2)) == sorted(upstream.skills)[:2]
+    assert manager.search("kubernetes") == []
+
+
+def test_search_matches_prefixes_and_typos(upstream):
+    manager = upstream.manager(output=io.StringIO())
+    assert names(manager.search("synth")) == sorted(upstream.skills)
+    assert names(manager.search("sinthetic")) == sorted(upstream.skills)
+    assert set(names(manager.search("category-001 skill"))) >= set(CATEGORY_001)
+
+
+def test_match_skill_names_ignores_categories_and_descriptions():
+    skills = [{"name": "sql-patterns", "category": "helm", "description": "Helm charts"},
+              {"name": "helm", "category": "ops", "description": "Kubernetes packages"},
+              {"name": "helm-charts", "category": "ops", "description": ""},
+              {"name": "help-writing", "category": "docs", "description": ""}]
+    assert names(install_skills.match_skill_names(skills, "helm")) == ["helm", "helm-charts"]
+    assert names(install_skills.match_skill_names(skills, "Helm Charts")) == ["helm-charts"]
+    assert names(install_skills.match_skill_names(skills, "kubernetes")) == []
+    assert install_skills.match_skill_names(skills, "  ") == []
+
+
+def test_install_matching_installs_name_prefix_matches_only(upstream, tmp_path):
+    target = tmp_path / "target"
+    output = io.StringIO()
+    result = upstream.manager(output=output).install_matching("category-001-skill-00", [target])
+    assert result["ok"]
+    # The word search also ranks category-000-skill-001, which shares "skill" and "001"
+    assert sorted(result["installed"]) == CATEGORY_001
+    assert sorted(path.name for path in target.iterdir() if path.is_dir()) == CATEGORY_001
+    upstream.assert_installed(target, CATEGORY_001)
+
+
+def test_install_matching_ignores_description_and_category_words(upstream, tmp_path):
+    target = tmp_path / "target"
+    for query in ("synthetic", "benchmarking", "skill"):
+        output = io.StringIO()
+        result = upstream.manager(output=output).install_matching(query, [target])
+        assert result["ok"] and result["installed"] == []
+        assert TEXTS["search_none"].format(query) in output.getvalue()
+    assert not target.exists() or [path for path in target.iterdir() if path.is_dir()] == []
+
+
+def test_install_matching_exact_name(upstream, tmp_path):
+    target = tmp_path / "target"
+    result = upstream.manager(output=io.StringIO()).install_matching("Category 000 Skill 002", [target])
+    assert result["ok"] and result["installed"] == ["category-000-skill-002"]
+    upstream.assert_installed(target, ["category-000-skill-002"])
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def other(make_upstream):
+    """A second upstream whose skills have the same names but different contents."""
+    other = make_upstream("other")
+    other.commit({f"{path}/SKILL.md": f"other {name}\n" for name, path in other.skills.items()})
+    return other
+
+
+def test_sources_are_fetched_and_locked_together(upstream, other, tmp_path):
+    default_skill, other_skill = sorted(upstream.skills)[:2]
+    config = {"repo_url": upstream.url, "skills": {default_skill: upstream.skills[default_skill]},
+              "sources": [{"name": "other", "url": other.url, "namespace": "team",
+                           "skills": {other_skill: other.skills[other_skill]}}]}
+    events = []
+    manager = upstream.manager(config, progress=lambda event, data: events.append((event, data)))
+
+    target = tmp_path / "target"
+    result = manager.install([target])
+    assert result["ok"] and result["installed"] == sorted([default_skill, f"team-{other_skill}"])
+    assert sorted(data["source"] for event, data in events if event == "fetch") == ["default", "other"]
+    upstream.assert_installed(target, [default_skill])
+    assert (target / f"team-{other_skill}" / "SKILL.md").read_text() == f"other {other_skill}\n"
+
+    lock = json.loads(upstream.lockfile_path.read_text(encoding="utf-8"))
+    assert {name: source["commit"] for name, source in lock["sources"].items()} == {
+        "default": upstream.head(), "other": other.head()}
+    assert upstream.manager(config).verify([target]) == 0
+
+
+def test_first_source_wins_a_name_collision(upstream, other, tmp_path):
+    skill_name = sorted(upstream.skills)[0]
+    config = dict(upstream.config, sources=[{"url": other.url, "skills": dict(other.skills)}])
+    target = tmp_path / "target"
+    assert upstream.manager(config).install([target])["ok"]
+    upstream.assert_installed(target, [skill_name])
+
+
+def test_source_pinned_to_a_commit(upstream, other, tmp_path):
+    skill_name = sorted(other.skills)[0]
+    pinned = other.head()
+    other.mutate(fraction=1.0)
+    config = {"repo_url": upstream.url, "skills": {},
+              "sources": [{"name": "other", "url": other.url, "ref": pinned,
+                           "skills": {skill_name: other.skills[skill_name]}}]}
+    target = tmp_path / "target"
+    assert upstream.manager(config).install([target])["ok"]
+    assert (target / skill_name / "SKILL.md").read_text() == f"other {skill_name}\n"
@@ -0,0 +1,92 @@
+import json
+import shutil
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+def add_requirements(upstream, requirements):
+    upstream.commit({f"{upstream.skills[name]}/requirements.txt": text for name, text in requirements.items()})
+
+
+def test_status_reports_installed_skills(upstream, tmp_path, pip_runs):
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+
+    report = upstream.manager().status([target])
+    assert [entry["path"] for entry in report["targets"]] == [str(target)]
+    skills = report["targets"][0]["skills"]
+    assert sorted(skills) == sorted(upstream.skills)
+    assert report["skills"] == len(upstream.skills)
+    for skill_name, skill in skills.items():
+        files = upstream.source_files(skill_name)
+        assert skill["commit"] == upstream.head()
+        assert skill["source"] == "default"
+        assert skill["files"] == len(files)
+        assert skill["size"] == sum(len(data) for data in files.values())
+        assert skill["installed"] and skill["updated"]
+        assert skill["dependencies"] == ("satisfied" if skill_name == first else "none")
+    assert report["size"] == sum(skill["size"] for skill in skills.values())
+
+
+def test_status_follows_upgrades_and_failed_dependencies(upstream, tmp_path, pip_runs, monkeypatch):
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    before = upstream.manager().status([target])["targets"][0]["skills"]
+
+    first = sorted(upstream.skills)[0]
+    add_requirements(upstream, {first: "alpha==1.0\n"})
+
+    def failing_pip(requirement_files=(), packages=()):
+        raise RuntimeError("pip failed")
+
+    monkeypatch.setattr(install_skills, "install_python_packages", failing_pip)
+    assert not upstream.manager(refresh=True).upgrade([target])["ok"]
+
+    after = upstream.manager().status([target])["targets"][0]["skills"]
+    assert after[first]["commit"] == upstream.head()
+    assert after[first]["files"] == before[first]["files"] + 1
+    assert after[first]["installed"] == before[first]["installed"]
+    assert after[first]["dependencies"] == "failed"
+
+
+def test_status_needs_neither_git_nor_the_cache(upstream, tmp_path, cache_dir):
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    shutil.rmtree(cache_dir)
+    shutil.rmtree(upstream.bare_path)
+
+    report = upstream.manager().status([target])
+    assert report["skills"] == len(upstream.skills)
+    assert upstream.manager().status([tmp_path / "empty"]) == {"targets": [], "skills": 0, "size": 0}
+
+
+def test_status_defaults_to_known_targets(upstream, tmp_path):
+    targets = [tmp_path / "first", tmp_path / "second"]
+    assert upstream.manager().install(targets)["ok"]
+
+    paths = [entry["path"] for entry in upstream.manager().status()["targets"]]
+    assert all(str(target) in paths for target in targets)
+
+
+def test_status_cli(upstream, tmp_path):
+    target = tmp_path / "target"
+    assert upstream.cli("--target", str(target), "--yes").returncode == 0
+
+    run = upstream.cli("--target", str(target), "--status", "--json")
+    assert run.returncode == 0
+    report = json.loads(run.stdout)
+    assert sorted(report["targets"][0]["skills"]) == sorted(upstream.skills)
+
+    run = upstream.cli("--target", str(target), "--status")
+    assert run.returncode == 0
+    for skill_name in upstream.skills:
+        assert skill_name in run.stdout
+    assert f"{len(upstream.skills)} skill(s) in 1 target(s)" in run.stdout
+
+    run = upstream.cli("--target", str(tmp_path / "empty"), "--status")
+    assert TEXTS["status_empty"] in run.stdout
+
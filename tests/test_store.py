@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import install_skills
+
+
+def test_store_links_read_only_files(upstream, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    manager = upstream.manager(store=True)
+    assert manager.install([first])["ok"]
+    assert manager.install([second])["ok"]
+    upstream.assert_installed(second)
+
+    skill_name = sorted(upstream.skills)[0]
+    first_file, second_file = first / skill_name / "SKILL.md", second / skill_name / "SKILL.md"
+    assert os.path.samefile(first_file, second_file)
+    assert not os.stat(first_file).st_mode & 0o222
+
+
+def test_edited_store_file_is_not_linked_again(upstream, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    manager = upstream.manager(store=True)
+    assert manager.install([first])["ok"]
+
+    # An in-place edit through a hardlink must not reach later installs
+    first_file = first / sorted(upstream.skills)[0] / "SKILL.md"
+    os.chmod(first_file, 0o644)
+    with open(first_file, "a", encoding="utf-8") as f:
+        f.write("edited\n")
+    assert manager.install([second])["ok"]
+    upstream.assert_installed(second)
+    assert upstream.manager().verify([first]) == 1
+
+
+def test_gc_prunes_unused_files(upstream, tmp_path, cache_dir, monkeypatch):
+    first, second = tmp_path / "first", tmp_path / "second"
+    manager = upstream.manager(store=True)
+    assert manager.install([first])["ok"]
+    assert manager.install([second], skills=sorted(upstream.skills)[:1])["ok"]
+
+    monkeypatch.setattr(install_skills, "STORE_GC_GRACE", -1)
+    store_files = cache_dir / "store" / "files"
+    stored = len(install_skills.list_files(store_files))
+    manager.collect_garbage()
+    assert len(install_skills.list_files(store_files)) == stored
+
+    shutil.rmtree(first)
+    manager.collect_garbage()
+    # Only the files of the skill still installed in the second target survive
+    assert len(install_skills.list_files(store_files)) == 3
+    upstream.assert_installed(second, sorted(upstream.skills)[:1])
+
+    shutil.rmtree(second)
+    manager.collect_garbage()
+    assert install_skills.list_files(store_files) == {}
@@ -0,0 +1,30 @@
+import os
+
+import install_skills
+
+
+def test_targets_share_one_fetch_and_hardlinks(upstream, tmp_path):
+    events = []
+    first, second = tmp_path / "first", tmp_path / "second"
+    manager = upstream.manager(progress=lambda event, data: events.append((event, data)))
+
+    result = manager.install([first, second])
+    assert result["ok"]
+    assert [event for event, _ in events].count("fetch") == 1
+    for target in (first, second):
+        upstream.assert_installed(target)
+    for skill_name in upstream.skills:
+        for rel_path in install_skills.list_files(first / skill_name):
+            assert os.path.samefile(first / skill_name / rel_path, second / skill_name / rel_path), rel_path
+
+
+def test_update_of_one_target_leaves_linked_copies_alone(upstream, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    old_commit = upstream.head()
+    assert upstream.manager().install([first, second])["ok"]
+
+    upstream.mutate(fraction=1.0)
+    assert upstream.manager(refresh=True).upgrade([first])["ok"]
+    upstream.assert_installed(first)
+    # Changed files are replaced, not rewritten through the shared inode
+    upstream.assert_installed(second, rev=old_commit)
@@ -0,0 +1,29 @@
+import json
+
+
+def subprocess_spans(spans, name):
+    return [span for span in spans if span["cat"] == "subprocess" and span["name"] == name]
+
+
+def test_blob_streaming_is_traced(upstream, tmp_path):
+    manager = upstream.manager(materialize="objects", trace=True)
+    assert manager.install([tmp_path / "target"])["ok"]
+    file_count = sum(len(upstream.source_files(name)) for name in upstream.skills)
+    assert len(subprocess_spans(manager.spans, "git cat-file")) >= file_count
+    skill_spans = [span for span in manager.spans if span["cat"] == "skill"]
+    assert skill_spans and all(span["subprocess"] > 0 for span in skill_spans)
+
+
+def test_catalog_blob_reads_are_traced(upstream):
+    manager = upstream.manager(trace=True)
+    assert manager.list_skills()
+    assert subprocess_spans(manager.spans, "git cat-file")
+
+
+def test_trace_file(upstream, tmp_path):
+    trace_path = tmp_path / "trace.json"
+    run = upstream.cli("--target", str(tmp_path / "target"), "--yes", "--trace-file", str(trace_path))
+    assert run.returncode == 0
+    events = json.loads(trace_path.read_text(encoding="utf-8"))["traceEvents"]
+    names = {event["name"] for event in events if event["cat"] == "subprocess"}
+    assert {"git clone", "git cat-file"} <= names
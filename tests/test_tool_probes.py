@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+import install_skills
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the fake tool is a shell script")
+
+
+@pytest.fixture
+def fake_tool(tmp_path, monkeypatch):
+    """A "fake-tool" on PATH printing a version and counting its runs in calls.log."""
+    tool_dir = tmp_path / "bin"
+    tool_dir.mkdir()
+    tool_path = tool_dir / "fake-tool"
+    tool_path.write_text(f'#!/bin/sh\necho run >> "{tool_dir / "calls.log"}"\necho "fake-tool version 2.3.1"\n')
+    tool_path.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tool_dir}{os.pathsep}{os.environ['PATH']}")
+    return tool_path
+
+
+def probe_runs(tool_path):
+    log_path = tool_path.parent / "calls.log"
+    return len(log_path.read_text().splitlines()) if log_path.exists() else 0
+
+
+def tool_config(upstream, min_version="2.0"):
+    skill_names = sorted(upstream.skills)
+    return dict(upstream.config, tools={"fake-tool": {"package": "fake-tool-pkg", "min_version": min_version}},
+                skill_tools={name: ["fake-tool"] for name in skill_names[:3]})
+
+
+def test_tool_is_probed_once_and_cached(upstream, tmp_path, cache_dir, fake_tool, pip_runs):
+    assert upstream.manager(tool_config(upstream)).install([tmp_path / "first"])["ok"]
+    assert probe_runs(fake_tool) == 1  # Once per run, not once per skill
+    assert (cache_dir / "tool_probes.json").exists()
+    assert pip_runs == []
+
+    assert upstream.manager(tool_config(upstream)).install([tmp_path / "second"])["ok"]
+    assert probe_runs(fake_tool) == 1
+
+    # Reinstalling the tool (a new mtime) invalidates the cached probe
+    stat = fake_tool.stat()
+    os.utime(fake_tool, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert upstream.manager(tool_config(upstream)).install([tmp_path / "third"])["ok"]
+    assert probe_runs(fake_tool) == 2
+
+
+def test_outdated_tool_is_queued(upstream, tmp_path, fake_tool, pip_runs):
+    assert upstream.manager(tool_config(upstream, min_version="2.10")).install([tmp_path / "target"])["ok"]
+    assert pip_runs == [([], ["fake-tool-pkg>=2.10"])]
+
+
+def test_missing_tool_is_queued_without_a_probe(upstream, tmp_path, pip_runs):
+    config = dict(upstream.config, tools={"absent-tool": {"probe": "absent-tool-xyz --version"}},
+                  skill_tools={sorted(upstream.skills)[0]: ["absent-tool"]})
+    assert upstream.manager(config).install([tmp_path / "target"])["ok"]
+    assert pip_runs == [([], ["absent-tool"])]
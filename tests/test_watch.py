@@ -0,0 +1,83 @@
+import io
+import shutil
+import time
+
+import pytest
+
+import install_skills
+
+TEXTS = install_skills.TEXTS["en"]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the waits between polls instead of sleeping; a test may append callbacks to run during them."""
+    waits, callbacks = [], []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        if callbacks:
+            callbacks.pop(0)()
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    return waits, callbacks
+
+
+def test_watch_applies_upstream_changes(upstream, tmp_path, sleeps):
+    waits, callbacks = sleeps
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    callbacks.append(lambda: upstream.mutate(fraction=0.5))
+
+    output = io.StringIO()
+    result = upstream.manager(output=output).watch([target], interval=10, polls=3)
+    assert result["ok"] and result["updates"] == 1
+    assert result["updated"]
+    assert len(waits) == 2 and all(9 <= wait <= 11 for wait in waits)
+    assert output.getvalue().count("moved to") == 1
+    upstream.assert_installed(target)
+
+
+def test_watch_does_nothing_while_upstream_is_unchanged(upstream, tmp_path, sleeps):
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    before = upstream.mirror_path.stat().st_mtime_ns
+
+    result = upstream.manager(output=io.StringIO()).watch([target], interval=10, polls=3)
+    assert result["ok"] and result["updates"] == 0 and result["updated"] == []
+    assert upstream.mirror_path.stat().st_mtime_ns == before
+
+
+def test_watch_backs_off_while_remote_is_unreachable(upstream, tmp_path, sleeps):
+    waits, _ = sleeps
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+    shutil.move(upstream.bare_path, tmp_path / "moved.git")
+
+    output = io.StringIO()
+    result = upstream.manager(output=output).watch([target], interval=10, polls=4)
+    assert result["updates"] == 0
+    assert output.getvalue().count("Could not reach") == 4
+    # Each failed poll doubles the wait, give or take the jitter
+    assert len(waits) == 3
+    for wait, expected in zip(waits, (20, 40, 80)):
+        assert expected * 0.9 - 1 <= wait <= expected * 1.1 + 1
+
+
+def test_watch_delay_is_capped():
+    for _ in range(100):
+        assert 9 <= install_skills.watch_delay(10, 0) <= 11
+        assert install_skills.watch_delay(10, 20) <= install_skills.MAX_WATCH_BACKOFF * (1 + install_skills.WATCH_JITTER)
+        assert install_skills.watch_delay(0, 0) >= 1
+
+
+def test_watch_refuses_offline(upstream, tmp_path, sleeps):
+    waits, _ = sleeps
+    target = tmp_path / "target"
+    assert upstream.manager().install([target])["ok"]
+
+    output = io.StringIO()
+    result = upstream.manager(output=output, offline=True).watch([target], interval=10, polls=2)
+    assert result["updates"] == 0
+    assert TEXTS["err_watch_offline"] in output.getvalue()
+    assert waits == []
@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+import venv
+import zipfile
+
+import pytest
+
+
+def write_wheel(wheel_dir, name="tinypkg", version="1.0"):
+    """Write a minimal pure-Python wheel, so pip needs neither an index nor a build backend."""
+    wheel_dir.mkdir(exist_ok=True)
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": f"VERSION = {version!r}\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: tests\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    files[f"{dist_info}/RECORD"] = "".join(f"{path},,\n" for path in files) + f"{dist_info}/RECORD,,\n"
+    wheel_path = wheel_dir / f"{name}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel_path, "w") as wheel:
+        for path, text in files.items():
+            wheel.writestr(path, text)
+    return wheel_path
+
+
+@pytest.fixture
+def python(tmp_path):
+    """An interpreter of a fresh virtualenv that uses this interpreter's pip but installs into itself."""
+    venv.create(tmp_path / "venv", system_site_packages=True, with_pip=False)
+    return tmp_path / "venv" / ("Scripts/python.exe" if sys.platform == "win32" else "bin/python")
+
+
+def test_wheelhouse_build_and_offline_install(upstream, tmp_path, python):
+    skill_name = sorted(upstream.skills)[0]
+    upstream.commit({f"{upstream.skills[skill_name]}/requirements.txt": "tinypkg==1.0\n"})
+    write_wheel(tmp_path / "index")
+    wheelhouse = tmp_path / "wheelhouse"
+    pip_env = {"PIP_NO_INDEX": "1", "PIP_FIND_LINKS": str(tmp_path / "index"), "PIP_DISABLE_PIP_VERSION_CHECK": "1"}
+
+    run = upstream.cli("--build-wheelhouse", str(wheelhouse), env=pip_env)
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert [path.name for path in wheelhouse.glob("*.whl")] == ["tinypkg-1.0-py3-none-any.whl"]
+    manifest = json.loads((wheelhouse / "wheelhouse.json").read_text(encoding="utf-8"))
+    assert manifest["requirements"] == [skill_name]
+    assert manifest["wheels"] == ["tinypkg-1.0-py3-none-any.whl"]
+
+    # Only the wheelhouse is available to pip now
+    (tmp_path / "index" / "tinypkg-1.0-py3-none-any.whl").unlink()
+    run = upstream.cli("--target", str(tmp_path / "target"), "--yes", "--wheelhouse", str(wheelhouse), python=python,
+                       env={"PIP_DISABLE_PIP_VERSION_CHECK": "1"})
+    assert run.returncode == 0, run.stdout + run.stderr
+    subprocess.run([str(python), "-c", "import tinypkg; assert tinypkg.VERSION == '1.0'"], check=True,
+                   cwd=tmp_path)
+
+
+def test_missing_wheelhouse_fails_the_install(upstream, tmp_path, python):
+    skill_name = sorted(upstream.skills)[0]
+    upstream.commit({f"{upstream.skills[skill_name]}/requirements.txt": "tinypkg==1.0\n"})
+    run = upstream.cli("--target", str(tmp_path / "target"), "--yes", "--wheelhouse", str(tmp_path / "missing"),
+                       python=python)
+    assert run.returncode == 1
+    assert str(tmp_path / "missing") in run.stdout